@@ -0,0 +1,129 @@
+"""Время импорта модулей бота по `python -X importtime`.
+
+Каждый модуль импортируется в отдельном чистом интерпретаторе, несколько
+раз; в отчёт идёт медиана суммарного времени и самые тяжёлые
+зависимости из последнего прогона. Результат дописывается в
+benchmarks/results/import_time.jsonl (каталог в .gitignore) вместе с
+коммитом, как в load_test.
+
+    python benchmarks/import_bench.py
+    python benchmarks/import_bench.py --modules bet_bot.scoring --top 10
+    python benchmarks/import_bench.py --compare
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_FILE = os.path.join(ROOT, "benchmarks", "results", "import_time.jsonl")
+MODULES = ["bet_bot.scoring", "bet_bot.app", "bet_bot.bot"]
+
+
+def _importtime(code: str) -> list:
+    # [(модуль, собственное время импорта в мкс)]
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get("PYTHONPATH")])))
+    env.pop("API_TOKEN", None)  # импорт не должен требовать токен
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code], capture_output=True, text=True, env=env, check=True,
+    )
+    rows = []
+    for line in proc.stderr.splitlines():
+        # "import time: self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        own, _, name = line.removeprefix("import time:").split("|")
+        rows.append((name.strip(), int(own)))
+    return rows
+
+
+def import_time(module: str, startup: set) -> tuple:
+    # (суммарное время импорта в мкс, {пакет верхнего уровня: мкс}); модули,
+    # загруженные самим интерпретатором при старте, не считаются
+    heaviest = {}
+    for name, own in _importtime(f"import {module}"):
+        if name not in startup:
+            package = name.split(".")[0]
+            heaviest[package] = heaviest.get(package, 0) + own
+    return sum(heaviest.values()), heaviest
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True, cwd=ROOT,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_results(results: list):
+    print(f"{'коммит':<10} {'модуль':<18} {'мс':>9}  дата")
+    for r in results:
+        print(f"{r['commit']:<10} {r['module']:<18} {r['ms']:>9}  {r['date']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--top", type=int, default=5, help="сколько самых тяжёлых импортов показать")
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true", help="не дописывать результат")
+    parser.add_argument("--compare", action="store_true", help="показать сохранённые прогоны и выйти")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_results(load_results(args.results))
+        return
+
+    commit = git_commit()
+    date = datetime.datetime.now().isoformat(timespec="seconds")
+    startup = {name for name, _ in _importtime("pass")}
+    results = []
+    for module in args.modules:
+        times = []
+        for _ in range(args.runs):
+            total, heaviest = import_time(module, startup)
+            times.append(total)
+        top = sorted(heaviest.items(), key=lambda item: item[1], reverse=True)[:args.top]
+        results.append({
+            "commit": commit,
+            "date": date,
+            "module": module,
+            "ms": round(statistics.median(times) / 1000, 1),
+            "runs": args.runs,
+            "heaviest": {name: round(us / 1000, 1) for name, us in top},
+            "python": platform.python_version(),
+        })
+
+    previous = load_results(args.results)
+    for result in results:
+        history = [r for r in previous if r["module"] == result["module"]]
+        print_results(history[-3:] + [result])
+        print("  тяжелее всего: " + ", ".join(f"{name} {ms} мс" for name, ms in result["heaviest"].items()))
+        if history:
+            base = history[-1]
+            print(f"  относительно {base['commit']}: {(result['ms'] / base['ms'] - 1) * 100:+.1f}%")
+        print()
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            for result in results:
+                f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
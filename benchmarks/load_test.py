@@ -0,0 +1,228 @@
+"""Офлайн нагрузочный тест: синтетические апдейты идут через dp.feed_update
+с заглушкой вместо сессии бота, сеть не нужна.
+
+Каждый симулированный пользователь проходит один из сценариев:
+  - /bet: матч, тип ставки, коэффициент;
+  - /teamstats и выбор команды;
+  - /history;
+  - свободный ввод BetForm: тип, коэффициент, статистика.
+Отчёт: апдейты в секунду, p50/p99 задержки feed_update, пиковый RSS.
+Результат дописывается в benchmarks/results/load_test.jsonl (каталог в
+.gitignore) вместе с коммитом, так что прогоны можно сравнивать между
+коммитами.
+
+    python benchmarks/load_test.py --users 2000 --concurrency 200
+    python benchmarks/load_test.py --compare
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+
+
+# benchmarks/results/ в .gitignore: прогоны локальные и в коммиты не попадают
+RESULTS_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "results", "load_test.jsonl")
+UNLIMITED = 1e9
+
+# Доля пользователей в каждом сценарии
+MIX = {"bet": 0.5, "teamstats": 0.2, "history": 0.15, "betform": 0.15}
+BET_TYPES = ["П1", "П2", "Ничья", "ТБ 2.5", "ТМ 2.5"]
+BETFORM_INPUTS = {
+    "Победа команды": lambda rng: f"{rng.randint(20, 80)} {rng.randint(20, 80)} {rng.randint(0, 60)} {rng.randint(0, 40)}",
+    "Ничья": lambda rng: f"{rng.randint(20, 80)} {rng.randint(20, 80)} {rng.randint(0, 60)}",
+    "Тотал больше": lambda rng: f"{rng.uniform(0.5, 3):.1f} {rng.uniform(0.5, 3):.1f} 2.5",
+    "Тотал меньше": lambda rng: f"{rng.uniform(0.5, 3):.1f} {rng.uniform(0.5, 3):.1f} 2.5",
+}
+
+
+def make_session_class():
+    from aiogram.methods import EditMessageText, GetMe, SendMessage
+    from aiogram.types import Chat, Message, User
+
+    from bet_bot.render import RenderedMarkupSession
+
+    class StubSession(RenderedMarkupSession):
+        # Отвечает как Bot API, ничего не отправляя; тело запроса собирается
+        # как при настоящей отправке
+        def __init__(self, render, **kwargs):
+            super().__init__(render, **kwargs)
+            self.requests = 0
+
+        async def make_request(self, bot, method, timeout=None):
+            self.requests += 1
+            self.build_form_data(bot, method)
+            if isinstance(method, (SendMessage, EditMessageText)):
+                return Message(
+                    message_id=self.requests, date=datetime.datetime.now(),
+                    chat=Chat(id=method.chat_id, type="private"), text=method.text,
+                )
+            if isinstance(method, GetMe):
+                return User(id=1, is_bot=True, first_name="bench", username="bench_bot")
+            return True
+
+        async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+            yield b""
+
+    return StubSession
+
+
+def build_scenarios(users: int, teams: list, seed: int) -> list:
+    # [(user_id, сценарий, [тексты])]
+    rng = random.Random(seed)
+    names, weights = zip(*MIX.items())
+    scenarios = []
+    for user_id in range(1, users + 1):
+        kind = rng.choices(names, weights)[0]
+        if kind == "bet":
+            team1, team2 = rng.sample(teams, 2)
+            texts = ["/bet", f"{team1} - {team2}", rng.choice(BET_TYPES), f"{rng.uniform(1.2, 6):.2f}"]
+        elif kind == "teamstats":
+            texts = ["/teamstats", rng.choice(teams)]
+        elif kind == "history":
+            texts = ["/history"]
+        else:
+            bet_type = rng.choice(list(BETFORM_INPUTS))
+            texts = [bet_type, f"{rng.uniform(1.2, 6):.2f}", BETFORM_INPUTS[bet_type](rng)]
+        scenarios.append((user_id, kind, texts))
+    return scenarios
+
+
+def percentile(values: list, q: float) -> float:
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+def peak_rss_mb() -> float:
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+async def run(users: int, concurrency: int, seed: int) -> dict:
+    from aiogram.types import Chat, Message, Update, User
+
+    from bet_bot.bot import BetForm, create_app
+    from bet_bot.config import Config
+    from bet_bot.sender import SendScheduler
+
+    workdir = tempfile.mkdtemp(prefix="betbot-load-")
+    app = create_app(Config(
+        api_token="123:bench",
+        database_name=os.path.join(workdir, "bets.db"),
+        fsm_database=os.path.join(workdir, "fsm.db"),
+    ))
+    # Сессия-заглушка и очередь отправки подключаются так же, как в боте;
+    # лимиты Bot API сняты — тест меряет обработку, а не ожидание bucket
+    app.session_class = make_session_class()
+    app.sender = SendScheduler(rate=UNLIMITED, burst=UNLIMITED, chat_rate=UNLIMITED, chat_burst=UNLIMITED)
+    await app.start()
+    scenarios = build_scenarios(users, sorted(app.stats.current.team_stats), seed)
+    latencies = []
+    update_ids = iter(range(1, 10 ** 9))
+    slots = asyncio.Semaphore(concurrency)
+
+    async def play(user_id: int, kind: str, texts: list):
+        chat = Chat(id=user_id, type="private")
+        user = User(id=user_id, is_bot=False, first_name="bench")
+        async with slots:
+            if kind == "betform":
+                # В BetForm нет команды входа — ставим состояние напрямую
+                context = app.dp.fsm.get_context(app.bot, chat_id=user_id, user_id=user_id)
+                await context.set_state(BetForm.bet_type)
+            for text in texts:
+                update_id = next(update_ids)
+                update = Update(update_id=update_id, message=Message(
+                    message_id=update_id, date=datetime.datetime.now(), chat=chat, from_user=user, text=text,
+                ))
+                start = time.perf_counter()
+                await app.dp.feed_update(app.bot, update)
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(play(*scenario) for scenario in scenarios))
+    elapsed = time.perf_counter() - start
+    requests = app.bot.session.requests
+    await app.close()
+    return {
+        "updates": len(latencies),
+        "seconds": round(elapsed, 3),
+        "updates_per_sec": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50) * 1000, 3),
+        "p99_ms": round(percentile(latencies, 0.99) * 1000, 3),
+        "peak_rss_mb": round(peak_rss_mb(), 1),
+        "requests": requests,
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def load_results(path: str) -> list:
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding="utf-8") as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def print_results(results: list):
+    print(f"{'коммит':<10} {'пользователи':>12} {'апд/с':>9} {'p50, мс':>9} {'p99, мс':>9} {'RSS, МБ':>9}  дата")
+    for r in results:
+        print(f"{r['commit']:<10} {r['users']:>12} {r['updates_per_sec']:>9} {r['p50_ms']:>9} "
+              f"{r['p99_ms']:>9} {r['peak_rss_mb']:>9}  {r['date']}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--results", default=RESULTS_FILE)
+    parser.add_argument("--no-save", action="store_true", help="не дописывать результат")
+    parser.add_argument("--compare", action="store_true", help="показать сохранённые прогоны и выйти")
+    args = parser.parse_args()
+
+    if args.compare:
+        print_results(load_results(args.results))
+        return
+
+    import logging
+    logging.disable(logging.INFO)
+
+    result = asyncio.run(run(args.users, args.concurrency, args.seed))
+    result.update({
+        "commit": git_commit(),
+        "date": datetime.datetime.now().isoformat(timespec="seconds"),
+        "users": args.users,
+        "concurrency": args.concurrency,
+        "seed": args.seed,
+        "python": platform.python_version(),
+    })
+    previous = [r for r in load_results(args.results)
+                if (r["users"], r["concurrency"], r["seed"]) == (args.users, args.concurrency, args.seed)]
+    print_results(previous[-3:] + [result])
+    if previous:
+        base = previous[-1]
+        change = (result["updates_per_sec"] / base["updates_per_sec"] - 1) * 100
+        print(f"\nапд/с относительно {base['commit']}: {change:+.1f}%")
+    if not args.no_save:
+        os.makedirs(os.path.dirname(args.results), exist_ok=True)
+        with open(args.results, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result, ensure_ascii=False) + "\n")
+
+
+if __name__ == "__main__":
+    main()
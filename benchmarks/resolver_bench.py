@@ -0,0 +1,54 @@
+"""Микробенчмарк TeamResolver: время разбора матча по вводу пользователя.
+
+Для каждого ввода — первый разбор (кэш снимка пуст) и повторный (из кэша),
+плюс время построения индекса на снимок статистики.
+
+    python benchmarks/resolver_bench.py
+"""
+import time
+
+from bet_bot.config import Config
+from bet_bot.stats_store import load_snapshot
+from bet_bot.team_resolver import TeamResolver
+
+
+INPUTS = [
+    "Arsenal-Chelsea",
+    "Nottingham Forest-Brighton",
+    "Man City vs Liverpool",
+    "Арсенал—Челси",
+    "ньюкасл - вилла",
+    "Chelsae - Arsnal",
+    "Notingham Forrest-Brigton",
+    "Arsenal Chelsea",
+    "foo-bar",
+]
+RUNS = 2000
+
+
+def main():
+    snapshot = load_snapshot(Config.stats_file, version=1)
+    names = snapshot.matchups.team_names
+    start = time.perf_counter()
+    for _ in range(100):
+        TeamResolver(names)
+    print(f"построение индекса: {(time.perf_counter() - start) / 100 * 1000:.2f} мс на снимок\n")
+
+    resolver = TeamResolver(names)
+    print(f"{'ввод':<28} {'без кэша, мкс':>14} {'из кэша, мкс':>13}  результат")
+    for text in INPUTS:
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            resolver._cache.clear()
+            pair = resolver.split_match(text)
+        cold_us = (time.perf_counter() - start) / RUNS * 1e6
+        start = time.perf_counter()
+        for _ in range(RUNS):
+            resolver.split_match(text)
+        warm_us = (time.perf_counter() - start) / RUNS * 1e6
+        found = f"{names[pair[0]]} - {names[pair[1]]}" if pair else "—"
+        print(f"{text:<28} {cold_us:>14.1f} {warm_us:>13.2f}  {found}")
+
+
+if __name__ == "__main__":
+    main()
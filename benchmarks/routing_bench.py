@@ -0,0 +1,84 @@
+"""Микробенчмарк маршрутизации: стоимость одного апдейта в зависимости от
+числа команд и текстовых кнопок.
+
+Сравниваются MessageRoutes (поиск по таблицам) и обычная цепочка aiogram
+(Command-фильтр на каждую команду и F.text на каждый текст). Сеть не нужна:
+обработчики ничего не отправляют.
+
+    python benchmarks/routing_bench.py
+"""
+import asyncio
+import datetime
+import time
+
+from aiogram import Bot, Dispatcher, F, Router
+from aiogram.filters import Command
+from aiogram.types import Chat, Message, Update, User
+
+from bet_bot.routing import MessageRoutes
+
+
+SIZES = (10, 100, 1000)
+UPDATES = 2000
+
+
+async def _noop(message: Message):
+    pass
+
+
+def build_table_dispatcher(size: int) -> Dispatcher:
+    routes = MessageRoutes()
+    for k in range(size):
+        routes.command(f"cmd{k}")(_noop)
+        routes.text(f"team{k}")(_noop)
+    dp = Dispatcher()
+    dp.include_router(routes.build_router())
+    return dp
+
+
+def build_chain_dispatcher(size: int) -> Dispatcher:
+    router = Router()
+    for k in range(size):
+        router.message.register(_noop, Command(f"cmd{k}"))
+        router.message.register(_noop, F.text == f"team{k}")
+    dp = Dispatcher()
+    dp.include_router(router)
+    return dp
+
+
+def make_updates(texts):
+    now = datetime.datetime.now()
+    chat = Chat(id=1, type="private")
+    user = User(id=1, is_bot=False, first_name="bench")
+    return [
+        Update(update_id=n, message=Message(message_id=n, date=now, chat=chat, from_user=user, text=text))
+        for n, text in enumerate(texts)
+    ]
+
+
+async def measure(dp: Dispatcher, bot: Bot, updates) -> float:
+    for update in updates[:100]:
+        await dp.feed_update(bot, update)
+    start = time.perf_counter()
+    for update in updates:
+        await dp.feed_update(bot, update)
+    return (time.perf_counter() - start) / len(updates) * 1e6
+
+
+async def main():
+    bot = Bot(token="123:bench")
+    print(f"{'size':>6} {'таблицы, мкс':>14} {'цепочка, мкс':>14}")
+    for size in SIZES:
+        # худший случай для цепочки — последние зарегистрированные команда и текст
+        texts = [f"/cmd{size - 1}", f"team{size - 1}"] * (UPDATES // 2)
+        updates = make_updates(texts)
+        table_us = await measure(build_table_dispatcher(size), bot, updates)
+        chain_us = await measure(build_chain_dispatcher(size), bot, updates)
+        print(f"{size:>6} {table_us:>14.1f} {chain_us:>14.1f}")
+    await bot.session.close()
+
+
+if __name__ == "__main__":
+    import logging
+    logging.disable(logging.INFO)
+    asyncio.run(main())
@@ -1,146 +0,0 @@
-apl_team_stats = {
-    "Liverpool": {
-        "win_percentage": 65.8,
-        "avg_goals_scored": 2.26,
-        "avg_goals_conceded": 1.18,
-        "top_scorer": "Mohamed Salah - 29"
-    },
-    "Arsenal": {
-        "win_percentage": 52.6,
-        "avg_goals_scored": 1.82,
-        "avg_goals_conceded": 0.89,
-        "top_scorer": "Bukayo Saka - 16"
-    },
-    "Manchester City": {
-        "win_percentage": 55.3,
-        "avg_goals_scored": 1.89,
-        "avg_goals_conceded": 1.16,
-        "top_scorer": "Erling Haaland - 22"
-    },
-    "Chelsea": {
-        "win_percentage": 52.6,
-        "avg_goals_scored": 1.68,
-        "avg_goals_conceded": 1.08,
-        "top_scorer": "Cole Palmer - 20"
-    },
-    "Newcastle United": {
-        "win_percentage": 52.6,
-        "avg_goals_scored": 1.76,
-        "avg_goals_conceded": 1.24,
-        "top_scorer": "Alexander Isak - 23"
-    },
-    "Aston Villa": {
-        "win_percentage": 50.0,
-        "avg_goals_scored": 1.53,
-        "avg_goals_conceded": 1.34,
-        "top_scorer": "Ollie Watkins - 15"
-    },
-    "Nottingham Forest": {
-        "win_percentage": 28.9,
-        "avg_goals_scored": 1.53,
-        "avg_goals_conceded": 1.21,
-        "top_scorer": "Chris Wood - 13"
-    },
-    "Brighton": {
-        "win_percentage": 34.2,
-        "avg_goals_scored": 1.61,
-        "avg_goals_conceded": 1.55,
-        "top_scorer": "João Pedro - 12"
-    },
-    "Bournemouth": {
-        "win_percentage": 31.6,
-        "avg_goals_scored": 1.58,
-        "avg_goals_conceded": 1.71,
-        "top_scorer": "Dominic Solanke - 14"
-    },
-    "Brentford": {
-        "win_percentage": 26.3,
-        "avg_goals_scored": 1.50,
-        "avg_goals_conceded": 1.61,
-        "top_scorer": "Yoane Wissa - 11"
-    },
-    "Fulham": {
-        "win_percentage": 28.9,
-        "avg_goals_scored": 1.42,
-        "avg_goals_conceded": 1.42,
-        "top_scorer": "Raúl Jiménez - 8"
-    },
-    "Crystal Palace": {
-        "win_percentage": 34.2,
-        "avg_goals_scored": 1.61,
-        "avg_goals_conceded": 1.45,
-        "top_scorer": "Jean-Philippe Mateta - 13"
-    },
-    "West Ham": {
-        "win_percentage": 23.7,
-        "avg_goals_scored": 1.29,
-        "avg_goals_conceded": 1.79,
-        "top_scorer": "Jarrod Bowen - 10"
-    },
-    "Wolverhampton": {
-        "win_percentage": 23.7,
-        "avg_goals_scored": 1.29,
-        "avg_goals_conceded": 1.76,
-        "top_scorer": "Matheus Cunha - 9"
-    },
-    "Everton": {
-        "win_percentage": 23.7,
-        "avg_goals_scored": 1.08,
-        "avg_goals_conceded": 1.13,
-        "top_scorer": "Abdoulaye Doucouré - 7"
-    },
-    "Leicester City": {
-        "win_percentage": 21.1,
-        "avg_goals_scored": 1.08,
-        "avg_goals_conceded": 1.32,
-        "top_scorer": "Jamie Vardy - 8"
-    },
-    "Southampton": {
-        "win_percentage": 18.4,
-        "avg_goals_scored": 1.00,
-        "avg_goals_conceded": 1.45,
-        "top_scorer": "Adam Armstrong - 8"
-    },
-    "Ipswich Town": {
-        "win_percentage": 13.2,
-        "avg_goals_scored": 0.92,
-        "avg_goals_conceded": 1.58,
-        "top_scorer": "Conor Chaplin - 6"
-    },
-    "Sheffield United": {
-        "win_percentage": 7.9,
-        "avg_goals_scored": 0.92,
-        "avg_goals_conceded": 2.71,
-        "top_scorer": "Gustavo Hamer - 4"
-    }
-}
-
-# --- H2H statistics as in your example ---
-apl_h2h_stats = {
-    "Arsenal-Chelsea": {"team1_win_percentage": 50.0, "draw_percentage": 20.0},
-    "Arsenal-Liverpool": {"team1_win_percentage": 20.0, "draw_percentage": 30.0},
-    "Arsenal-Manchester City": {"team1_win_percentage": 10.0, "draw_percentage": 20.0},
-    "Arsenal-Manchester United": {"team1_win_percentage": 30.0, "draw_percentage": 30.0},
-    "Arsenal-Newcastle United": {"team1_win_percentage": 50.0, "draw_percentage": 20.0},
-    "Arsenal-Tottenham": {"team1_win_percentage": 40.0, "draw_percentage": 30.0},
-
-    "Chelsea-Liverpool": {"team1_win_percentage": 10.0, "draw_percentage": 60.0},
-    "Chelsea-Manchester City": {"team1_win_percentage": 10.0, "draw_percentage": 30.0},
-    "Chelsea-Manchester United": {"team1_win_percentage": 20.0, "draw_percentage": 40.0},
-    "Chelsea-Newcastle United": {"team1_win_percentage": 40.0, "draw_percentage": 30.0},
-    "Chelsea-Tottenham": {"team1_win_percentage": 30.0, "draw_percentage": 40.0},
-
-    "Liverpool-Manchester City": {"team1_win_percentage": 30.0, "draw_percentage": 40.0},
-    "Liverpool-Manchester United": {"team1_win_percentage": 40.0, "draw_percentage": 30.0},
-    "Liverpool-Newcastle United": {"team1_win_percentage": 70.0, "draw_percentage": 20.0},
-    "Liverpool-Tottenham": {"team1_win_percentage": 50.0, "draw_percentage": 30.0},
-
-    "Manchester City-Manchester United": {"team1_win_percentage": 60.0, "draw_percentage": 10.0},
-    "Manchester City-Newcastle United": {"team1_win_percentage": 60.0, "draw_percentage": 20.0},
-    "Manchester City-Tottenham": {"team1_win_percentage": 40.0, "draw_percentage": 30.0},
-
-    "Manchester United-Newcastle United": {"team1_win_percentage": 40.0, "draw_percentage": 20.0},
-    "Manchester United-Tottenham": {"team1_win_percentage": 40.0, "draw_percentage": 30.0},
-
-    "Newcastle United-Tottenham": {"team1_win_percentage": 30.0, "draw_percentage": 20.0}
-}
\ No newline at end of file
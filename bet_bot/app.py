@@ -0,0 +1,185 @@
+import asyncio
+import logging
+import os
+import signal
+from functools import cached_property
+
+from aiogram import Bot, Dispatcher, Router
+
+from bet_bot.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+
+class BotApp:
+    # Все компоненты бота создаются при первом обращении: импорт модулей и
+    # create_app ничего не читают с диска и не требуют токена, а тяжёлые
+    # зависимости (numpy в модели голов и симуляторе) грузятся, только
+    # когда они нужны.
+    def __init__(self, config: Config, router: Router):
+        self.config = config
+        self.router = router
+        self.worker = None  # номер воркера супервизора, None — отдельный процесс
+        self._metrics_runner = None
+
+    @cached_property
+    def stats(self):
+        from bet_bot.stats_store import StatsStore
+        return StatsStore(self.config.stats_file)
+
+    @cached_property
+    def render(self):
+        from bet_bot.render import RenderCache
+        return RenderCache(self.stats)
+
+    @cached_property
+    def sender(self):
+        from bet_bot.sender import SendScheduler
+        return SendScheduler(rate=self.config.send_rate)
+
+    # Класс сессии можно подменить до первого обращения к bot (заглушка в
+    # benchmarks/load_test.py) — очередь отправки подключается так же
+    session_class = None
+
+    @cached_property
+    def bot(self) -> Bot:
+        from bet_bot.render import RenderedMarkupSession
+        session = (self.session_class or RenderedMarkupSession)(self.render)
+        session.middleware(self.sender)
+        return Bot(token=self.config.api_token, session=session)
+
+    @cached_property
+    def storage(self):
+        from bet_bot.fsm_storage import SQLiteStorage
+        return SQLiteStorage(self.config.fsm_database, self.config.fsm_state_ttl)
+
+    @cached_property
+    def dp(self) -> Dispatcher:
+        from bet_bot.monitoring import HandlerMetricsMiddleware, UpdateMetricsMiddleware
+        dp = Dispatcher(storage=self.storage, app=self)  # app попадает в обработчики
+        dp.include_router(self.router)
+        dp.update.outer_middleware(UpdateMetricsMiddleware())
+        self.router.message.middleware(HandlerMetricsMiddleware())
+        self.router.callback_query.middleware(HandlerMetricsMiddleware())
+        self.router.inline_query.middleware(HandlerMetricsMiddleware())
+        return dp
+
+    @cached_property
+    def db(self):
+        from bet_bot.db import BetDatabase
+        return BetDatabase(self.config.database_name)
+
+    @cached_property
+    def journal(self):
+        from bet_bot.db import BetJournal
+        return BetJournal(self.db)
+
+    @cached_property
+    def goal_model(self):
+        from bet_bot.goal_model import GoalModel
+        return GoalModel()
+
+    @cached_property
+    def simulator(self):
+        from bet_bot.simulator import Simulator
+        workers = self.config.simulator_workers
+        if not workers:
+            # У каждого воркера супервизора свой пул, так что ядра делятся
+            # между ними, а не занимаются каждым целиком
+            cpus = os.cpu_count() or 1
+            workers = cpus if self.worker is None else max(1, cpus // self.config.workers)
+        return Simulator(workers=workers)
+
+    def _created(self, name: str) -> bool:
+        return name in self.__dict__
+
+    async def start(self, worker: int = None):
+        # У воркеров супервизора метрики на METRICS_PORT + 1 + номер воркера
+        from bet_bot.metrics import REGISTRY
+        self.worker = worker
+        await self.db.open()
+        self.journal.start()
+        self.stats.start()
+        REGISTRY.gauge("betbot_send_queue", "Сообщения в очереди на отправку", self.sender.queue_depth)
+        REGISTRY.gauge("betbot_journal_pending", "Ставки, ещё не записанные в БД", self.journal.pending)
+        REGISTRY.gauge("betbot_stats_version", "Версия загруженного снимка статистики",
+                       lambda: self.stats.current.version)
+        if self.config.metrics_port:
+            from bet_bot.monitoring import start_metrics_server
+            port = self.config.metrics_port if worker is None else self.config.metrics_port + 1 + worker
+            self._metrics_runner = await start_metrics_server(port, profiler=self.config.profiler_enabled)
+
+    async def close(self):
+        if self._metrics_runner is not None:
+            await self._metrics_runner.cleanup()
+            self._metrics_runner = None
+        # Каждый компонент закрывается независимо: ошибка одного не должна
+        # помешать журналу сбросить ставки и БД закрыться
+        for name in ("sender", "stats", "simulator", "journal", "storage", "db"):
+            if self._created(name):
+                try:
+                    await getattr(self, name).close()
+                except Exception:
+                    logger.exception("Ошибка при закрытии %s", name)
+        if self._created("bot"):
+            try:
+                await self.bot.session.close()
+            except Exception:
+                logger.exception("Ошибка при закрытии сессии бота")
+
+    def webhook_server(self, **kwargs):
+        from bet_bot.webhook import WebhookServer
+        config = self.config
+        return WebhookServer(
+            self.dp, self.bot, path=config.webhook_path, secret=config.webhook_secret,
+            max_concurrency=config.webhook_concurrency, queue_size=config.webhook_queue_size, **kwargs
+        )
+
+    async def run(self):
+        config = self.config
+        await self.start()
+        try:
+            if config.bot_mode == "webhook":
+                await self.webhook_server().serve(config.webhook_host, config.webhook_port, config.webhook_url)
+            else:
+                await self.dp.start_polling(self.bot)
+        finally:
+            await self.close()
+
+    async def supervise(self):
+        # Апдейты принимает этот процесс, обрабатывают config.workers дочерних
+        from aiohttp import web
+
+        from bet_bot.supervisor import Supervisor
+        config = self.config
+        supervisor = Supervisor(config.workers, queue_size=config.worker_queue_size,
+                                concurrency=config.worker_concurrency, put_timeout=config.worker_put_timeout)
+        # Схему БД обновляет супервизор до запуска воркеров, иначе они
+        # применяют одни и те же миграции одновременно
+        await self.db.open()
+        supervisor.start()
+        monitor = asyncio.create_task(supervisor.monitor())
+        status_runner = None
+        if config.metrics_port:
+            # воркеры занимают METRICS_PORT + 1 + номер, сам порт — у супервизора
+            from bet_bot.monitoring import start_metrics_server
+            self._metrics_runner = await start_metrics_server(config.metrics_port)
+        if config.supervisor_status_port:
+            status_runner = web.AppRunner(supervisor.status_app(), access_log=None)
+            await status_runner.setup()
+            await web.TCPSite(status_runner, "127.0.0.1", config.supervisor_status_port).start()
+        try:
+            if config.bot_mode == "webhook":
+                server = self.webhook_server(feed=supervisor.feed_update)
+                await server.serve(config.webhook_host, config.webhook_port, config.webhook_url)
+            else:
+                task = asyncio.current_task()
+                asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, task.cancel)
+                await supervisor.poll(self.bot, self.dp.resolve_used_update_types())
+        finally:
+            monitor.cancel()
+            await supervisor.stop()
+            if status_runner is not None:
+                await status_runner.cleanup()
+            await self.close()
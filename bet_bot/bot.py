@@ -1,74 +1,45 @@
+import asyncio
 import logging
-import sqlite3
-import re
-from aiogram import Bot, Dispatcher
-from aiogram.filters import Command
-from aiogram.types import Message, ReplyKeyboardMarkup, KeyboardButton
+import tempfile
+from aiogram import F
+from aiogram.filters import CommandObject
+from aiogram.types import CallbackQuery, InlineKeyboardButton, InlineKeyboardMarkup, InlineQuery, Message
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.fsm.storage.memory import MemoryStorage
-import os
 from dotenv import load_dotenv
 
-from bet_bot.apl_stats import apl_team_stats, apl_h2h_stats
+from bet_bot.app import BotApp
+from bet_bot.config import Config
+from bet_bot.db import decode_cursor, encode_cursor, page_cursor
+from bet_bot.export import EXPORT_FORMATS, ExportTooLarge, SpooledInputFile, export_bets
+from bet_bot.render import BET_TYPE_KEYBOARD, CANCEL_KEYBOARD, INLINE_CACHE_TIME
+from bet_bot.routing import MessageRoutes
+from bet_bot.scoring import calculate_draw_quality, calculate_outcome_quality, calculate_total_quality
+from bet_bot.sender import bulk_output
+from bet_bot.settlement import format_settlement, parse_result
+from bet_bot.summaries import format_summary
 
 
-load_dotenv()
-logging.basicConfig(level=logging.INFO)
-API_TOKEN = os.getenv('API_TOKEN')
-bot = Bot(token=API_TOKEN)
-dp = Dispatcher(storage=MemoryStorage())
+routes = MessageRoutes()
+
+
+def create_app(config: Config = None) -> BotApp:
+    # Обработчики ниже получают app из workflow data диспетчера, а роутер
+    # строится заново на каждое приложение, так что их может быть несколько
+    return BotApp(config or Config.from_env(), routes.build_router())
 
 def get_bet_type_keyboard():
-    return ReplyKeyboardMarkup(
-        keyboard=[
-            [KeyboardButton(text="/history"),  KeyboardButton(text="/teamstats"), KeyboardButton(text="/bet")]
-        ],
-        resize_keyboard=True
-    )
+    return BET_TYPE_KEYBOARD
 
 def get_cancel_keyboard():
-    return ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text="Отмена")]],
-        resize_keyboard=True
-    )
+    return CANCEL_KEYBOARD
 
 
-def init_db():
-    with sqlite3.connect('bet_history.db') as conn:
-        conn.execute('''
-        CREATE TABLE IF NOT EXISTS bets (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            user_id INTEGER NOT NULL,
-            bet_type TEXT NOT NULL,
-            odds REAL NOT NULL,
-            stats TEXT NOT NULL,
-            quality INTEGER NOT NULL,
-            timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-def add_bet(user_id: int, bet_type: str, odds: float, stats: str, quality: int):
-    with sqlite3.connect('bet_history.db') as conn:
-        conn.execute('''
-        INSERT INTO bets (user_id, bet_type, odds, stats, quality, timestamp)
-        VALUES (?, ?, ?, ?, ?, datetime('now', '+3 hours'))
-        ''', (user_id, bet_type, odds, stats, quality))
-
-def get_last_bets(user_id: int, limit: int = 5):
-    with sqlite3.connect('bet_history.db') as conn:
-        cursor = conn.cursor()
-        cursor.execute('''
-        SELECT bet_type, odds, stats, quality, 
-               strftime('%d.%m.%Y %H:%M', timestamp) as formatted_time
-        FROM bets 
-        WHERE user_id = ? 
-        ORDER BY timestamp DESC 
-        LIMIT ?
-        ''', (user_id, limit))
-        return cursor.fetchall()
-
-init_db()
+@routes.text("Отмена", any_state=True)
+async def cancel(message: Message, state: FSMContext):
+    await state.clear()
+    await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
+
 
 class BetForm(StatesGroup):
     bet_type = State()
@@ -76,28 +47,16 @@ class BetForm(StatesGroup):
     statistics = State()
 
 
-@dp.message(Command("teamstats"))
-async def cmd_teamstats(message: Message):
-    team_names = sorted(apl_team_stats.keys())
-    keyboard = ReplyKeyboardMarkup(
-        keyboard=[[KeyboardButton(text=name)] for name in team_names] + [[KeyboardButton(text="Отмена")]],
-        resize_keyboard=True
-    )
-    await message.answer("Choose a team to see EPL 2024/25 stats:", reply_markup=keyboard)
-
-@dp.message(lambda m: m.text in apl_team_stats)
-async def show_team_stats(message: Message):
-    stats = apl_team_stats[message.text]
-    text = (
-        f"🏟 Stats for {message.text} (EPL 2024/25)\n"
-        f"------------------------------\n"
-        f"🔹 Win percentage: {stats['win_percentage']}%\n"
-        f"🔹 Avg goals scored per match: {stats['avg_goals_scored']}\n"
-        f"🔹 Avg goals conceded per match: {stats['avg_goals_conceded']}\n"
-        f"🔹 Top scorer: {stats['top_scorer']}\n"
-        f"------------------------------\n"
-        f"ℹ️ Use /teamstats for another team."
-    )
+@routes.command("teamstats")
+async def cmd_teamstats(message: Message, app: BotApp):
+    await message.answer(f"Choose a team to see EPL {app.stats.current.season} stats:", reply_markup=app.render.teams_keyboard())
+
+@routes.text_table(lambda data: data["app"].stats.current.team_stats)
+async def show_team_stats(message: Message, app: BotApp):
+    text = app.render.team_card(message.text)
+    if text is None:
+        await message.answer("Команда не найдена. Используйте /teamstats.", reply_markup=get_bet_type_keyboard())
+        return
     await message.answer(text, reply_markup=get_bet_type_keyboard())
 
 
@@ -107,61 +66,48 @@ class BetMatchForm(StatesGroup):
     bet_type = State()
     odds = State()
 
-@dp.message(Command("start"))
+@routes.command("start")
 async def cmd_start(message: Message):
     await message.answer(
         "Привет! Я бот для анализа ставок на АПЛ.\n"
         "Используйте /bet — анализ ставки по матчу\n"
         "Используйте /teamstats — статистика по команде\n"
         "Используйте /history — история ваших ставок\n"
+        "Используйте /mystats — статистика ваших ставок\n"
+        "Используйте /export — вся история ставок файлом (/export jsonl — в JSON Lines)\n"
+        "Используйте /simulate — симуляция сезона или матча (/simulate Arsenal-Chelsea)\n"
+        "Используйте /fairodds — минимальные коэффициенты по матчу (/fairodds Arsenal-Chelsea)\n"
+        "Пришлите CSV/TSV файл «матч, ставка, коэффициент» — оценка всех ставок сразу\n"
     )
 
-@dp.message(Command("bet"))
-async def cmd_bet(message: Message, state: FSMContext):
-    team_names = sorted(apl_team_stats.keys())
+@routes.command("bet")
+async def cmd_bet(message: Message, state: FSMContext, app: BotApp):
     await state.clear()
     await message.answer(
         "Введите матч в формате: <Команда1>-<Команда2>\n\n"
         "Например: Arsenal-Chelsea\n"
-        "Доступные команды: " + ", ".join(team_names),
+        "Доступные команды: " + app.render.team_list(),
         reply_markup=get_cancel_keyboard()
     )
     await state.set_state(BetMatchForm.match)
 
-@dp.message(BetMatchForm.match)
-async def process_bet_match(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
-        return
+@routes.state(BetMatchForm.match)
+async def process_bet_match(message: Message, state: FSMContext, app: BotApp):
     try:
-        teams = message.text.replace('—', '-').split('-')
-        if len(teams) != 2:
-            raise ValueError
-        team1 = teams[0].strip()
-        team2 = teams[1].strip()
-        if team1 not in apl_team_stats or team2 not in apl_team_stats:
+        matchups = app.stats.current.matchups
+        pair = matchups.split_match(message.text)
+        if pair is None:
             raise ValueError
+        team1, team2 = matchups.team_names[pair[0]], matchups.team_names[pair[1]]
         await state.update_data(team1=team1, team2=team2)
-        keyboard = ReplyKeyboardMarkup(
-            keyboard=[
-                [KeyboardButton(text="П1"), KeyboardButton(text="П2"), KeyboardButton(text="Ничья")],
-                [KeyboardButton(text="ТБ 2.5"), KeyboardButton(text="ТМ 2.5")],
-                [KeyboardButton(text="Отмена")]
-            ],
-            resize_keyboard=True
-        )
-        await message.answer("Выберите тип ставки: П1, П2, Ничья, ТБ 2.5, ТМ 2.5", reply_markup=keyboard)
+        await message.answer(f"Матч: {team1} - {team2}\nВыберите тип ставки: П1, П2, Ничья, ТБ 2.5, ТМ 2.5",
+                             reply_markup=app.render.match_bet_type_keyboard)
         await state.set_state(BetMatchForm.bet_type)
     except Exception:
         await message.answer("Некорректный ввод. Формат: Команда1-Команда2. Попробуйте снова или нажмите Отмена.", reply_markup=get_cancel_keyboard())
 
-@dp.message(BetMatchForm.bet_type)
+@routes.state(BetMatchForm.bet_type)
 async def process_bet_match_type(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
-        return
     bet_type = message.text.strip().upper()
     valid_types = ["П1", "П2", "НИЧЬЯ", "ТБ 2.5", "ТМ 2.5"]
     if bet_type not in valid_types:
@@ -171,12 +117,8 @@ async def process_bet_match_type(message: Message, state: FSMContext):
     await message.answer("Введите коэффициент (например, 2.5):", reply_markup=get_cancel_keyboard())
     await state.set_state(BetMatchForm.odds)
 
-@dp.message(BetMatchForm.odds)
-async def process_bet_match_odds(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
-        return
+@routes.state(BetMatchForm.odds)
+async def process_bet_match_odds(message: Message, state: FSMContext, app: BotApp):
     try:
         odds = float(message.text.strip())
         if odds <= 1:
@@ -190,49 +132,36 @@ async def process_bet_match_odds(message: Message, state: FSMContext):
     bet_type = data["bet_type"]
     user_id = message.from_user.id
 
-    h2h_key = f"{team1}-{team2}"
-    h2h_key_rev = f"{team2}-{team1}"
-    team1_stats = apl_team_stats[team1]
-    team2_stats = apl_team_stats[team2]
-    h2h = apl_h2h_stats.get(h2h_key) or {
-        "team1_win_percentage": 50.0,
-        "draw_percentage": 30.0
-    }
-    if not apl_h2h_stats.get(h2h_key) and apl_h2h_stats.get(h2h_key_rev):
-        h2h = apl_h2h_stats[h2h_key_rev]
-        h2h = {
-            "team1_win_percentage": 100 - h2h.get("team1_win_percentage", 50.0) - h2h.get("draw_percentage", 30.0),
-            "draw_percentage": h2h.get("draw_percentage", 30.0)
-        }
+    snapshot = app.stats.current
+    matchups = snapshot.matchups
+    if team1 not in matchups.team_ids or team2 not in matchups.team_ids:
+        await message.answer("Статистика обновилась, и одной из команд больше нет. Начните заново: /bet",
+                             reply_markup=get_bet_type_keyboard())
+        await state.clear()
+        return
+    i, j = matchups.team_ids[team1], matchups.team_ids[team2]
 
     if bet_type == "П1":
-        win_team = team1_stats["win_percentage"]
-        win_opponent = team2_stats["win_percentage"]
-        head_to_head_win = h2h["team1_win_percentage"]
-        head_to_head_draw = h2h["draw_percentage"]
+        win_team = matchups.win_percentage[i]
+        win_opponent = matchups.win_percentage[j]
+        head_to_head_win, head_to_head_draw = matchups.h2h(i, j)
         quality = calculate_outcome_quality(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw)
         stats_str = f"П1: {team1} vs {team2} ({win_team}%/{win_opponent}%), H2H: {head_to_head_win}% побед, {head_to_head_draw}% ничьих"
     elif bet_type == "П2":
-        win_team = team2_stats["win_percentage"]
-        win_opponent = team1_stats["win_percentage"]
-        h2h_swapped = apl_h2h_stats.get(f"{team2}-{team1}")
-        if h2h_swapped:
-            head_to_head_win = h2h_swapped["team1_win_percentage"]
-            head_to_head_draw = h2h_swapped["draw_percentage"]
-        else:
-            head_to_head_win = 100 - h2h["team1_win_percentage"] - h2h["draw_percentage"]
-            head_to_head_draw = h2h["draw_percentage"]
+        win_team = matchups.win_percentage[j]
+        win_opponent = matchups.win_percentage[i]
+        head_to_head_win, head_to_head_draw = matchups.h2h_away(i, j)
         quality = calculate_outcome_quality(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw)
         stats_str = f"П2: {team2} vs {team1} ({win_team}%/{win_opponent}%), H2H: {head_to_head_win}% побед, {head_to_head_draw}% ничьих"
     elif bet_type == "НИЧЬЯ":
-        win_team = team1_stats["win_percentage"]
-        win_opponent = team2_stats["win_percentage"]
-        draw_perc = h2h["draw_percentage"]
+        win_team = matchups.win_percentage[i]
+        win_opponent = matchups.win_percentage[j]
+        draw_perc = matchups.h2h(i, j)[1]
         quality = calculate_draw_quality(odds, win_team, win_opponent, draw_perc)
         stats_str = f"Ничья: {team1} vs {team2} ({win_team}%/{win_opponent}%), H2H ничьи: {draw_perc}%"
     elif bet_type in ["ТБ 2.5", "ТМ 2.5"]:
-        avg_goals_team = team1_stats["avg_goals_scored"]
-        avg_goals_opponent = team2_stats["avg_goals_scored"]
+        avg_goals_team = matchups.avg_goals_scored[i]
+        avg_goals_opponent = matchups.avg_goals_scored[j]
         total_value = 2.5
         total_type = "больше" if "ТБ" in bet_type else "меньше"
         quality = calculate_total_quality(odds, avg_goals_team, avg_goals_opponent, total_value, total_type)
@@ -242,49 +171,227 @@ async def process_bet_match_odds(message: Message, state: FSMContext):
         await state.clear()
         return
 
+    model_probability = app.goal_model.matrix(snapshot, i, j).probability(bet_type, 2.5)
+    # у исхода с нулевой вероятностью справедливого коэффициента нет
+    fair_odds = f"{1 / model_probability:.2f}" if model_probability > 0 else "—"
     response = (
         f"🎯 Ставка: {bet_type} на матч {team1} - {team2}\n"
         f"📊 Коэффициент: {odds}\n"
         f"📈 Статистика: {stats_str}\n"
+        f"🎲 Модель Пуассона: {model_probability:.1%}, справедливый коэффициент {fair_odds}\n"
         f"⭐ Качество ставки: {quality}/10"
     )
-    add_bet(user_id, bet_type, odds, stats_str, quality)
+    app.journal.add_bet(user_id, bet_type, odds, stats_str, quality, team1, team2)
     await message.answer(response, reply_markup=get_bet_type_keyboard())
     await state.clear()
 
 
-@dp.message(Command("history"))
-async def cmd_history(message: Message):
-    bets = get_last_bets(message.from_user.id)
-    if not bets:
-        await message.answer("История ставок пуста.", reply_markup=get_bet_type_keyboard())
+FIXTURE_RUNS = 100_000
+SEASON_RUNS = 20_000
+
+@routes.command("simulate")
+async def cmd_simulate(message: Message, command: CommandObject, app: BotApp):
+    from bet_bot.simulator import format_fixture, format_season
+    snapshot = app.stats.current
+    args = (command.args or "").strip()
+    if not args or args.lower() in ("season", "сезон"):
+        result = await app.simulator.simulate_season(snapshot, SEASON_RUNS)
+        await message.answer(format_season(result), reply_markup=get_bet_type_keyboard())
+        return
+    pair = snapshot.matchups.split_match(args)
+    if pair is None:
+        await message.answer(
+            "Формат: /simulate Команда1-Команда2 — симуляция матча\n"
+            "или /simulate — симуляция всего сезона",
+            reply_markup=get_bet_type_keyboard()
+        )
         return
-    response = "📊 Ваши последние ставки:\n\n"
-    for bet in bets:
-        match = "-"
-        match_search = re.search(r"(?:на матч\s*)?([A-Za-zА-Яа-яёЁ\s\-]+)[\-–—]\s*([A-Za-zА-Яа-яёЁ\s\-]+)", bet[2])
-        if not match_search:
-            match_search = re.search(r"([A-Za-zА-Яа-яёЁ\s\-]+)\s+vs\.?\s+([A-Za-zА-Яа-яёЁ\s\-]+)", bet[2], re.IGNORECASE)
-        if match_search:
-            match = f"{match_search.group(1).strip()} - {match_search.group(2).strip()}"
+    result = await app.simulator.simulate_fixture(snapshot, pair[0], pair[1], FIXTURE_RUNS)
+    await message.answer(format_fixture(result), reply_markup=get_bet_type_keyboard())
+
+
+@routes.command("fairodds")
+async def cmd_fairodds(message: Message, command: CommandObject, app: BotApp):
+    from bet_bot.fair_odds import FAIR_ODDS_MARKETS, TOTAL_LINE, format_fair_odds
+    snapshot = app.stats.current
+    args = (command.args or "").strip()
+    pair = snapshot.matchups.split_match(args) if args else None
+    if pair is None:
+        await message.answer("Формат: /fairodds Команда1-Команда2", reply_markup=get_bet_type_keyboard())
+        return
+    i, j = pair
+    row = snapshot.fair_odds.lookup(i, j)
+    if row is None:
+        await message.answer("Для этого матча нет таблицы коэффициентов.", reply_markup=get_bet_type_keyboard())
+        return
+    matrix = app.goal_model.matrix(snapshot, i, j)
+    model_odds = {}
+    for market in FAIR_ODDS_MARKETS:
+        probability = matrix.probability(market, TOTAL_LINE)
+        if probability > 0:
+            model_odds[market] = 1 / probability
+    names = snapshot.matchups.team_names
+    await message.answer(format_fair_odds(names[i], names[j], row, model_odds), reply_markup=get_bet_type_keyboard())
+
+
+@routes.command("result")
+async def cmd_result(message: Message, command: CommandObject, app: BotApp):
+    if message.from_user.id not in app.config.admins():
+        await message.answer("Команда доступна только администраторам.")
+        return
+    parts = (command.args or "").strip().rsplit(None, 1)
+    if len(parts) != 2:
+        await message.answer("Формат: /result Команда1-Команда2 2:1")
+        return
+    result = parse_result(parts[0], parts[1], app.stats.current.matchups)
+    if isinstance(result, str):
+        await message.answer(f"❌ Ошибка: {result}")
+        return
+    await app.journal.flush()  # ставки из очереди тоже должны рассчитаться
+    await app.db.settle_results([result])
+    if result.already_settled:
+        await message.answer(f"⚠️ Матч {result.team1} - {result.team2} уже рассчитан, результат не внесён повторно.")
+        return
+    await message.answer(format_settlement([result]))
+
+
+MAX_SHEET_SIZE = 20 * 1024 * 1024  # предел getFile в Bot API
+
+@routes.event("message", F.document)
+async def process_odds_sheet(message: Message, app: BotApp):
+    document = message.document
+    if not (document.file_name or "").lower().endswith((".csv", ".tsv", ".txt")):
+        await message.answer(
+            "Пришлите таблицу коэффициентов в формате CSV или TSV: матч, ставка, коэффициент.\n"
+            "Например: Arsenal-Chelsea,П1,2.1",
+            reply_markup=get_bet_type_keyboard()
+        )
+        return
+    if document.file_size and document.file_size > MAX_SHEET_SIZE:
+        await message.answer("Файл слишком большой, максимум 20 МБ.", reply_markup=get_bet_type_keyboard())
+        return
+    from bet_bot.bulk import SheetError, SheetResult, format_ranking, score_sheet
+    result = SheetResult()
+    # Файл скачивается на диск, а оценённые куски пишутся в БД по мере разбора
+    with tempfile.TemporaryFile() as sheet:
+        await message.bot.download(document, destination=sheet)
+        chunks = score_sheet(sheet, app.stats.current.matchups, message.from_user.id, result)
+        try:
+            while True:
+                records = await asyncio.to_thread(next, chunks, None)
+                if records is None:
+                    break
+                if records:
+                    await app.db.add_bets(records)
+        except SheetError as exc:
+            await message.answer(
+                f"❌ Не удалось прочитать файл, строка {exc.line_no}: {exc.reason}.\n"
+                f"Строки до неё обработаны: {result.count} ставок сохранено.",
+                reply_markup=get_bet_type_keyboard()
+            )
+            if not result.count:
+                return
+    messages = format_ranking(result)
+    with bulk_output():
+        for text in messages[:-1]:
+            await message.answer(text)
+        await message.answer(messages[-1], reply_markup=get_bet_type_keyboard())
+
+HISTORY_PAGE_SIZE = 5
+
+async def render_history_page(app: BotApp, user_id: int, before: tuple = None):
+    bets = await app.journal.get_bets_page(user_id, HISTORY_PAGE_SIZE + 1, before)
+    has_next = len(bets) > HISTORY_PAGE_SIZE
+    bets = bets[:HISTORY_PAGE_SIZE]
+    if not bets:
+        return None, None
+    response = "📊 Ваши последние ставки:\n\n" if before is None else "📊 Ваши ставки (продолжение):\n\n"
+    for bet_id, timestamp, bet_type, odds, stats, quality, formatted_time, team1, team2 in bets:
+        if team1 and team2:
+            match = f"{team1} - {team2}"
         else:
             # fallback: часть stats до первой запятой
-            match = bet[2].split(",")[0].replace("П1:", "").replace("П2:", "").replace("Ничья:", "").strip()
+            match = stats.split(",")[0].replace("П1:", "").replace("П2:", "").replace("Ничья:", "").strip()
         response += (
-            f"▸ {bet[0]}\n"
+            f"▸ {bet_type}\n"
             f"Матч: {match}\n"
-            f"Коэффициент: {bet[1]}\n"
-            f"Оценка: {bet[3]}/10\n"
-            f"Дата: {bet[4]}\n\n"
+            f"Коэффициент: {odds}\n"
+            f"Оценка: {quality}/10\n"
+            f"Дата: {formatted_time}\n\n"
         )
-    await message.answer(response, reply_markup=get_bet_type_keyboard())
+    keyboard = None
+    if has_next:
+        keyboard = InlineKeyboardMarkup(inline_keyboard=[[InlineKeyboardButton(
+            text="Следующая страница ▶",
+            callback_data="history:" + encode_cursor(page_cursor(bets[-1]))
+        )]])
+    return response, keyboard
+
+@routes.command("history")
+async def cmd_history(message: Message, app: BotApp):
+    response, keyboard = await render_history_page(app, message.from_user.id)
+    if response is None:
+        await message.answer("История ставок пуста.", reply_markup=get_bet_type_keyboard())
+        return
+    with bulk_output():
+        await message.answer(response, reply_markup=keyboard or get_bet_type_keyboard())
+
+@routes.command("export")
+async def cmd_export(message: Message, command: CommandObject, app: BotApp):
+    fmt = (command.args or "csv").strip().lower()
+    if fmt not in EXPORT_FORMATS:
+        await message.answer("Формат: /export csv или /export jsonl", reply_markup=get_bet_type_keyboard())
+        return
+    await app.journal.flush()  # ставки из очереди тоже попадут в файл
+    try:
+        file, count = await export_bets(app.db, message.from_user.id, fmt)
+    except ExportTooLarge:
+        await message.answer("История слишком большая для одного файла (больше 50 МБ).",
+                             reply_markup=get_bet_type_keyboard())
+        return
+    try:
+        if count == 0:
+            await message.answer("История ставок пуста.", reply_markup=get_bet_type_keyboard())
+            return
+        document = SpooledInputFile(file, f"bets_{message.from_user.id}.{fmt}")
+        with bulk_output():
+            await message.answer_document(document, caption=f"📁 Ставок в выгрузке: {count}",
+                                          reply_markup=get_bet_type_keyboard())
+    finally:
+        file.close()
+
+@routes.command("mystats")
+async def cmd_mystats(message: Message, app: BotApp):
+    summary = await app.journal.get_summary(message.from_user.id)
+    if summary is None:
+        await message.answer("У вас пока нет ставок.", reply_markup=get_bet_type_keyboard())
+        return
+    await message.answer(format_summary(summary), reply_markup=get_bet_type_keyboard())
 
-@dp.message(BetForm.bet_type)
-async def process_bet_type(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
+@routes.event("inline_query")
+async def inline_stats(inline_query: InlineQuery, app: BotApp):
+    # «@bot Arsenal» — карточка команды и H2H, «@bot Arsenal-Chelsea» — матч
+    await inline_query.answer(app.render.inline_results(inline_query.query), cache_time=INLINE_CACHE_TIME)
+
+
+@routes.event("callback_query", F.data.startswith("history:"))
+async def history_next_page(callback: CallbackQuery, app: BotApp):
+    try:
+        before = decode_cursor(callback.data.removeprefix("history:"))
+    except ValueError:
+        # подделанная или устаревшая кнопка
+        await callback.answer("История устарела, откройте /history заново.")
+        return
+    response, keyboard = await render_history_page(app, callback.from_user.id, before)
+    if response is None:
+        await callback.answer("Больше ставок нет.")
         return
+    await callback.answer()
+    with bulk_output():
+        await callback.message.edit_text(response, reply_markup=keyboard)
+
+@routes.state(BetForm.bet_type)
+async def process_bet_type(message: Message, state: FSMContext):
     bet_type = message.text.strip()
     if bet_type not in ["Победа команды", "Ничья", "Тотал больше", "Тотал меньше"]:
         await message.answer("Пожалуйста, выберите тип ставки из предложенных кнопок.")
@@ -296,12 +403,8 @@ async def process_bet_type(message: Message, state: FSMContext):
     )
     await state.set_state(BetForm.odds)
 
-@dp.message(BetForm.odds)
+@routes.state(BetForm.odds)
 async def process_odds(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
-        return
     try:
         odds = float(message.text.strip())
         if odds <= 1:
@@ -339,12 +442,8 @@ async def process_odds(message: Message, state: FSMContext):
         )
     await state.set_state(BetForm.statistics)
 
-@dp.message(BetForm.statistics)
-async def process_statistics(message: Message, state: FSMContext):
-    if message.text == "Отмена":
-        await state.clear()
-        await message.answer("Действие отменено.", reply_markup=get_bet_type_keyboard())
-        return
+@routes.state(BetForm.statistics)
+async def process_statistics(message: Message, state: FSMContext, app: BotApp):
     data = await state.get_data()
     bet_type = data["bet_type"]
     odds = data["odds"]
@@ -400,61 +499,24 @@ async def process_statistics(message: Message, state: FSMContext):
                 f"📈 Статистика: {stats_str}\n"
                 f"⭐ Качество ставки: {quality}/10"
             )
-        add_bet(user_id, bet_type, odds, stats_str, quality)
+        app.journal.add_bet(user_id, bet_type, odds, stats_str, quality)
         await message.answer(response, reply_markup=get_bet_type_keyboard())
         await state.clear()
     except ValueError as e:
         await message.answer(f"❌ Ошибка: {str(e)}\nПопробуйте ввести данные еще раз.", reply_markup=get_cancel_keyboard())
 
-# --- Функции расчета качества ставки ---
-def calculate_outcome_quality(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw):
-    stat_adv = (win_team - win_opponent) / 100  
-    h2h_score = (head_to_head_win * 0.6 + head_to_head_draw * 0.4) / 100  
-    stat_prob = max(0, min(1, 0.5 * (win_team / 100) + 0.5 * h2h_score))  
-    implied_prob = 1 / odds if odds > 0 else 0
-    value = stat_prob - implied_prob  
-    raw_score = (stat_adv * 0.2 + h2h_score * 0.2 + value * 0.6) * 10 + 5  
-    normalized_quality = int(round(max(1, min(10, raw_score))))
-    return normalized_quality
-
-def calculate_draw_quality(odds, win_team, win_opponent, head_to_head_draw):
-    base_draw_probability = 50 - abs(win_team - win_opponent) * 0.5
-    head_to_head_factor = head_to_head_draw
-    odds_factor = 1 + (odds - 1) / 5
-    raw_score = (base_draw_probability * 0.6 + head_to_head_factor * 0.4) * odds_factor
-    normalized_quality = max(1, min(10, int(5 + raw_score / 20)))
-    return normalized_quality
-
-def calculate_total_quality(odds, avg_goals_team, avg_goals_opponent, total_value, total_type):
-    if (total_value * 10 % 5 != 0) or total_value < 0:
-        raise ValueError("Значение тотала должно быть вида x.5, где x не отрицательный, например 2.5, 3.5 и т.д.")
-    avg_goals = (avg_goals_team + avg_goals_opponent) / 2
-    implied_probability = 1 / odds if odds > 0 else 0
-
-    if total_type.lower() == "больше":
-        goal_gap = avg_goals - total_value
-    elif total_type.lower() == "меньше":
-        goal_gap = total_value - avg_goals
-    else:
-        raise ValueError("Неверный тип тотала")
-
-    probability_factor = 0.5 + (goal_gap * 0.2)
-    probability_factor = max(0, min(1, probability_factor))
-
-    value = probability_factor - implied_probability
-
-    odds_impact = odds ** 0.7  
-
-    quality = 5 + 4 * value + 2 * (odds_impact - 1) + 1 * (probability_factor - 0.5)
-    quality = int(round(max(1, min(10, quality))))
-    return quality
-
-async def async_main():
-    await dp.start_polling(bot)
-
 def main():
-    import asyncio
-    asyncio.run(async_main())
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(create_app().run())
+
+def supervise():
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(create_app().supervise())
+    except KeyboardInterrupt:
+        pass
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,225 @@
+import csv
+import heapq
+import itertools
+import re
+
+import numpy as np
+
+from bet_bot.db import make_bet_record
+from bet_bot.matchup import MatchupIndex
+from bet_bot.render import MESSAGE_LIMIT
+from bet_bot.scoring_batch import draw_quality_batch, outcome_quality_batch, total_quality_batch
+
+
+BULK_CHUNK_SIZE = 1000
+MAX_RANKING_MESSAGES = 5
+MAX_REPORTED_ERRORS = 5
+MAX_CELL_LENGTH = 64
+# Самая короткая строка рейтинга — около 30 символов, так что больше
+# MAX_RANKED_ROWS строк format_ranking всё равно не покажет
+MAX_RANKED_ROWS = MAX_RANKING_MESSAGES * MESSAGE_LIMIT // 30
+
+_TOTAL_MARKET_RE = re.compile(r"^(ТБ|ТМ)\s*(\d+(?:[.,]\d+)?)$")
+
+
+class SheetError(Exception):
+    # Файл дальше не читается: битый CSV или не UTF-8
+    def __init__(self, line_no: int, reason: str):
+        super().__init__(f"строка {line_no}: {reason}")
+        self.line_no = line_no
+        self.reason = reason
+
+
+class SheetResult:
+    # Итог разбора без хранения всего файла: счётчики, первые ошибки и куча
+    # из MAX_RANKED_ROWS лучших строк
+    def __init__(self):
+        self.count = 0
+        self.error_count = 0
+        self.errors = []
+        # (quality, -номер, (quality, team1, team2, bet_type, odds)); при
+        # равном качестве выше та строка, что раньше в файле
+        self._best = []
+
+    def add_row(self, row: tuple):
+        item = (row[0], -self.count, row)
+        self.count += 1
+        if len(self._best) < MAX_RANKED_ROWS:
+            heapq.heappush(self._best, item)
+        else:
+            heapq.heappushpop(self._best, item)
+
+    def add_error(self, line_no: int, reason: str):
+        self.error_count += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append((line_no, reason))
+
+    def ranked(self) -> list:
+        return [row for quality, order, row in sorted(self._best, reverse=True)]
+
+
+def parse_market(text: str):
+    # "П1" / "п2" / "Ничья" / "ТБ 2.5" / "тм3,5" -> (bet_type, line)
+    market = " ".join(text.split()).upper()
+    if market in ("П1", "П2", "НИЧЬЯ"):
+        return market, None
+    total_search = _TOTAL_MARKET_RE.match(market)
+    if not total_search:
+        return None
+    line = float(total_search.group(2).replace(",", "."))
+    if (line * 10 % 5 != 0) or line < 0:
+        return None
+    return f"{total_search.group(1)} {line}", line
+
+
+def iter_sheet_rows(stream):
+    # Файл читается построчно; разделитель — табуляция, «;» или запятая
+    # по первой строке. Битый CSV или кодировка не UTF-8 — SheetError с
+    # номером строки.
+    lines = _decode_lines(stream)
+    first_line = next(lines, "")
+    if "\t" in first_line:
+        delimiter = "\t"
+    elif ";" in first_line:
+        delimiter = ";"
+    else:
+        delimiter = ","
+    reader = csv.reader(itertools.chain([first_line], lines), delimiter=delimiter)
+    try:
+        for line_no, row in enumerate(reader, start=1):
+            if any(cell.strip() for cell in row):
+                yield line_no, row
+    except csv.Error as exc:
+        raise SheetError(reader.line_num, f"некорректный CSV ({exc})") from None
+
+
+def _decode_lines(stream):
+    for line_no, raw in enumerate(stream, start=1):
+        try:
+            yield raw.decode("utf-8-sig" if line_no == 1 else "utf-8")
+        except UnicodeError:
+            raise SheetError(line_no, "файл не в кодировке UTF-8") from None
+
+
+def score_sheet(stream, matchups: MatchupIndex, user_id: int, result: SheetResult):
+    # Генератор: по куску в BULK_CHUNK_SIZE строк отдаёт записи для
+    # BetDatabase.add_bets, итог копится в result
+    chunk = []
+    try:
+        for row in iter_sheet_rows(stream):
+            chunk.append(row)
+            if len(chunk) == BULK_CHUNK_SIZE:
+                yield _score_chunk(chunk, matchups, user_id, result)
+                chunk = []
+    except SheetError:
+        # строки до битой тоже оцениваются и сохраняются
+        if chunk:
+            yield _score_chunk(chunk, matchups, user_id, result)
+        raise
+    if chunk:
+        yield _score_chunk(chunk, matchups, user_id, result)
+
+
+def _score_chunk(chunk, matchups: MatchupIndex, user_id: int, result: SheetResult) -> list:
+    parsed = []
+    for line_no, row in chunk:
+        if len(row) != 3:
+            result.add_error(line_no, "нужно три колонки: матч, ставка, коэффициент")
+            continue
+        match_text, market_text, odds_text = (cell.strip()[:MAX_CELL_LENGTH] for cell in row)
+        try:
+            odds = float(odds_text.replace(",", "."))
+        except ValueError:
+            if line_no != 1:  # первая строка может быть заголовком
+                result.add_error(line_no, f"некорректный коэффициент «{odds_text}»")
+            continue
+        if odds <= 1:
+            result.add_error(line_no, "коэффициент должен быть больше 1")
+            continue
+        pair = matchups.split_match(match_text)
+        if pair is None or pair[0] == pair[1]:
+            result.add_error(line_no, f"неизвестный матч «{match_text}»")
+            continue
+        market = parse_market(market_text)
+        if market is None:
+            result.add_error(line_no, f"неизвестный тип ставки «{market_text}»")
+            continue
+        parsed.append((pair[0], pair[1], market[0], market[1], odds))
+
+    qualities = np.zeros(len(parsed), dtype=np.int64)
+    outcome, draw, total = [], [], []
+    for k, (i, j, bet_type, line, odds) in enumerate(parsed):
+        if bet_type == "П1":
+            outcome.append((k, odds, matchups.win_percentage[i], matchups.win_percentage[j], *matchups.h2h(i, j)))
+        elif bet_type == "П2":
+            outcome.append((k, odds, matchups.win_percentage[j], matchups.win_percentage[i], *matchups.h2h_away(i, j)))
+        elif bet_type == "НИЧЬЯ":
+            draw.append((k, odds, matchups.win_percentage[i], matchups.win_percentage[j], matchups.h2h(i, j)[1]))
+        else:
+            total.append((k, odds, matchups.avg_goals_scored[i], matchups.avg_goals_scored[j],
+                          line, bet_type.startswith("ТБ")))
+    if outcome:
+        columns = np.array(outcome).T
+        qualities[columns[0].astype(np.int64)] = outcome_quality_batch(*columns[1:])
+    if draw:
+        columns = np.array(draw).T
+        qualities[columns[0].astype(np.int64)] = draw_quality_batch(*columns[1:])
+    if total:
+        columns = np.array(total).T
+        qualities[columns[0].astype(np.int64)] = total_quality_batch(*columns[1:5], columns[5].astype(bool))
+
+    records = []
+    for (i, j, bet_type, line, odds), quality in zip(parsed, qualities.tolist()):
+        team1, team2 = matchups.team_names[i], matchups.team_names[j]
+        result.add_row((quality, team1, team2, bet_type, odds))
+        records.append(make_bet_record(
+            user_id, bet_type, odds, _stats_str(matchups, bet_type, i, j, line), quality, team1, team2
+        ))
+    return records
+
+
+def _stats_str(matchups: MatchupIndex, bet_type: str, i: int, j: int, line):
+    # тот же формат, что у ставок через /bet
+    team1, team2 = matchups.team_names[i], matchups.team_names[j]
+    if bet_type == "П1":
+        win_team, win_opponent = matchups.win_percentage[i], matchups.win_percentage[j]
+        head_to_head_win, head_to_head_draw = matchups.h2h(i, j)
+        return f"П1: {team1} vs {team2} ({win_team}%/{win_opponent}%), H2H: {head_to_head_win}% побед, {head_to_head_draw}% ничьих"
+    if bet_type == "П2":
+        win_team, win_opponent = matchups.win_percentage[j], matchups.win_percentage[i]
+        head_to_head_win, head_to_head_draw = matchups.h2h_away(i, j)
+        return f"П2: {team2} vs {team1} ({win_team}%/{win_opponent}%), H2H: {head_to_head_win}% побед, {head_to_head_draw}% ничьих"
+    if bet_type == "НИЧЬЯ":
+        win_team, win_opponent = matchups.win_percentage[i], matchups.win_percentage[j]
+        return f"Ничья: {team1} vs {team2} ({win_team}%/{win_opponent}%), H2H ничьи: {matchups.h2h(i, j)[1]}%"
+    avg_goals_team, avg_goals_opponent = matchups.avg_goals_scored[i], matchups.avg_goals_scored[j]
+    total_type = "больше" if bet_type.startswith("ТБ") else "меньше"
+    return f"{bet_type}: {team1}({avg_goals_team}) vs {team2}({avg_goals_opponent}), тотал {total_type} {line}"
+
+
+def format_ranking(result: SheetResult) -> list:
+    # Рейтинг по качеству, разбитый на сообщения не длиннее MESSAGE_LIMIT
+    ranked = result.ranked()
+    header = f"📋 Оценено ставок: {result.count}\n\n"
+    if result.error_count:
+        header += f"⚠️ Пропущено строк: {result.error_count}\n"
+        for line_no, reason in result.errors:
+            header += f"• строка {line_no}: {reason}\n"
+        header += "\n"
+
+    messages = []
+    current = header
+    limit = MESSAGE_LIMIT - 64  # запас под строку «… и ещё N ставок»
+    for rank, (quality, team1, team2, bet_type, odds) in enumerate(ranked, start=1):
+        line = f"{rank}. ⭐ {quality}/10 — {team1} - {team2}, {bet_type} @ {odds}\n"
+        if len(current) + len(line) > limit:
+            messages.append(current)
+            if len(messages) == MAX_RANKING_MESSAGES:
+                messages[-1] += f"\n… и ещё {result.count - rank + 1} ставок"
+                return messages
+            current = ""
+        current += line
+    if result.count > len(ranked):
+        current += f"\n… и ещё {result.count - len(ranked)} ставок"
+    messages.append(current)
+    return messages
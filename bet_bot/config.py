@@ -1 +1,68 @@
-DATABASE_NAME = 'bet_history.db'
\ No newline at end of file
+import os
+from dataclasses import dataclass, fields
+
+
+DEFAULT_STATS_FILE = os.path.join(os.path.dirname(__file__), 'data', 'apl_stats.json')
+
+
+@dataclass
+class Config:
+    # Каждое поле можно задать переменной окружения с тем же именем в
+    # верхнем регистре (API_TOKEN, DATABASE_NAME, ...), см. from_env.
+    api_token: str = None
+    database_name: str = 'bet_history.db'
+    fsm_database: str = 'fsm_state.db'
+    fsm_state_ttl: float = 24 * 60 * 60  # секунды простоя до сброса формы
+    stats_file: str = DEFAULT_STATS_FILE
+
+    # Режим получения апдейтов: polling или webhook
+    bot_mode: str = 'polling'
+    webhook_url: str = None  # без него setWebhook не вызывается (локальные тесты)
+    webhook_path: str = '/webhook'
+    webhook_secret: str = None
+    webhook_host: str = '0.0.0.0'
+    webhook_port: int = 8080
+    webhook_concurrency: int = 64
+    webhook_queue_size: int = 1000
+
+    # Режим с супервизором (betbot-supervisor): число процессов-воркеров
+    workers: int = os.cpu_count() or 1
+    worker_queue_size: int = 1000
+    worker_put_timeout: float = 2.0  # сколько ждать места в очереди воркера, потом апдейт отбрасывается
+    worker_concurrency: int = 64
+    supervisor_status_port: int = 0  # GET /workers, 0 — выключено
+
+    # Процессы пула /simulate; 0 — по числу ядер, а под супервизором —
+    # ядра / WORKERS на каждый воркер
+    simulator_workers: int = 0
+
+    # Лимит исходящих сообщений в секунду на процесс; при WORKERS > 1 делите
+    # общий лимит Telegram (~30/с) между воркерами
+    send_rate: float = 30
+
+    # Telegram id через запятую: им доступна команда /result
+    admin_ids: str = None
+
+    # Prometheus-метрики на 127.0.0.1:METRICS_PORT/metrics, 0 — выключено;
+    # PROFILER_ENABLED=1 добавляет /debug/profile?seconds=N (свёрнутые стеки)
+    metrics_port: int = 0
+    profiler_enabled: bool = False
+
+    def admins(self) -> set:
+        return {int(value) for value in (self.admin_ids or '').split(',') if value.strip()}
+
+    @classmethod
+    def from_env(cls, environ=None) -> 'Config':
+        environ = os.environ if environ is None else environ
+        values = {}
+        for field in fields(cls):
+            raw = environ.get(field.name.upper())
+            if raw is None:
+                continue
+            if field.type is bool:
+                values[field.name] = raw.strip().lower() in ('1', 'true', 'yes', 'on')
+            elif field.type in (int, float):
+                values[field.name] = field.type(raw)
+            else:
+                values[field.name] = raw
+        return cls(**values)
@@ -0,0 +1,231 @@
+import asyncio
+import logging
+import re
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+
+from bet_bot.config import Config
+from bet_bot.metrics import DB_LATENCY
+from bet_bot.migrations import migrate, split_market
+from bet_bot.settlement import settle
+from bet_bot.summaries import add_to_summaries, read_summary
+
+
+logger = logging.getLogger(__name__)
+
+MAX_CURSOR_TIMESTAMP = '9999-12-31 23:59:59'
+MAX_CURSOR_ID = 2 ** 63 - 1
+
+
+class BetDatabase:
+    # Одно долгоживущее соединение в отдельном потоке: все запросы идут
+    # через него, а event loop только ждёт результат.
+    def __init__(self, path: str = Config.database_name):
+        self.path = path
+        self.query_stats = {}
+        self._conn = None
+        self._executor = None
+
+    async def open(self):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="bet-db")
+        await self._run("init_db", self._init_db)
+
+    async def close(self):
+        if self._executor is None:
+            return
+        await self._run("close", self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    async def _run(self, name: str, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, self._timed, name, func, *args)
+
+    def _timed(self, name: str, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            elapsed_ms = (time.perf_counter() - start) * 1000
+            count, total_ms, max_ms = self.query_stats.get(name, (0, 0.0, 0.0))
+            self.query_stats[name] = (count + 1, total_ms + elapsed_ms, max(max_ms, elapsed_ms))
+            DB_LATENCY.observe(elapsed_ms / 1000, name)
+            logger.debug("db %s: %.2f ms", name, elapsed_ms)
+
+    def _init_db(self):
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+        migrate(self._conn)
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def _add_bets(self, records):
+        with self._conn:
+            self._conn.executemany('''
+            INSERT INTO bets (user_id, bet_type, odds, stats, quality, timestamp,
+                              team1, team2, market, line, probability)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+            ''', records)
+            add_to_summaries(self._conn, records)
+
+    def _get_bets_page(self, user_id, limit, before):
+        # Keyset-пагинация по индексу (user_id, timestamp): id идёт как rowid
+        # индекса, поэтому страница стоит O(limit) при любой длине истории.
+        if before is None:
+            before = (MAX_CURSOR_TIMESTAMP, MAX_CURSOR_ID)
+        cursor = self._conn.execute('''
+        SELECT id, timestamp, bet_type, odds, stats, quality,
+               strftime('%d.%m.%Y %H:%M', timestamp) as formatted_time,
+               team1, team2
+        FROM bets INDEXED BY idx_bets_user_time
+        WHERE user_id = ? AND (timestamp, id) < (?, ?)
+        ORDER BY timestamp DESC, id DESC
+        LIMIT ?
+        ''', (user_id, before[0], before[1], limit))
+        return cursor.fetchall()
+
+    def _get_export_chunk(self, user_id, limit, after):
+        # Выгрузка идёт по возрастанию (timestamp, id) по тому же индексу:
+        # каждый кусок — отдельный короткий запрос, и между кусками поток
+        # БД обслуживает остальных пользователей.
+        if after is None:
+            after = ('', 0)
+        cursor = self._conn.execute('''
+        SELECT id, timestamp, bet_type, market, line, team1, team2, odds, quality,
+               probability, stats, result, profit, settled_at
+        FROM bets INDEXED BY idx_bets_user_time
+        WHERE user_id = ? AND (timestamp, id) > (?, ?)
+        ORDER BY timestamp, id
+        LIMIT ?
+        ''', (user_id, after[0], after[1], limit))
+        return cursor.fetchall()
+
+    def _get_summary(self, user_id):
+        return read_summary(self._conn, user_id)
+
+    def _settle_results(self, results):
+        return settle(self._conn, results, _local_now())
+
+    async def add_bets(self, records: list):
+        await self._run("add_bets", self._add_bets, records)
+
+    async def get_bets_page(self, user_id: int, limit: int = 5, before: tuple = None):
+        return await self._run("get_bets_page", self._get_bets_page, user_id, limit, before)
+
+    async def get_export_chunk(self, user_id: int, limit: int, after: tuple = None):
+        return await self._run("get_export_chunk", self._get_export_chunk, user_id, limit, after)
+
+    async def get_summary(self, user_id: int):
+        return await self._run("get_summary", self._get_summary, user_id)
+
+    async def settle_results(self, results: list):
+        return await self._run("settle_results", self._settle_results, results)
+
+
+def _local_now() -> str:
+    # То же время, что datetime('now', '+3 hours') в SQLite
+    return (datetime.now(timezone.utc) + timedelta(hours=3)).strftime('%Y-%m-%d %H:%M:%S')
+
+
+def make_bet_record(user_id: int, bet_type: str, odds: float, stats: str, quality: int,
+                    team1: str = None, team2: str = None) -> tuple:
+    # Строка для BetDatabase.add_bets в порядке колонок INSERT
+    market, line = split_market(bet_type, stats)
+    probability = 1 / odds if odds > 0 else None
+    return (user_id, bet_type, odds, stats, quality, _local_now(),
+            team1, team2, market, line, probability)
+
+
+class BetJournal:
+    # Write-behind очередь ставок: пользователь получает ответ сразу,
+    # а записи сбрасываются в БД одной транзакцией по размеру или по таймеру.
+    def __init__(self, db: BetDatabase, max_batch: int = 200, flush_interval: float = 0.5):
+        self.db = db
+        self.max_batch = max_batch
+        self.flush_interval = flush_interval
+        self._pending = []
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self._closing = False
+
+    def start(self):
+        if self._task is None:
+            self._closing = False
+            self._task = asyncio.create_task(self._flush_loop())
+
+    async def close(self):
+        if self._task is not None:
+            # Цикл не отменяется, а доходит до конца текущего сброса: отмена
+            # посреди add_bets потеряла бы уже снятую с очереди пачку
+            self._closing = True
+            self._wakeup.set()
+            await self._task
+            self._task = None
+        await self.flush()
+
+    async def _flush_loop(self):
+        while not self._closing:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self.flush()
+
+    async def flush(self):
+        if not self._pending:
+            return
+        batch = self._pending
+        self._pending = []
+        try:
+            await self.db.add_bets(batch)
+        except Exception:
+            logger.exception("Не удалось записать %d ставок, повтор при следующем сбросе", len(batch))
+            self._pending[:0] = batch
+
+    def add_bet(self, user_id: int, bet_type: str, odds: float, stats: str, quality: int,
+                team1: str = None, team2: str = None):
+        self._pending.append(make_bet_record(user_id, bet_type, odds, stats, quality, team1, team2))
+        if len(self._pending) >= self.max_batch:
+            self._wakeup.set()
+
+    def pending(self) -> int:
+        return len(self._pending)
+
+    async def get_summary(self, user_id: int):
+        # Агрегаты обновляются при записи, поэтому сначала сбрасываем очередь
+        await self.flush()
+        return await self.db.get_summary(user_id)
+
+    async def get_bets_page(self, user_id: int, limit: int = 5, before: tuple = None):
+        # Страницы читаются только из БД: у ставки из очереди ещё нет id, и
+        # курсор по ней после сброса снова захватил бы уже показанные строки.
+        # Пачку, которую сейчас пишет цикл сброса, поток БД выполнит раньше
+        # этого чтения — задачи он берёт по порядку.
+        await self.flush()
+        return await self.db.get_bets_page(user_id, limit, before)
+
+
+def page_cursor(row) -> tuple:
+    # Курсор следующей страницы: (timestamp, id) последней показанной строки
+    bet_id, timestamp = row[0], row[1]
+    return timestamp, bet_id
+
+
+def encode_cursor(cursor: tuple) -> str:
+    timestamp, bet_id = cursor
+    return f"{re.sub(r'[^0-9]', '', timestamp)}:{bet_id}"
+
+
+def decode_cursor(value: str) -> tuple:
+    digits, bet_id = value.split(":")
+    timestamp = datetime.strptime(digits, '%Y%m%d%H%M%S').strftime('%Y-%m-%d %H:%M:%S')
+    return timestamp, int(bet_id)
@@ -0,0 +1,86 @@
+import asyncio
+import csv
+import io
+import json
+import tempfile
+
+from aiogram.types.input_file import DEFAULT_CHUNK_SIZE, InputFile
+
+from bet_bot.db import BetDatabase
+
+
+EXPORT_FORMATS = ("csv", "jsonl")
+EXPORT_CHUNK_SIZE = 1000
+EXPORT_SPOOL_SIZE = 1024 * 1024  # больше — буфер уходит на диск
+EXPORT_CONCURRENCY = 2
+MAX_EXPORT_SIZE = 50 * 1024 * 1024  # предел sendDocument в Bot API
+
+EXPORT_COLUMNS = (
+    "id", "timestamp", "bet_type", "market", "line", "team1", "team2", "odds", "quality",
+    "probability", "stats", "result", "profit", "settled_at",
+)
+
+# Выгрузки идут через общий поток БД: больше EXPORT_CONCURRENCY
+# одновременно — и они начнут вытеснять обычные запросы
+_slots = asyncio.Semaphore(EXPORT_CONCURRENCY)
+
+
+class ExportTooLarge(Exception):
+    pass
+
+
+class SpooledInputFile(InputFile):
+    # Документ из SpooledTemporaryFile: отдаётся кусками, без копии в памяти.
+    # При повторе запроса (429) файл читается заново с начала.
+    def __init__(self, file, filename: str, chunk_size: int = DEFAULT_CHUNK_SIZE):
+        super().__init__(filename=filename, chunk_size=chunk_size)
+        self.file = file
+
+    async def read(self, bot):
+        self.file.seek(0)
+        while chunk := self.file.read(self.chunk_size):
+            yield chunk
+
+
+def _encode_csv(rows: list, header: bool) -> bytes:
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if header:
+        writer.writerow(EXPORT_COLUMNS)
+    writer.writerows(rows)
+    # BOM в начале, чтобы Excel открыл кириллицу
+    return buffer.getvalue().encode("utf-8-sig" if header else "utf-8")
+
+
+def _encode_jsonl(rows: list, header: bool) -> bytes:
+    return "".join(
+        json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False) + "\n" for row in rows
+    ).encode("utf-8")
+
+
+_ENCODERS = {"csv": _encode_csv, "jsonl": _encode_jsonl}
+
+
+async def export_bets(db: BetDatabase, user_id: int, fmt: str = "csv"):
+    # Вся история пользователя кусками по EXPORT_CHUNK_SIZE строк в
+    # SpooledTemporaryFile. Возвращает (файл, число строк); файл закрывает
+    # вызывающий.
+    encode = _ENCODERS[fmt]
+    file = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_SIZE)
+    count = 0
+    try:
+        async with _slots:
+            after = None
+            while True:
+                rows = await db.get_export_chunk(user_id, EXPORT_CHUNK_SIZE, after)
+                if not rows:
+                    break
+                file.write(encode(rows, header=count == 0))
+                count += len(rows)
+                if file.tell() > MAX_EXPORT_SIZE:
+                    raise ExportTooLarge
+                after = (rows[-1][1], rows[-1][0])
+    except BaseException:
+        file.close()
+        raise
+    return file, count
@@ -0,0 +1,99 @@
+import numpy as np
+
+from bet_bot.matchup import MatchupIndex
+from bet_bot.scoring_batch import draw_quality_batch, outcome_quality_batch, total_quality_batch
+
+
+FAIR_ODDS_MARKETS = ("П1", "П2", "НИЧЬЯ", "ТБ 2.5", "ТМ 2.5")
+QUALITY_LEVELS = tuple(range(1, 11))
+SHOWN_LEVELS = (5, 6, 7, 8, 9, 10)
+TOTAL_LINE = 2.5
+
+# Коэффициенты ищутся с шагом 0.01, как их вводят пользователи
+MIN_ODDS_CENTS = 101
+MAX_ODDS_CENTS = 10000
+
+
+def _min_odds(quality, levels: np.ndarray) -> np.ndarray:
+    # Качество не убывает с ростом коэффициента во всех трёх формулах, поэтому
+    # минимальный коэффициент для каждого уровня ищется бинарным поиском —
+    # сразу для всех пар команд и уровней. quality(odds) — оценка для каждого
+    # элемента. Результат в сотых; 0 — уровень недостижим до MAX_ODDS_CENTS.
+    low = np.full(levels.shape, MIN_ODDS_CENTS - 1, dtype=np.int64)
+    high = np.full(levels.shape, MAX_ODDS_CENTS + 1, dtype=np.int64)
+    while True:
+        active = high - low > 1
+        if not active.any():
+            break
+        middle = (low + high) // 2
+        reached = quality(middle / 100) >= levels
+        high = np.where(active & reached, middle, high)
+        low = np.where(active & ~reached, middle, low)
+    return np.where(high > MAX_ODDS_CENTS, 0, high)
+
+
+class FairOddsTable:
+    # Строится при загрузке снимка статистики: для каждой пары команд и
+    # каждого рынка /bet — минимальный коэффициент, при котором оценка
+    # ставки достигает уровня 1..10. /fairodds только читает готовую строку.
+    def __init__(self, matchups: MatchupIndex):
+        n = matchups.size
+        self.size = n
+        pairs = [(i, j) for i in range(n) for j in range(n) if i != j]
+        self._rows = {}
+        if not pairs:
+            return
+        first = np.array([i for i, _ in pairs])
+        second = np.array([j for _, j in pairs])
+        win = np.asarray(matchups.win_percentage)
+        goals = np.asarray(matchups.avg_goals_scored)
+        h2h = np.array([matchups.h2h(i, j) for i, j in pairs])
+        h2h_away = np.array([matchups.h2h_away(i, j) for i, j in pairs])
+
+        # Аргументы формул в порядке FAIR_ODDS_MARKETS: каждая колонка
+        # повторяется для всех уровней качества (ось 1)
+        def column(values):
+            return np.repeat(np.asarray(values, dtype=np.float64)[:, None], len(QUALITY_LEVELS), axis=1)
+
+        levels = np.tile(np.array(QUALITY_LEVELS), (len(pairs), 1))
+        markets = [
+            lambda odds: outcome_quality_batch(odds, column(win[first]), column(win[second]),
+                                               column(h2h[:, 0]), column(h2h[:, 1])),
+            lambda odds: outcome_quality_batch(odds, column(win[second]), column(win[first]),
+                                               column(h2h_away[:, 0]), column(h2h_away[:, 1])),
+            lambda odds: draw_quality_batch(odds, column(win[first]), column(win[second]), column(h2h[:, 1])),
+            lambda odds: total_quality_batch(odds, column(goals[first]), column(goals[second]),
+                                             TOTAL_LINE, True),
+            lambda odds: total_quality_batch(odds, column(goals[first]), column(goals[second]),
+                                             TOTAL_LINE, False),
+        ]
+        table = np.stack([_min_odds(quality, levels) for quality in markets], axis=1)
+        for (i, j), row in zip(pairs, table.tolist()):
+            self._rows[i * n + j] = tuple(
+                tuple(cents / 100 if cents else None for cents in market) for market in row
+            )
+
+    def lookup(self, i: int, j: int):
+        # ((мин. коэффициент для уровней 1..10) для каждого рынка) или None
+        return self._rows.get(i * self.size + j)
+
+
+def format_fair_odds(team1: str, team2: str, row: tuple, model_odds: dict = None) -> str:
+    text = (
+        f"🎯 Минимальные коэффициенты: {team1} - {team2}\n"
+        f"Уровень оценки — от какого коэффициента он достигается\n"
+        f"------------------------------\n"
+    )
+    for market, odds in zip(FAIR_ODDS_MARKETS, row):
+        model = f" (модель {model_odds[market]:.2f})" if model_odds and market in model_odds else ""
+        parts = []
+        for level in SHOWN_LEVELS:
+            value = odds[level - 1]
+            if value is None:
+                parts.append(f"{level}: —")
+            elif value * 100 <= MIN_ODDS_CENTS:
+                parts.append(f"{level}: любой")
+            else:
+                parts.append(f"{level}: {value:.2f}")
+        text += f"▸ {market}{model}\n   " + " · ".join(parts) + "\n"
+    return text
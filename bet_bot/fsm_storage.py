@@ -0,0 +1,230 @@
+import asyncio
+import json
+import logging
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Mapping
+
+from aiogram.fsm.state import State
+from aiogram.fsm.storage.base import BaseStorage, DefaultKeyBuilder, StateType, StorageKey
+
+from bet_bot.config import Config
+
+
+logger = logging.getLogger(__name__)
+
+READ_BATCH_LIMIT = 500  # ключей в одном SELECT ... IN (...)
+
+_UPSERT_STATE = '''
+INSERT INTO fsm_state (key, state, data, expires_at) VALUES (?, ?, NULL, ?)
+ON CONFLICT(key) DO UPDATE SET
+    state = excluded.state,
+    data = CASE WHEN fsm_state.expires_at > ? THEN fsm_state.data END,
+    expires_at = excluded.expires_at
+RETURNING state, data
+'''
+
+_UPSERT_DATA = '''
+INSERT INTO fsm_state (key, state, data, expires_at) VALUES (?, NULL, ?, ?)
+ON CONFLICT(key) DO UPDATE SET
+    state = CASE WHEN fsm_state.expires_at > ? THEN fsm_state.state END,
+    data = excluded.data,
+    expires_at = excluded.expires_at
+RETURNING state, data
+'''
+
+
+def _dump(data: Mapping[str, Any]):
+    return json.dumps(dict(data), ensure_ascii=False) if data else None
+
+
+class SQLiteStorage(BaseStorage):
+    # Хранилище FSM в SQLite вместо MemoryStorage: состояние переживает
+    # рестарт, а файл могут делить несколько процессов (WAL, busy_timeout,
+    # каждая запись — одна транзакция).
+    #  - Строка живёт state_ttl секунд с последней записи, просроченные
+    #    считаются пустыми и периодически удаляются.
+    #  - Чтения, пришедшие за одну итерацию event loop, уходят одним SELECT;
+    #    результат и значения после записи кэшируются на cache_ttl секунд.
+    #    Кэш локален для процесса, поэтому при общем файле cache_ttl — это
+    #    предел устаревания для пользователя, которого обслуживают разные
+    #    процессы. При раздаче апдейтов по user_id кэш всегда актуален.
+    def __init__(self, path: str = Config.fsm_database, state_ttl: float = Config.fsm_state_ttl,
+                 cache_ttl: float = 2.0, cache_size: int = 10000, sweep_interval: float = 60.0):
+        self.path = path
+        self.state_ttl = state_ttl
+        self.cache_ttl = cache_ttl
+        self.cache_size = cache_size
+        self.sweep_interval = sweep_interval
+        self.key_builder = DefaultKeyBuilder(with_bot_id=True, with_business_connection_id=True, with_destiny=True)
+        self._conn = None
+        self._executor = None
+        self._cache = {}    # key -> (годен до, state, data)
+        self._loading = {}  # key -> future чтения в полёте
+        self._batch = {}    # key -> future, ещё не отправленные в БД
+        self._last_sweep = 0.0
+
+    async def close(self):
+        if self._executor is None:
+            return
+        await self._run(self._close)
+        self._executor.shutdown(wait=True)
+        self._executor = None
+        self._cache.clear()
+
+    async def _run(self, func, *args):
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="fsm-db")
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._conn is None:
+            self._conn = sqlite3.connect(self.path, timeout=30)
+            self._conn.execute('PRAGMA journal_mode=WAL')
+            self._conn.execute('PRAGMA synchronous=NORMAL')
+            with self._conn:
+                self._conn.execute('''
+                CREATE TABLE IF NOT EXISTS fsm_state (
+                    key TEXT PRIMARY KEY,
+                    state TEXT,
+                    data TEXT,
+                    expires_at REAL NOT NULL
+                ) WITHOUT ROWID
+                ''')
+                self._conn.execute('CREATE INDEX IF NOT EXISTS idx_fsm_state_expires ON fsm_state (expires_at)')
+        return self._conn
+
+    def _close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    # --- Работа с БД (в потоке fsm-db) ---
+
+    def _load_rows(self, keys: list) -> dict:
+        conn = self._connect()
+        now = time.time()
+        rows = {}
+        for start in range(0, len(keys), READ_BATCH_LIMIT):
+            chunk = keys[start:start + READ_BATCH_LIMIT]
+            cursor = conn.execute(
+                f'SELECT key, state, data FROM fsm_state '
+                f'WHERE key IN ({",".join("?" * len(chunk))}) AND expires_at > ?',
+                (*chunk, now)
+            )
+            for key, state, data in cursor:
+                rows[key] = (state, data)
+        return rows
+
+    def _write(self, key: str, sql: str, value) -> tuple:
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            row = conn.execute(sql, (key, value, now + self.state_ttl, now)).fetchone()
+            self._maybe_sweep(conn, now)
+        return row
+
+    def _update_data(self, key: str, data: dict) -> tuple:
+        # Чтение и запись под одной блокировкой записи: параллельные
+        # update_data из разных процессов не теряют ключи друг друга.
+        conn = self._connect()
+        now = time.time()
+        with conn:
+            conn.execute('BEGIN IMMEDIATE')
+            row = conn.execute(
+                'SELECT data FROM fsm_state WHERE key = ? AND expires_at > ?', (key, now)
+            ).fetchone()
+            current = json.loads(row[0]) if row and row[0] else {}
+            current.update(data)
+            row = conn.execute(_UPSERT_DATA, (key, _dump(current), now + self.state_ttl, now)).fetchone()
+            self._maybe_sweep(conn, now)
+        return row
+
+    def _maybe_sweep(self, conn: sqlite3.Connection, now: float):
+        if now - self._last_sweep < self.sweep_interval:
+            return
+        self._last_sweep = now
+        deleted = conn.execute(
+            'DELETE FROM fsm_state WHERE expires_at <= ? OR (state IS NULL AND data IS NULL)', (now,)
+        ).rowcount
+        if deleted:
+            logger.debug("fsm: удалено %d устаревших состояний", deleted)
+
+    # --- Кэш и пакетное чтение ---
+
+    def _remember(self, key: str, row: tuple):
+        if self.cache_ttl <= 0:
+            return
+        if len(self._cache) >= self.cache_size:
+            now = time.monotonic()
+            self._cache = {k: v for k, v in self._cache.items() if v[0] > now}
+            if len(self._cache) >= self.cache_size:
+                self._cache.clear()
+        self._cache[key] = (time.monotonic() + self.cache_ttl, row[0], row[1])
+
+    async def _get_row(self, key: StorageKey) -> tuple:
+        key = self.key_builder.build(key)
+        entry = self._cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            return entry[1], entry[2]
+        future = self._loading.get(key)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.create_future()
+            self._loading[key] = future
+            self._batch[key] = future
+            if len(self._batch) == 1:
+                loop.call_soon(self._flush_reads)
+        return await asyncio.shield(future)
+
+    def _flush_reads(self):
+        batch = self._batch
+        self._batch = {}
+        asyncio.ensure_future(self._complete_reads(batch))
+
+    async def _complete_reads(self, batch: dict):
+        try:
+            rows = await self._run(self._load_rows, list(batch))
+        except Exception as e:
+            for key, future in batch.items():
+                if self._loading.get(key) is future:
+                    del self._loading[key]
+                future.set_exception(e)
+            return
+        for key, future in batch.items():
+            row = rows.get(key, (None, None))
+            # Если за время чтения была запись, в кэше уже её результат
+            if self._loading.get(key) is future:
+                del self._loading[key]
+                self._remember(key, row)
+            future.set_result(row)
+
+    async def _store(self, key: StorageKey, func, *args):
+        key = self.key_builder.build(key)
+        self._cache.pop(key, None)
+        self._loading.pop(key, None)
+        row = await self._run(func, key, *args)
+        self._remember(key, row)
+        return row
+
+    # --- BaseStorage ---
+
+    async def set_state(self, key: StorageKey, state: StateType = None) -> None:
+        await self._store(key, self._write, _UPSERT_STATE, state.state if isinstance(state, State) else state)
+
+    async def get_state(self, key: StorageKey):
+        state, _ = await self._get_row(key)
+        return state
+
+    async def set_data(self, key: StorageKey, data: Mapping[str, Any]) -> None:
+        await self._store(key, self._write, _UPSERT_DATA, _dump(data))
+
+    async def get_data(self, key: StorageKey) -> dict:
+        _, data = await self._get_row(key)
+        return json.loads(data) if data else {}
+
+    async def update_data(self, key: StorageKey, data: Mapping[str, Any]) -> dict:
+        _, merged = await self._store(key, self._update_data, dict(data))
+        return json.loads(merged) if merged else {}
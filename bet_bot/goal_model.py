@@ -0,0 +1,91 @@
+import math
+from collections import OrderedDict
+
+import numpy as np
+
+from bet_bot.stats_store import StatsSnapshot
+
+
+MAX_GOALS = 10
+_GOALS = np.arange(MAX_GOALS + 1)
+_FACTORIALS = np.array([math.factorial(k) for k in range(MAX_GOALS + 1)], dtype=np.float64)
+
+
+def poisson_pmf(lam: float) -> np.ndarray:
+    return np.exp(-lam) * lam ** _GOALS / _FACTORIALS
+
+
+def expected_goals(matchups, i: int, j: int):
+    # Ожидаемые голы: среднее между забитыми командой и пропущенными соперником
+    lambda_home = (matchups.avg_goals_scored[i] + matchups.avg_goals_conceded[j]) / 2
+    lambda_away = (matchups.avg_goals_scored[j] + matchups.avg_goals_conceded[i]) / 2
+    return lambda_home, lambda_away
+
+
+class ScoreMatrix:
+    # probs[a, b] — вероятность счёта a:b (голы первой и второй команды),
+    # хвост после MAX_GOALS отброшен и матрица перенормирована.
+    def __init__(self, lambda_home: float, lambda_away: float):
+        probs = np.outer(poisson_pmf(lambda_home), poisson_pmf(lambda_away))
+        self.probs = probs / probs.sum()
+        self.lambda_home = lambda_home
+        self.lambda_away = lambda_away
+        self.home_win = float(np.tril(self.probs, -1).sum())
+        self.draw = float(np.trace(self.probs))
+        self.away_win = float(np.triu(self.probs, 1).sum())
+        totals = np.bincount(np.add.outer(_GOALS, _GOALS).ravel(), weights=self.probs.ravel())
+        self._total_cdf = np.cumsum(totals)
+
+    def outcome(self):
+        return self.home_win, self.draw, self.away_win
+
+    def _cdf(self, goals: int) -> float:
+        # P(total <= goals)
+        if goals < 0:
+            return 0.0
+        return float(self._total_cdf[min(goals, len(self._total_cdf) - 1)])
+
+    def over(self, line: float) -> float:
+        # P(total > line); на целой линии возврат не входит ни в over, ни в under
+        return 1.0 - self._cdf(math.floor(line))
+
+    def under(self, line: float) -> float:
+        # P(total < line)
+        return self._cdf(math.ceil(line) - 1)
+
+    def probability(self, bet_type: str, line: float = None) -> float:
+        if bet_type == "П1":
+            return self.home_win
+        if bet_type == "П2":
+            return self.away_win
+        if bet_type == "НИЧЬЯ":
+            return self.draw
+        if bet_type.startswith("ТБ"):
+            return self.over(line)
+        if bet_type.startswith("ТМ"):
+            return self.under(line)
+        raise ValueError(f"Неизвестный тип ставки: {bet_type}")
+
+
+class GoalModel:
+    # LRU матриц счёта по (версия снимка, команда1, команда2): новая версия
+    # статистики даёт новые ключи, а старые вытесняются сами.
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self.hits = 0
+        self.misses = 0
+        self._cache = OrderedDict()
+
+    def matrix(self, snapshot: StatsSnapshot, i: int, j: int) -> ScoreMatrix:
+        key = (snapshot.version, i, j)
+        score = self._cache.get(key)
+        if score is not None:
+            self.hits += 1
+            self._cache.move_to_end(key)
+            return score
+        self.misses += 1
+        score = ScoreMatrix(*expected_goals(snapshot.matchups, i, j))
+        self._cache[key] = score
+        if len(self._cache) > self.max_size:
+            self._cache.popitem(last=False)
+        return score
@@ -0,0 +1,81 @@
+from array import array
+
+from bet_bot.team_resolver import TeamResolver
+
+
+DEFAULT_H2H_WIN = 50.0
+DEFAULT_H2H_DRAW = 30.0
+
+
+class MatchupIndex:
+    # Строится один раз на снимок статистики: у команд целые id,
+    # статистика лежит в плоских массивах, H2H — в плотных матрицах N×N
+    # с уже развёрнутой ориентацией и значениями по умолчанию.
+    def __init__(self, team_stats: dict, h2h_stats: dict):
+        self.team_names = list(team_stats)
+        self.team_ids = {name: i for i, name in enumerate(self.team_names)}
+        self.size = n = len(self.team_names)
+        self.resolver = TeamResolver(self.team_names)
+
+        self.win_percentage = array('d', (s["win_percentage"] for s in team_stats.values()))
+        self.avg_goals_scored = array('d', (s["avg_goals_scored"] for s in team_stats.values()))
+        self.avg_goals_conceded = array('d', (s["avg_goals_conceded"] for s in team_stats.values()))
+        self.top_scorer = [s["top_scorer"] for s in team_stats.values()]
+
+        # [i * n + j] — матч «i-j»: победы и ничьи в очных встречах глазами
+        # первой команды (П1, Ничья) и второй команды (П2). Без данных у первой
+        # команды 50/30, а у второй остаётся 100 - 50 - 30 = 20% побед.
+        self._home_win = array('d', [DEFAULT_H2H_WIN]) * (n * n)
+        self._home_draw = array('d', [DEFAULT_H2H_DRAW]) * (n * n)
+        self._away_win = array('d', [100 - DEFAULT_H2H_WIN - DEFAULT_H2H_DRAW]) * (n * n)
+        self._away_draw = array('d', [DEFAULT_H2H_DRAW]) * (n * n)
+
+        direct = {}
+        for key, h2h in h2h_stats.items():
+            pair = self._split_exact(key)
+            if pair is not None:
+                direct[pair] = h2h
+        for (i, j), h2h in direct.items():
+            win = h2h.get("team1_win_percentage", DEFAULT_H2H_WIN)
+            draw = h2h.get("draw_percentage", DEFAULT_H2H_DRAW)
+            self._home_win[i * n + j] = win
+            self._home_draw[i * n + j] = draw
+            # для П2 в матче «j-i» прямая запись «i-j» главнее производной
+            self._away_win[j * n + i] = win
+            self._away_draw[j * n + i] = draw
+            if (j, i) not in direct:
+                # обратной записи нет — разворачиваем прямую
+                self._home_win[j * n + i] = 100 - win - draw
+                self._home_draw[j * n + i] = draw
+                self._away_win[i * n + j] = 100 - win - draw
+                self._away_draw[i * n + j] = draw
+
+    def split_match(self, text: str):
+        # (i, j) по вводу пользователя: точные названия, затем алиасы,
+        # опечатки и другие разделители через TeamResolver
+        return self._split_exact(text) or self.resolver.split_match(text)
+
+    def _split_exact(self, text: str):
+        # «Команда1-Команда2» -> (i, j); дефис может встретиться и в названии,
+        # матч команды с самой собой не разбирается
+        text = text.replace('—', '-').replace('–', '-')
+        pos = text.find("-")
+        while pos != -1:
+            team1, team2 = text[:pos].strip(), text[pos + 1:].strip()
+            if team1 != team2 and team1 in self.team_ids and team2 in self.team_ids:
+                return self.team_ids[team1], self.team_ids[team2]
+            pos = text.find("-", pos + 1)
+        return None
+
+    def team_id(self, name: str):
+        return self.team_ids.get(name)
+
+    def h2h(self, i: int, j: int):
+        # (победы первой команды, ничьи) в матче «i-j»
+        k = i * self.size + j
+        return self._home_win[k], self._home_draw[k]
+
+    def h2h_away(self, i: int, j: int):
+        # (победы второй команды, ничьи) в матче «i-j»
+        k = i * self.size + j
+        return self._away_win[k], self._away_draw[k]
@@ -0,0 +1,163 @@
+import bisect
+import functools
+import sys
+import threading
+import time
+from collections import Counter as _Tally
+
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+FAST_BUCKETS = (1e-6, 2.5e-6, 5e-6, 1e-5, 2.5e-5, 5e-5, 1e-4, 2.5e-4, 1e-3, 1e-2, 0.1, 1)
+PROFILE_INTERVAL = 0.005
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names, values, extra: str = "") -> str:
+    parts = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.values = {}
+
+    def inc(self, *labels, amount: float = 1):
+        self.values[labels] = self.values.get(labels, 0) + amount
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} counter"
+        for labels, value in self.values.items():
+            yield f"{self.name}{_labels(self.labels, labels)} {value}"
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labels = labels
+        self.buckets = buckets
+        self.series = {}  # labels -> [счётчики по корзинам, сумма, количество]
+
+    def observe(self, value: float, *labels):
+        series = self.series.get(labels)
+        if series is None:
+            series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+        series[0][bisect.bisect_left(self.buckets, value)] += 1
+        series[1] += value
+        series[2] += 1
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} histogram"
+        for labels, (counts, total, count) in list(self.series.items()):
+            cumulative = 0
+            for bound, bucket in zip(self.buckets, counts):
+                cumulative += bucket
+                le = f'le="{bound}"'
+                yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {cumulative}"
+            le = 'le="+Inf"'
+            yield f"{self.name}_bucket{_labels(self.labels, labels, le)} {count}"
+            yield f"{self.name}_sum{_labels(self.labels, labels)} {total}"
+            yield f"{self.name}_count{_labels(self.labels, labels)} {count}"
+
+
+class Gauge:
+    # Значение считывается функцией в момент запроса /metrics
+    def __init__(self, name: str, help: str, read):
+        self.name = name
+        self.help = help
+        self.read = read
+
+    def render(self):
+        yield f"# HELP {self.name} {self.help}"
+        yield f"# TYPE {self.name} gauge"
+        yield f"{self.name} {self.read()}"
+
+
+class Registry:
+    def __init__(self):
+        self.metrics = {}
+
+    def _add(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labels=()) -> Counter:
+        return self._add(Counter(name, help, labels))
+
+    def histogram(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS) -> Histogram:
+        return self._add(Histogram(name, help, labels, buckets))
+
+    def gauge(self, name: str, help: str, read) -> Gauge:
+        return self._add(Gauge(name, help, read))
+
+    def render(self) -> str:
+        lines = []
+        for metric in list(self.metrics.values()):
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+UPDATES = REGISTRY.counter("betbot_updates_total", "Обработанные апдейты", ("type",))
+UPDATE_LATENCY = REGISTRY.histogram("betbot_update_seconds", "Время обработки апдейта целиком")
+HANDLER_LATENCY = REGISTRY.histogram("betbot_handler_seconds", "Время работы обработчика", ("handler",))
+HANDLER_ERRORS = REGISTRY.counter("betbot_handler_errors_total", "Исключения в обработчиках", ("handler",))
+DB_LATENCY = REGISTRY.histogram("betbot_db_seconds", "Время запросов к БД ставок", ("query",))
+SCORING_LATENCY = REGISTRY.histogram(
+    "betbot_scoring_seconds", "Время расчёта качества ставки", ("function",), buckets=FAST_BUCKETS
+)
+FSM_TRANSITIONS = REGISTRY.counter("betbot_fsm_transitions_total", "Переходы FSM", ("from", "to"))
+FSM_CANCELS = REGISTRY.counter("betbot_fsm_cancels_total", "Отмены формы кнопкой «Отмена»", ("state",))
+SUPERVISOR_LOST = REGISTRY.counter(
+    "betbot_supervisor_lost_total", "Апдейты, оставшиеся в очереди упавшего воркера", ("worker",)
+)
+SUPERVISOR_DROPPED = REGISTRY.counter(
+    "betbot_supervisor_dropped_total", "Апдейты, отброшенные из-за заполненной очереди воркера", ("worker",)
+)
+
+
+def timed_scoring(func):
+    name = func.__name__
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            SCORING_LATENCY.observe(time.perf_counter() - start, name)
+
+    return wrapper
+
+
+def sample_stacks(seconds: float, interval: float = PROFILE_INTERVAL) -> str:
+    # Сэмплирующий профилировщик: раз в interval снимает стеки всех потоков
+    # и возвращает их в свёрнутом формате (flamegraph.pl, speedscope)
+    own = threading.get_ident()
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    tally = _Tally()
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        for ident, frame in sys._current_frames().items():
+            if ident == own:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename}:{code.co_firstlineno})")
+                frame = frame.f_back
+            stack.append(names.get(ident, str(ident)))
+            tally[";".join(reversed(stack))] += 1
+        time.sleep(interval)
+    return "\n".join(f"{stack} {count}" for stack, count in tally.most_common()) + "\n"
@@ -0,0 +1,239 @@
+import re
+import sqlite3
+
+
+BACKFILL_BATCH_SIZE = 1000
+
+# Тип ставки из формы -> (рынок, линия тотала)
+_FREE_FORM_MARKETS = {
+    "Победа команды": "П1",
+    "Ничья": "НИЧЬЯ",
+    "Тотал больше": "ТБ",
+    "Тотал меньше": "ТМ",
+}
+
+_OUTCOME_STATS_RE = re.compile(r"^(?:П1|П2|Ничья): (.+?) vs (.+?) \(")
+_TOTAL_STATS_RE = re.compile(r"^(?:ТБ|ТМ) [\d.]+: (.+?)\([\d.]+\) vs (.+?)\([\d.]+\)")
+_FREE_TOTAL_LINE_RE = re.compile(r"Тотал: \S+ ([\d.]+)")
+
+
+# (market, line) для типа ставки из /bet или из свободной формы
+def split_market(bet_type: str, stats: str = ""):
+    if bet_type in _FREE_FORM_MARKETS:
+        market = _FREE_FORM_MARKETS[bet_type]
+        line = None
+        if market in ("ТБ", "ТМ"):
+            line_search = _FREE_TOTAL_LINE_RE.search(stats)
+            if line_search:
+                line = float(line_search.group(1))
+        return market, line
+    if bet_type.startswith(("ТБ ", "ТМ ")):
+        market, line = bet_type.split(" ", 1)
+        return market, float(line)
+    return bet_type, None
+
+
+# Восстанавливает (team1, team2) из старой текстовой колонки stats
+def parse_match_teams(bet_type: str, stats: str):
+    match_search = _OUTCOME_STATS_RE.match(stats) or _TOTAL_STATS_RE.match(stats)
+    if not match_search:
+        return None, None
+    team1, team2 = match_search.group(1).strip(), match_search.group(2).strip()
+    if bet_type == "П2":
+        # для П2 в stats сначала записана вторая команда
+        team1, team2 = team2, team1
+    return team1, team2
+
+
+def _create_bets(conn: sqlite3.Connection):
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS bets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        bet_type TEXT NOT NULL,
+        odds REAL NOT NULL,
+        stats TEXT NOT NULL,
+        quality INTEGER NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+
+def _add_structured_columns(conn: sqlite3.Connection):
+    conn.execute('ALTER TABLE bets ADD COLUMN team1 TEXT')
+    conn.execute('ALTER TABLE bets ADD COLUMN team2 TEXT')
+    conn.execute('ALTER TABLE bets ADD COLUMN market TEXT')
+    conn.execute('ALTER TABLE bets ADD COLUMN line REAL')
+    conn.execute('ALTER TABLE bets ADD COLUMN probability REAL')
+    conn.execute('CREATE INDEX IF NOT EXISTS idx_bets_user_time ON bets (user_id, timestamp)')
+
+
+def _backfill_structured_columns(conn: sqlite3.Connection):
+    # Идёт пачками по id, но в транзакции миграции: прерванный бэкфилл
+    # откатывается целиком и при следующем запуске начинается заново.
+    last_id = 0
+    while True:
+        rows = conn.execute('''
+        SELECT id, bet_type, odds, stats FROM bets
+        WHERE id > ? AND market IS NULL
+        ORDER BY id
+        LIMIT ?
+        ''', (last_id, BACKFILL_BATCH_SIZE)).fetchall()
+        if not rows:
+            return
+        updates = []
+        for bet_id, bet_type, odds, stats in rows:
+            team1, team2 = parse_match_teams(bet_type, stats)
+            market, line = split_market(bet_type, stats)
+            probability = 1 / odds if odds > 0 else None
+            updates.append((team1, team2, market, line, probability, bet_id))
+        conn.executemany('''
+        UPDATE bets SET team1 = ?, team2 = ?, market = ?, line = ?, probability = ?
+        WHERE id = ?
+        ''', updates)
+        last_id = rows[-1][0]
+
+
+def _create_summaries(conn: sqlite3.Connection):
+    # Схема и заполнение на момент миграции, без вызова bet_bot.summaries:
+    # там таблицы с тех пор изменились
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_summary (
+        user_id INTEGER PRIMARY KEY,
+        bets INTEGER NOT NULL,
+        quality_sum REAL NOT NULL,
+        odds_sum REAL NOT NULL,
+        first_bet DATETIME,
+        last_bet DATETIME
+    )''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_market_summary (
+        user_id INTEGER NOT NULL,
+        market TEXT NOT NULL,
+        bets INTEGER NOT NULL,
+        quality_sum REAL NOT NULL,
+        odds_sum REAL NOT NULL,
+        PRIMARY KEY (user_id, market)
+    ) WITHOUT ROWID''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_week_summary (
+        user_id INTEGER NOT NULL,
+        week DATE NOT NULL,
+        bets INTEGER NOT NULL,
+        PRIMARY KEY (user_id, week)
+    ) WITHOUT ROWID''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS user_team_summary (
+        user_id INTEGER NOT NULL,
+        team TEXT NOT NULL,
+        bets INTEGER NOT NULL,
+        PRIMARY KEY (user_id, team)
+    ) WITHOUT ROWID''')
+    conn.execute('''
+    INSERT INTO user_summary (user_id, bets, quality_sum, odds_sum, first_bet, last_bet)
+    SELECT user_id, count(*), sum(quality), sum(odds), min(timestamp), max(timestamp)
+    FROM bets GROUP BY user_id
+    ''')
+    conn.execute('''
+    INSERT INTO user_market_summary (user_id, market, bets, quality_sum, odds_sum)
+    SELECT user_id, coalesce(market, bet_type), count(*), sum(quality), sum(odds)
+    FROM bets GROUP BY user_id, coalesce(market, bet_type)
+    ''')
+    conn.execute('''
+    INSERT INTO user_week_summary (user_id, week, bets)
+    SELECT user_id, date(timestamp, '-6 days', 'weekday 1'), count(*)
+    FROM bets WHERE timestamp IS NOT NULL
+    GROUP BY user_id, date(timestamp, '-6 days', 'weekday 1')
+    ''')
+    conn.execute('''
+    INSERT INTO user_team_summary (user_id, team, bets)
+    SELECT user_id, team, count(*) FROM (
+        SELECT user_id, team1 AS team FROM bets WHERE team1 IS NOT NULL
+        UNION ALL
+        SELECT user_id, team2 FROM bets WHERE team2 IS NOT NULL
+    ) GROUP BY user_id, team
+    ''')
+
+
+def _add_settlement(conn: sqlite3.Connection):
+    conn.execute('ALTER TABLE bets ADD COLUMN result TEXT')  # win / loss / push, NULL — не рассчитана
+    conn.execute('ALTER TABLE bets ADD COLUMN profit REAL')
+    conn.execute('ALTER TABLE bets ADD COLUMN settled_at DATETIME')
+    conn.execute('''
+    CREATE INDEX IF NOT EXISTS idx_bets_open ON bets (team1, team2, market)
+    WHERE result IS NULL
+    ''')
+    conn.execute('''
+    CREATE TABLE IF NOT EXISTS match_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        team1 TEXT NOT NULL,
+        team2 TEXT NOT NULL,
+        goals1 INTEGER NOT NULL,
+        goals2 INTEGER NOT NULL,
+        played_at DATETIME,
+        settled_at DATETIME NOT NULL,
+        bets INTEGER NOT NULL
+    )
+    ''')
+    # Колонка result только что добавлена, рассчитанных ставок ещё нет:
+    # нули по умолчанию и есть верные агрегаты, пересчёт не нужен
+    for table in ('user_summary', 'user_market_summary'):
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN settled INTEGER NOT NULL DEFAULT 0')
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN wins INTEGER NOT NULL DEFAULT 0')
+        conn.execute(f'ALTER TABLE {table} ADD COLUMN profit REAL NOT NULL DEFAULT 0')
+
+
+def _unique_match_results(conn: sqlite3.Connection):
+    # Матч рассчитывается один раз: повторы от /result схлопываются в
+    # первую запись с суммой рассчитанных ставок. played_at может быть NULL,
+    # а NULL в UNIQUE не совпадают между собой — отсюда coalesce.
+    conn.execute('''
+    UPDATE match_results SET bets = (
+        SELECT sum(m.bets) FROM match_results m
+        WHERE m.team1 = match_results.team1 AND m.team2 = match_results.team2
+          AND coalesce(m.played_at, '') = coalesce(match_results.played_at, '')
+    )
+    WHERE id IN (SELECT min(id) FROM match_results GROUP BY team1, team2, coalesce(played_at, ''))
+    ''')
+    conn.execute('''
+    DELETE FROM match_results
+    WHERE id NOT IN (SELECT min(id) FROM match_results GROUP BY team1, team2, coalesce(played_at, ''))
+    ''')
+    conn.execute('''
+    CREATE UNIQUE INDEX idx_match_results_fixture ON match_results (team1, team2, coalesce(played_at, ''))
+    ''')
+
+
+# Порядок менять нельзя: номер миграции хранится в PRAGMA user_version
+MIGRATIONS = [
+    _create_bets,
+    _add_structured_columns,
+    _backfill_structured_columns,
+    _create_summaries,
+    _add_settlement,
+    _unique_match_results,
+]
+
+
+def migrate(conn: sqlite3.Connection):
+    # Каждая миграция вместе с user_version — одна транзакция BEGIN IMMEDIATE.
+    # sqlite3 сам коммитит DDL вне транзакции, поэтому BEGIN/COMMIT ручные.
+    # Версия перечитывается под блокировкой: другой процесс мог успеть раньше.
+    isolation_level = conn.isolation_level
+    conn.isolation_level = None
+    try:
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                version = conn.execute('PRAGMA user_version').fetchone()[0]
+                if version >= len(MIGRATIONS):
+                    conn.execute('COMMIT')
+                    return
+                MIGRATIONS[version](conn)
+                conn.execute(f'PRAGMA user_version = {version + 1}')
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+    finally:
+        conn.isolation_level = isolation_level
@@ -0,0 +1,78 @@
+import asyncio
+import time
+
+from aiogram import BaseMiddleware
+from aiohttp import web
+
+from bet_bot.metrics import (
+    FSM_CANCELS, FSM_TRANSITIONS, HANDLER_ERRORS, HANDLER_LATENCY, REGISTRY, UPDATE_LATENCY, UPDATES, Registry,
+    sample_stacks,
+)
+
+
+MAX_PROFILE_SECONDS = 60
+
+
+class UpdateMetricsMiddleware(BaseMiddleware):
+    # Внешний middleware dp.update: поток апдейтов и полное время обработки
+    async def __call__(self, handler, event, data):
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        finally:
+            UPDATE_LATENCY.observe(time.perf_counter() - start)
+            UPDATES.inc(event.event_type)
+
+
+class HandlerMetricsMiddleware(BaseMiddleware):
+    # Внутренний middleware роутера: время конкретного обработчика и переходы
+    # FSM. Для MessageRoutes имя берётся из найденного маршрута.
+    def __init__(self, cancel_handlers=("cancel",)):
+        self.cancel_handlers = set(cancel_handlers)
+
+    async def __call__(self, handler, event, data):
+        route = data.get("route") or data.get("handler")
+        name = route.callback.__name__ if route is not None else "unknown"
+        before = data.get("raw_state")
+        start = time.perf_counter()
+        try:
+            return await handler(event, data)
+        except Exception:
+            HANDLER_ERRORS.inc(name)
+            raise
+        finally:
+            HANDLER_LATENCY.observe(time.perf_counter() - start, name)
+            state = data.get("state")
+            if state is not None:
+                after = await state.get_state()
+                if after != before:
+                    FSM_TRANSITIONS.inc(before or "none", after or "none")
+                    if name in self.cancel_handlers and before is not None:
+                        FSM_CANCELS.inc(before)
+
+
+def metrics_app(registry: Registry = REGISTRY, profiler: bool = False) -> web.Application:
+    async def handle_metrics(request):
+        return web.Response(text=registry.render(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    async def handle_profile(request):
+        try:
+            seconds = min(float(request.query.get("seconds", "10")), MAX_PROFILE_SECONDS)
+        except ValueError:
+            return web.Response(status=400, text="seconds должно быть числом\n")
+        text = await asyncio.to_thread(sample_stacks, seconds)
+        return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+    app = web.Application()
+    app.router.add_get("/metrics", handle_metrics)
+    if profiler:
+        app.router.add_get("/debug/profile", handle_profile)
+    return app
+
+
+async def start_metrics_server(port: int, profiler: bool = False, host: str = "127.0.0.1") -> web.AppRunner:
+    runner = web.AppRunner(metrics_app(profiler=profiler), access_log=None)
+    await runner.setup()
+    await web.TCPSite(runner, host, port).start()
+    return runner
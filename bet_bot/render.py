@@ -0,0 +1,278 @@
+from aiogram import Bot
+from aiogram.client.session.aiohttp import AiohttpSession
+from aiogram.methods import AnswerInlineQuery, TelegramMethod
+from aiogram.types import InlineQueryResultArticle, InputTextMessageContent, KeyboardButton, ReplyKeyboardMarkup
+from aiohttp import FormData
+
+from bet_bot.stats_store import StatsSnapshot, StatsStore
+from bet_bot.team_resolver import normalize
+
+
+MESSAGE_LIMIT = 4096  # предел длины текста сообщения в Bot API
+INLINE_RESULTS_LIMIT = 50  # предел answerInlineQuery
+INLINE_CACHE_TIME = 300  # сек, столько Telegram сам отвечает на тот же запрос
+INLINE_QUERY_CACHE_SIZE = 10000
+
+
+def _keyboard(rows) -> ReplyKeyboardMarkup:
+    return ReplyKeyboardMarkup(
+        keyboard=[[KeyboardButton(text=text) for text in row] for row in rows],
+        resize_keyboard=True
+    )
+
+
+BET_TYPE_KEYBOARD = _keyboard([["/history", "/teamstats", "/bet"]])
+CANCEL_KEYBOARD = _keyboard([["Отмена"]])
+MATCH_BET_TYPE_KEYBOARD = _keyboard([
+    ["П1", "П2", "Ничья"],
+    ["ТБ 2.5", "ТМ 2.5"],
+    ["Отмена"],
+])
+
+
+def format_team_card(name: str, team: dict, season: str) -> str:
+    return (
+        f"🏟 Stats for {name} (EPL {season})\n"
+        f"------------------------------\n"
+        f"🔹 Win percentage: {team['win_percentage']}%\n"
+        f"🔹 Avg goals scored per match: {team['avg_goals_scored']}\n"
+        f"🔹 Avg goals conceded per match: {team['avg_goals_conceded']}\n"
+        f"🔹 Top scorer: {team['top_scorer']}\n"
+        f"------------------------------\n"
+        f"ℹ️ Use /teamstats for another team."
+    )
+
+
+def format_h2h_card(team1: str, team2: str, win: float, draw: float, away_win: float) -> str:
+    return (
+        f"⚔️ H2H: {team1} - {team2}\n"
+        f"------------------------------\n"
+        f"🔹 {team1} wins: {win}%\n"
+        f"🔹 Draws: {draw}%\n"
+        f"🔹 {team2} wins: {away_win}%"
+    )
+
+
+def _article(result_id: str, title: str, description: str, text: str) -> InlineQueryResultArticle:
+    return InlineQueryResultArticle(
+        id=result_id, title=title, description=description,
+        input_message_content=InputTextMessageContent(message_text=text)
+    )
+
+
+class RenderCache:
+    # Готовые клавиатуры и тексты ответов. Статичные строятся один раз,
+    # зависящие от статистики — при смене версии снимка. JSON клавиатур
+    # считается один раз и переиспользуется RenderedMarkupSession.
+    def __init__(self, store: StatsStore):
+        self.store = store
+        self._serialized = {}
+        self.bet_type_keyboard = self._register(BET_TYPE_KEYBOARD)
+        self.cancel_keyboard = self._register(CANCEL_KEYBOARD)
+        self.match_bet_type_keyboard = self._register(MATCH_BET_TYPE_KEYBOARD)
+        self._version = None
+        self._teams_keyboard = None
+        self._team_list = ""
+        self._team_cards = {}
+        self._articles = []  # зарегистрированные результаты inline-режима
+        self._inline_all = []
+        self._inline_teams = {}  # id команды -> [карточка, H2H с соперниками]
+        self._inline_pairs = {}  # (i, j) -> [H2H, минимальные коэффициенты]
+        self._inline_prefix = {}  # префикс алиаса -> результаты
+        self._inline_queries = {}  # прочие запросы: матчи, опечатки, короткий ввод
+
+    def _register(self, markup):
+        # Объект хранится вместе с JSON, поэтому его id не переиспользуется
+        self._serialized[id(markup)] = [markup, None]
+        return markup
+
+    def _current(self) -> StatsSnapshot:
+        snapshot = self.store.current
+        if snapshot.version != self._version:
+            self._rebuild(snapshot)
+        return snapshot
+
+    def _rebuild(self, snapshot: StatsSnapshot):
+        team_names = sorted(snapshot.team_stats)
+        if self._teams_keyboard is not None:
+            self._serialized.pop(id(self._teams_keyboard), None)
+        self._teams_keyboard = self._register(_keyboard([[name] for name in team_names] + [["Отмена"]]))
+        self._team_list = ", ".join(team_names)
+        self._team_cards = {
+            name: format_team_card(name, team, snapshot.season)
+            for name, team in snapshot.team_stats.items()
+        }
+        self._rebuild_inline(snapshot)
+        self._version = snapshot.version
+
+    def _rebuild_inline(self, snapshot: StatsSnapshot):
+        # Результаты inline-режима на весь снимок: карточка каждой команды с
+        # её H2H и готовый список для каждого префикса алиаса, так что запрос
+        # обходится одним dict lookup. Матчи и опечатки добираются лениво.
+        for article in self._articles:
+            self._serialized.pop(id(article), None)
+        self._articles = []
+        self._inline_pairs = {}
+        self._inline_queries = {}
+        matchups = snapshot.matchups
+        names = matchups.team_names
+        opponents = {i: set() for i in range(matchups.size)}
+        for key in snapshot.h2h_stats:
+            pair = matchups.split_match(key)
+            if pair is not None:
+                opponents[pair[0]].add(pair[1])
+                opponents[pair[1]].add(pair[0])
+
+        cards = {}
+        for i, name in enumerate(names):
+            team = snapshot.team_stats[name]
+            cards[i] = self._add_article(_article(
+                f"team:{i}", name,
+                f"Победы {team['win_percentage']}% · голы {team['avg_goals_scored']}/{team['avg_goals_conceded']}",
+                self._team_cards[name]
+            ))
+        self._inline_all = [cards[i] for i in sorted(cards, key=names.__getitem__)][:INLINE_RESULTS_LIMIT]
+        self._inline_teams = {
+            i: ([cards[i]] + [self._pair_results(snapshot, i, j)[0]
+                              for j in sorted(opponents[i], key=names.__getitem__)])[:INLINE_RESULTS_LIMIT]
+            for i in cards
+        }
+        by_ids = {}
+        self._inline_prefix = {}
+        for prefix, ids in matchups.resolver.prefixes():
+            results = by_ids.get(ids)
+            if results is None:
+                results = by_ids[ids] = self._team_results(names, cards, ids)
+            self._inline_prefix[prefix] = results
+
+    def _add_article(self, article: InlineQueryResultArticle):
+        self._register(article)
+        self._articles.append(article)
+        return article
+
+    def _team_results(self, names: list, cards: dict, ids) -> list:
+        # одна команда — карточка и её H2H, несколько — только карточки
+        if len(ids) == 1:
+            return self._inline_teams[next(iter(ids))]
+        return [cards[i] for i in sorted(ids, key=names.__getitem__)][:INLINE_RESULTS_LIMIT]
+
+    def _pair_results(self, snapshot: StatsSnapshot, i: int, j: int) -> list:
+        if i == j:
+            return self._inline_teams[i]
+        results = self._inline_pairs.get((i, j))
+        if results is None:
+            from bet_bot.fair_odds import format_fair_odds
+            matchups = snapshot.matchups
+            team1, team2 = matchups.team_names[i], matchups.team_names[j]
+            win, draw = matchups.h2h(i, j)
+            away_win = matchups.h2h_away(i, j)[0]
+            # сначала все статьи, потом регистрация: ошибка посередине не
+            # оставит в _serialized статей без владельца
+            articles = [_article(
+                f"h2h:{i}:{j}", f"{team1} - {team2}",
+                f"H2H: {win}% / {draw}% / {away_win}%",
+                format_h2h_card(team1, team2, win, draw, away_win)
+            )]
+            row = snapshot.fair_odds.lookup(i, j)
+            if row is not None:
+                articles.append(_article(
+                    f"odds:{i}:{j}", f"{team1} - {team2}: минимальные коэффициенты",
+                    "С какого коэффициента ставка получает оценку 5–10",
+                    format_fair_odds(team1, team2, row)
+                ))
+            results = self._inline_pairs[(i, j)] = [self._add_article(article) for article in articles]
+        return results
+
+    def teams_keyboard(self) -> ReplyKeyboardMarkup:
+        self._current()
+        return self._teams_keyboard
+
+    def team_list(self) -> str:
+        self._current()
+        return self._team_list
+
+    def team_card(self, name: str):
+        self._current()
+        return self._team_cards.get(name)
+
+    def inline_results(self, query: str) -> list:
+        snapshot = self._current()
+        alias = normalize(query)
+        if not alias:
+            return self._inline_all
+        results = self._inline_prefix.get(alias)
+        if results is not None:
+            return results
+        results = self._inline_queries.get(query)
+        if results is None:
+            if len(self._inline_queries) >= INLINE_QUERY_CACHE_SIZE:
+                self._inline_queries.clear()
+            results = self._inline_queries[query] = self._search_inline(snapshot, query)
+        return results
+
+    def _search_inline(self, snapshot: StatsSnapshot, query: str) -> list:
+        matchups = snapshot.matchups
+        pair = matchups.split_match(query)
+        if pair is not None:
+            return self._pair_results(snapshot, *pair)
+        ids = matchups.resolver.search(query, INLINE_RESULTS_LIMIT)
+        if not ids:
+            # «Chelsea-Chelsea» или недописанный матч «Arsenal-»: команда слева
+            team = query.replace("—", "-").replace("–", "-").split("-", 1)[0]
+            if team != query:
+                ids = matchups.resolver.search(team, INLINE_RESULTS_LIMIT)
+        if len(ids) == 1:
+            return self._inline_teams[ids[0]]
+        return [self._inline_teams[i][0] for i in ids]
+
+    def serialized_markup(self, markup, serialize):
+        entry = self._serialized.get(id(markup))
+        if entry is None or entry[0] is not markup:
+            return None
+        if entry[1] is None:
+            entry[1] = serialize(markup)
+        return entry[1]
+
+    def serialized_results(self, results: list, serialize):
+        # JSON массива результатов inline-режима из готовых JSON элементов
+        parts = []
+        for result in results:
+            part = self.serialized_markup(result, serialize)
+            if part is None:
+                return None
+            parts.append(part)
+        return "[" + ",".join(parts) + "]"
+
+
+class RenderedMarkupSession(AiohttpSession):
+    # Для клавиатур и результатов inline-режима из RenderCache подставляет
+    # готовый JSON вместо model_dump и сериализации на каждый запрос.
+    def __init__(self, render: RenderCache, **kwargs):
+        super().__init__(**kwargs)
+        self.render = render
+
+    def build_form_data(self, bot: Bot, method: TelegramMethod) -> FormData:
+        def serialize(value):
+            return self.prepare_value(value, bot=bot, files={})
+
+        serialized = {}
+        markup = getattr(method, "reply_markup", None)
+        if markup is not None:
+            serialized["reply_markup"] = self.render.serialized_markup(markup, serialize)
+        if isinstance(method, AnswerInlineQuery):
+            serialized["results"] = self.render.serialized_results(method.results, serialize)
+        serialized = {key: value for key, value in serialized.items() if value is not None}
+        if not serialized:
+            return super().build_form_data(bot, method)
+        form = FormData(quote_fields=False)
+        files = {}
+        for key, value in method.model_dump(warnings=False, exclude=set(serialized)).items():
+            value = self.prepare_value(value, bot=bot, files=files)
+            if not value:
+                continue
+            form.add_field(key, value)
+        for key, value in serialized.items():
+            form.add_field(key, value)
+        for key, value in files.items():
+            form.add_field(key, value.read(bot), filename=value.filename or key)
+        return form
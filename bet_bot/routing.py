@@ -0,0 +1,114 @@
+from aiogram import Bot, Router
+from aiogram.dispatcher.event.handler import CallableObject
+from aiogram.filters.command import CommandObject
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.types import Message
+
+
+class MessageRoutes:
+    # Маршрутизация текстовых сообщений по таблицам вместо цепочки фильтров:
+    #   1. тексты, которые работают в любом состоянии («Отмена»);
+    #   2. команды — словарь по имени команды;
+    #   3. состояние FSM — словарь по имени состояния, так что ввод внутри
+    #      формы не перехватывается обработчиками обычного текста;
+    #   4. обычный текст — словарь и динамические таблицы (например, названия
+    #      команд из текущего снимка статистики).
+    # На каждый апдейт приходится несколько поисков в dict, сколько бы ни было
+    # команд и текстов. Таблицы объявляются на уровне модуля, а Router
+    # создаётся на каждое приложение: aiogram не подключает один роутер к
+    # двум диспетчерам.
+    def __init__(self, name: str = "routes"):
+        self.name = name
+        self.global_texts = {}
+        self.commands = {}
+        self.states = {}
+        self.texts = {}
+        self.text_tables = []
+        self.handlers = []  # (тип события, обработчик, фильтры) для остальных апдейтов
+
+    def build_router(self) -> Router:
+        router = Router(name=self.name)
+        router.message.register(self._dispatch, self._resolve)
+        for event_type, handler, filters in self.handlers:
+            router.observers[event_type].register(handler, *filters)
+        return router
+
+    def event(self, event_type: str, *filters):
+        # Обычный обработчик aiogram: routes.event("inline_query"), F.document и т.п.
+        def decorator(handler):
+            self.handlers.append((event_type, handler, filters))
+            return handler
+        return decorator
+
+    def command(self, *names: str):
+        def decorator(handler):
+            route = CallableObject(handler)
+            for name in names:
+                self.commands[name.lower()] = route
+            return handler
+        return decorator
+
+    def state(self, *states):
+        def decorator(handler):
+            route = CallableObject(handler)
+            for state in states:
+                if isinstance(state, type) and issubclass(state, StatesGroup):
+                    for group_state in state.__all_states__:
+                        self.states[group_state.state] = route
+                else:
+                    self.states[state.state if isinstance(state, State) else state] = route
+            return handler
+        return decorator
+
+    def text(self, *texts: str, any_state: bool = False):
+        def decorator(handler):
+            route = CallableObject(handler)
+            table = self.global_texts if any_state else self.texts
+            for text in texts:
+                table[text] = route
+            return handler
+        return decorator
+
+    def text_table(self, lookup):
+        # lookup(data) возвращает контейнер с поддержкой `in`, читается на каждый
+        # апдейт; data — данные апдейта, в том числе workflow data диспетчера
+        def decorator(handler):
+            self.text_tables.append((lookup, CallableObject(handler)))
+            return handler
+        return decorator
+
+    async def _resolve(self, message: Message, bot: Bot, raw_state: str = None, **data):
+        text = message.text
+        if text is None:
+            return False
+        route = self.global_texts.get(text)
+        if route is not None:
+            return {"route": route}
+        if text.startswith("/"):
+            command = await self._parse_command(text, bot)
+            if command is not None:
+                route = self.commands.get(command.command.lower())
+                if route is not None:
+                    return {"route": route, "command": command}
+        if raw_state is not None:
+            route = self.states.get(raw_state)
+            return {"route": route} if route is not None else False
+        route = self.texts.get(text)
+        if route is not None:
+            return {"route": route}
+        for lookup, route in self.text_tables:
+            if text in lookup(data):
+                return {"route": route}
+        return False
+
+    async def _parse_command(self, text: str, bot: Bot):
+        full_command, _, args = text[1:].partition(" ")
+        name, _, mention = full_command.partition("@")
+        if mention:
+            me = await bot.me()
+            if not me.username or mention.lower() != me.username.lower():
+                return None
+        return CommandObject(prefix="/", command=name, mention=mention or None, args=args.strip() or None)
+
+    async def _dispatch(self, message: Message, route: CallableObject, **data):
+        return await route.call(message, **data)
@@ -0,0 +1,32 @@
+from bet_bot.metrics import timed_scoring
+
+
+# Формулы живут только в scoring_batch; здесь — скалярные обёртки над ними.
+# numpy импортируется при первом расчёте, а не при импорте модуля, чтобы
+# bet_bot.bot по-прежнему загружался быстро. Пакетная функция вызывается
+# через __wrapped__, чтобы не замерять один вызов дважды.
+def _batch(name: str):
+    from bet_bot import scoring_batch
+    return getattr(scoring_batch, name).__wrapped__
+
+
+# --- Функции расчета качества ставки ---
+@timed_scoring
+def calculate_outcome_quality(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw):
+    return int(_batch("outcome_quality_batch")(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw))
+
+@timed_scoring
+def calculate_draw_quality(odds, win_team, win_opponent, head_to_head_draw):
+    return int(_batch("draw_quality_batch")(odds, win_team, win_opponent, head_to_head_draw))
+
+@timed_scoring
+def calculate_total_quality(odds, avg_goals_team, avg_goals_opponent, total_value, total_type):
+    if total_type.lower() == "больше":
+        over = True
+    elif total_type.lower() == "меньше":
+        over = False
+    else:
+        if (total_value * 10 % 5 != 0) or total_value < 0:
+            raise ValueError("Значение тотала должно быть вида x.5, где x не отрицательный, например 2.5, 3.5 и т.д.")
+        raise ValueError("Неверный тип тотала")
+    return int(_batch("total_quality_batch")(odds, avg_goals_team, avg_goals_opponent, total_value, over))
@@ -0,0 +1,72 @@
+import operator
+
+import numpy as np
+
+from bet_bot.metrics import timed_scoring
+
+
+# --- Пакетный расчёт качества ставок ---
+# Единственная реализация формул: скалярные calculate_* из scoring.py —
+# обёртки над этими функциями. Порядок операций повторяет исходные скалярные
+# формулы, поэтому результаты совпадают до бита, включая округление к чётному
+# в int(round(...)) и отсечение int(...) в оценке ничьей.
+
+# np.power расходится с libm pow в последнем бите, а от этого зависит
+# округление на границах .5 — степень считаем тем же pow, что и Python.
+_py_pow = np.frompyfunc(operator.pow, 2, 1)
+
+
+def _implied_probability(odds):
+    return np.divide(1.0, odds, out=np.zeros_like(odds), where=odds > 0)
+
+
+@timed_scoring
+def outcome_quality_batch(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw):
+    odds = np.asarray(odds, dtype=np.float64)
+    win_team = np.asarray(win_team, dtype=np.float64)
+    win_opponent = np.asarray(win_opponent, dtype=np.float64)
+    head_to_head_win = np.asarray(head_to_head_win, dtype=np.float64)
+    head_to_head_draw = np.asarray(head_to_head_draw, dtype=np.float64)
+
+    stat_adv = (win_team - win_opponent) / 100
+    h2h_score = (head_to_head_win * 0.6 + head_to_head_draw * 0.4) / 100
+    stat_prob = np.clip(0.5 * (win_team / 100) + 0.5 * h2h_score, 0, 1)
+    value = stat_prob - _implied_probability(odds)
+    raw_score = (stat_adv * 0.2 + h2h_score * 0.2 + value * 0.6) * 10 + 5
+    return np.rint(np.clip(raw_score, 1, 10)).astype(np.int64)
+
+
+@timed_scoring
+def draw_quality_batch(odds, win_team, win_opponent, head_to_head_draw):
+    odds = np.asarray(odds, dtype=np.float64)
+    win_team = np.asarray(win_team, dtype=np.float64)
+    win_opponent = np.asarray(win_opponent, dtype=np.float64)
+    head_to_head_draw = np.asarray(head_to_head_draw, dtype=np.float64)
+
+    base_draw_probability = 50 - np.abs(win_team - win_opponent) * 0.5
+    odds_factor = 1 + (odds - 1) / 5
+    raw_score = (base_draw_probability * 0.6 + head_to_head_draw * 0.4) * odds_factor
+    return np.clip(np.trunc(5 + raw_score / 20), 1, 10).astype(np.int64)
+
+
+@timed_scoring
+def total_quality_batch(odds, avg_goals_team, avg_goals_opponent, total_value, over):
+    # over — True для «больше», False для «меньше»
+    odds = np.asarray(odds, dtype=np.float64)
+    avg_goals_team = np.asarray(avg_goals_team, dtype=np.float64)
+    avg_goals_opponent = np.asarray(avg_goals_opponent, dtype=np.float64)
+    total_value = np.asarray(total_value, dtype=np.float64)
+    over = np.asarray(over, dtype=bool)
+
+    if np.any((total_value * 10 % 5 != 0) | (total_value < 0)):
+        raise ValueError("Значение тотала должно быть вида x.5, где x не отрицательный, например 2.5, 3.5 и т.д.")
+    avg_goals = (avg_goals_team + avg_goals_opponent) / 2
+    implied_probability = _implied_probability(odds)
+    goal_gap = np.where(over, avg_goals - total_value, total_value - avg_goals)
+
+    probability_factor = np.clip(0.5 + (goal_gap * 0.2), 0, 1)
+    value = probability_factor - implied_probability
+    odds_impact = np.asarray(_py_pow(odds, 0.7), dtype=np.float64)
+
+    quality = 5 + 4 * value + 2 * (odds_impact - 1) + 1 * (probability_factor - 0.5)
+    return np.rint(np.clip(quality, 1, 10)).astype(np.int64)
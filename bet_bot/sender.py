@@ -0,0 +1,268 @@
+import asyncio
+import heapq
+import itertools
+import logging
+import time
+from contextlib import contextmanager
+from contextvars import ContextVar
+
+from aiogram import Bot
+from aiogram.client.session.middlewares.base import BaseRequestMiddleware
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import (
+    CopyMessage, EditMessageReplyMarkup, EditMessageText, ForwardMessage, SendDocument, SendMessage, SendPhoto,
+    TelegramMethod,
+)
+
+from bet_bot.render import MESSAGE_LIMIT
+
+
+logger = logging.getLogger(__name__)
+
+INTERACTIVE = 0
+BULK = 1
+
+SCHEDULED_METHODS = (
+    SendMessage, SendDocument, SendPhoto, EditMessageText, EditMessageReplyMarkup, CopyMessage, ForwardMessage,
+)
+MERGE_SEPARATOR = "\n\n"
+SWEEP_INTERVAL = 60.0
+
+send_priority = ContextVar("send_priority", default=INTERACTIVE)
+
+
+@contextmanager
+def bulk_output():
+    # Сообщения, отправленные внутри блока, уступают интерактивным ответам
+    token = send_priority.set(BULK)
+    try:
+        yield
+    finally:
+        send_priority.reset(token)
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def delay(self, now: float) -> float:
+        # Сколько ждать до следующего токена
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class _Job:
+    __slots__ = ("priority", "seq", "method", "make_request", "bot", "future", "attempts")
+
+    def __init__(self, priority, seq, method, make_request, bot, future):
+        self.priority = priority
+        self.seq = seq
+        self.method = method
+        self.make_request = make_request
+        self.bot = bot
+        self.future = future
+        self.attempts = 0
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
+class _Chat:
+    __slots__ = ("bucket", "jobs", "busy", "blocked_until")
+
+    def __init__(self, bucket: TokenBucket):
+        self.bucket = bucket
+        self.jobs = []  # куча _Job по (priority, seq)
+        self.busy = False
+        self.blocked_until = 0.0
+
+
+class SendScheduler(BaseRequestMiddleware):
+    # Middleware сессии бота: отправки в чаты идут через очередь с общим
+    # token bucket (лимит бота) и bucket на каждый чат. В чат одновременно
+    # уходит один запрос, так что порядок сообщений сохраняется. Из всех
+    # готовых чатов первым обслуживается самый срочный ответ: INTERACTIVE
+    # раньше BULK (история, выгрузки). Подряд стоящие в очереди тексты в
+    # один чат склеиваются в одно сообщение. На 429 чат ставится на паузу
+    # retry_after и запрос повторяется до max_retries раз; если пауза
+    # длиннее интервала чата, на паузу встаёт и вся отправка бота.
+    # Остальные методы (getUpdates, answerCallbackQuery, ...) идут мимо.
+    def __init__(self, rate: float = 30, burst: float = 30, chat_rate: float = 1, chat_burst: float = 3,
+                 group_rate: float = 20 / 60, group_burst: float = 3, max_retries: int = 3, merge: bool = True):
+        self.rate = rate
+        self.chat_rate = chat_rate
+        self.chat_burst = chat_burst
+        self.group_rate = group_rate
+        self.group_burst = group_burst
+        self.max_retries = max_retries
+        self.merge = merge
+        self._global = TokenBucket(rate, burst)
+        self._global_blocked_until = 0.0
+        self._chats = {}
+        self._pending = set()  # chat_id с непустой очередью
+        self._seq = itertools.count()
+        self._wakeup = None
+        self._task = None
+        self._inflight = set()
+        self._last_sweep = 0.0
+
+    async def __call__(self, make_request, bot: Bot, method: TelegramMethod):
+        chat_id = getattr(method, "chat_id", None)
+        if chat_id is None or not isinstance(method, SCHEDULED_METHODS):
+            return await make_request(bot, method)
+        self._ensure_started()
+        chat = self._chats.get(chat_id)
+        if chat is None:
+            group = isinstance(chat_id, str) or chat_id < 0
+            chat = self._chats[chat_id] = _Chat(TokenBucket(
+                self.group_rate if group else self.chat_rate, self.group_burst if group else self.chat_burst
+            ))
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(chat.jobs, _Job(send_priority.get(), next(self._seq), method, make_request, bot, future))
+        self._pending.add(chat_id)
+        self._wakeup.set()
+        return await future
+
+    def queue_depth(self) -> int:
+        return sum(len(self._chats[chat_id].jobs) for chat_id in self._pending)
+
+    def _ensure_started(self):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self, timeout: float = 10.0):
+        if self._task is None:
+            return
+        deadline = time.monotonic() + timeout
+        while (self._pending or self._inflight) and time.monotonic() < deadline:
+            await asyncio.sleep(0.05)
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        for chat in self._chats.values():
+            for job in chat.jobs:
+                if not job.future.done():
+                    job.future.cancel()
+        self._chats.clear()
+        self._pending.clear()
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            if now - self._last_sweep > SWEEP_INTERVAL:
+                self._sweep(now)
+            wait = max(self._global.delay(now), self._global_blocked_until - now)
+            if wait == 0:
+                chat_id, wait = self._pick(now)
+                if chat_id is not None:
+                    self._global.take()
+                    self._start(chat_id)
+                    continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=wait)
+            except asyncio.TimeoutError:
+                pass
+
+    def _pick(self, now: float):
+        # Самая срочная голова очереди среди чатов, которым можно отправлять;
+        # иначе — сколько ждать до ближайшего такого чата (None — до события)
+        best, best_job, wait = None, None, None
+        for chat_id in list(self._pending):
+            chat = self._chats[chat_id]
+            while chat.jobs and chat.jobs[0].future.done():
+                heapq.heappop(chat.jobs)  # вызывающий отменил ожидание
+            if not chat.jobs:
+                self._pending.discard(chat_id)
+                continue
+            if chat.busy:
+                continue
+            delay = max(chat.bucket.delay(now), chat.blocked_until - now)
+            if delay > 0:
+                wait = delay if wait is None else min(wait, delay)
+            elif best_job is None or chat.jobs[0] < best_job:
+                best, best_job = chat_id, chat.jobs[0]
+        return best, wait
+
+    def _sweep(self, now: float):
+        # Состояние простаивающего чата с полным bucket больше не нужно
+        self._last_sweep = now
+        for chat_id, chat in list(self._chats.items()):
+            if chat_id in self._pending or chat.busy or chat.blocked_until > now:
+                continue
+            chat.bucket.delay(now)
+            if chat.bucket.tokens >= chat.bucket.burst:
+                del self._chats[chat_id]
+
+    def _start(self, chat_id):
+        chat = self._chats[chat_id]
+        chat.bucket.take()
+        chat.busy = True
+        jobs = [heapq.heappop(chat.jobs)]
+        if self.merge:
+            while chat.jobs and self._can_merge(jobs, chat.jobs[0]):
+                jobs.append(heapq.heappop(chat.jobs))
+        task = asyncio.create_task(self._send(chat_id, chat, jobs))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    def _can_merge(self, jobs: list, job: _Job) -> bool:
+        last, method = jobs[-1].method, job.method
+        if not isinstance(last, SendMessage) or not isinstance(method, SendMessage):
+            return False
+        if job.priority != jobs[0].priority or job.future.done() or last.reply_markup is not None:
+            return False
+        if last.entities or method.entities or last.parse_mode != method.parse_mode:
+            return False
+        if method.reply_parameters is not None or method.reply_to_message_id is not None:
+            return False
+        length = sum(len(j.method.text) for j in jobs) + len(method.text) + len(MERGE_SEPARATOR) * len(jobs)
+        return length <= MESSAGE_LIMIT
+
+    async def _send(self, chat_id, chat: _Chat, jobs: list):
+        method = jobs[-1].method
+        if len(jobs) > 1:
+            method = method.model_copy(update={"text": MERGE_SEPARATOR.join(job.method.text for job in jobs)})
+        try:
+            response = await jobs[0].make_request(jobs[0].bot, method)
+        except TelegramRetryAfter as e:
+            now = time.monotonic()
+            chat.blocked_until = now + e.retry_after
+            logger.warning("429 для чата %s, пауза %d с", chat_id, e.retry_after)
+            # Пауза дольше интервала чата — сработал лимит всего бота, и
+            # отправка в другие чаты упрётся в него же
+            if e.retry_after > 1 / chat.bucket.rate:
+                self._global_blocked_until = max(self._global_blocked_until, chat.blocked_until)
+            for job in jobs:
+                job.attempts += 1
+                if job.attempts > self.max_retries:
+                    if not job.future.done():
+                        job.future.set_exception(e)
+                else:
+                    heapq.heappush(chat.jobs, job)
+        except Exception as e:
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_exception(e)
+        else:
+            for job in jobs:
+                if not job.future.done():
+                    job.future.set_result(response)
+        finally:
+            chat.busy = False
+            if chat.jobs:
+                self._pending.add(chat_id)
+            else:
+                self._pending.discard(chat_id)
+            self._wakeup.set()
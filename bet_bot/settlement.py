@@ -0,0 +1,172 @@
+import argparse
+import re
+import sqlite3
+import sys
+from datetime import datetime
+
+from bet_bot.config import Config
+from bet_bot.matchup import MatchupIndex
+from bet_bot.summaries import add_settled_to_summaries
+
+
+SETTLED_MARKETS = ("П1", "П2", "НИЧЬЯ", "ТБ", "ТМ")
+
+_SCORE_RE = re.compile(r"^(\d{1,2})\s*[:\-–—]\s*(\d{1,2})$")
+
+# 1 — ставка сыграла, -1 — проиграла, 0 — возврат (тотал ровно на линии)
+_OUTCOME = '''CASE market
+    WHEN 'П1' THEN CASE WHEN :goals1 > :goals2 THEN 1 ELSE -1 END
+    WHEN 'П2' THEN CASE WHEN :goals2 > :goals1 THEN 1 ELSE -1 END
+    WHEN 'НИЧЬЯ' THEN CASE WHEN :goals1 = :goals2 THEN 1 ELSE -1 END
+    WHEN 'ТБ' THEN sign(:goals1 + :goals2 - line)
+    WHEN 'ТМ' THEN sign(line - :goals1 - :goals2)
+END'''
+
+# Все открытые ставки на матч рассчитываются одним UPDATE по частичному
+# индексу idx_bets_open; прибыль — в ставках единичного размера.
+_SETTLE = f'''
+UPDATE bets INDEXED BY idx_bets_open SET
+    result = CASE {_OUTCOME} WHEN 1 THEN 'win' WHEN 0 THEN 'push' ELSE 'loss' END,
+    profit = CASE {_OUTCOME} WHEN 1 THEN odds - 1 WHEN 0 THEN 0 ELSE -1 END,
+    settled_at = :settled_at
+WHERE team1 = :team1 AND team2 = :team2 AND result IS NULL
+  AND market IN ({", ".join(f"'{market}'" for market in SETTLED_MARKETS)})
+  AND (line IS NOT NULL OR market NOT IN ('ТБ', 'ТМ'))
+  AND (:played_at IS NULL OR timestamp <= :played_at)
+RETURNING user_id, market, result, profit
+'''
+
+
+class MatchResult:
+    def __init__(self, team1: str, team2: str, goals1: int, goals2: int, played_at: str = None):
+        self.team1 = team1
+        self.team2 = team2
+        self.goals1 = goals1
+        self.goals2 = goals2
+        self.played_at = played_at  # начало матча: более поздние ставки не рассчитываются
+        self.settled = 0
+        self.wins = 0
+        self.already_settled = False
+
+
+def parse_score(text: str):
+    score_search = _SCORE_RE.match(text.strip())
+    if not score_search:
+        return None
+    return int(score_search.group(1)), int(score_search.group(2))
+
+
+def parse_played_at(text: str):
+    for fmt in ('%Y-%m-%d %H:%M:%S', '%Y-%m-%d %H:%M', '%Y-%m-%d'):
+        try:
+            return datetime.strptime(text.strip(), fmt).strftime('%Y-%m-%d %H:%M:%S')
+        except ValueError:
+            continue
+    return None
+
+
+def parse_result(match_text: str, score_text: str, matchups: MatchupIndex, played_text: str = None):
+    # MatchResult или текст ошибки
+    pair = matchups.split_match(match_text)
+    if pair is None:
+        return f"неизвестный матч «{match_text}»"
+    score = parse_score(score_text)
+    if score is None:
+        return f"некорректный счёт «{score_text}», нужен вид 2:1"
+    played_at = None
+    if played_text:
+        played_at = parse_played_at(played_text)
+        if played_at is None:
+            return f"некорректная дата «{played_text}», нужен вид 2025-05-18 16:30"
+    return MatchResult(matchups.team_names[pair[0]], matchups.team_names[pair[1]], *score, played_at)
+
+
+def read_results(stream, matchups: MatchupIndex):
+    # Файл «матч, счёт[, начало матча]» в тех же форматах, что таблица
+    # коэффициентов. Возвращает ([MatchResult], [(строка, ошибка)]).
+    from bet_bot.bulk import iter_sheet_rows
+    results, errors = [], []
+    for line_no, row in iter_sheet_rows(stream):
+        cells = [cell.strip() for cell in row]
+        if len(cells) not in (2, 3):
+            errors.append((line_no, "нужны колонки: матч, счёт[, начало матча]"))
+            continue
+        result = parse_result(cells[0], cells[1], matchups, cells[2] if len(cells) == 3 else None)
+        if isinstance(result, str):
+            if line_no != 1:  # первая строка может быть заголовком
+                errors.append((line_no, result))
+            continue
+        results.append(result)
+    return results, errors
+
+
+def settle(conn: sqlite3.Connection, results: list, settled_at: str):
+    # Результаты и расчёт ставок по ним — одна транзакция вместе с
+    # агрегатами /mystats. Заполняет result.settled и result.wins.
+    with conn:
+        for result in results:
+            params = {
+                "team1": result.team1, "team2": result.team2,
+                "goals1": result.goals1, "goals2": result.goals2,
+                "played_at": result.played_at, "settled_at": settled_at,
+            }
+            # Матч (team1, team2, played_at) уникален: повторный результат
+            # игнорируется, и ставки по нему второй раз не рассчитываются
+            inserted = conn.execute('''
+            INSERT OR IGNORE INTO match_results (team1, team2, goals1, goals2, played_at, settled_at, bets)
+            VALUES (:team1, :team2, :goals1, :goals2, :played_at, :settled_at, 0)
+            RETURNING id
+            ''', params).fetchall()
+            if not inserted:
+                result.already_settled = True
+                continue
+            rows = conn.execute(_SETTLE, params).fetchall()
+            result.settled = len(rows)
+            result.wins = sum(1 for row in rows if row[2] == "win")
+            conn.execute('UPDATE match_results SET bets = ? WHERE id = ?', (result.settled, inserted[0][0]))
+            add_settled_to_summaries(conn, rows)
+    return results
+
+
+def format_settlement(results: list) -> str:
+    text = "🏁 Результаты внесены:\n"
+    for result in results:
+        if result.already_settled:
+            text += f"▸ {result.team1} - {result.team2} — уже рассчитан ранее, пропущен\n"
+            continue
+        text += (f"▸ {result.team1} {result.goals1}:{result.goals2} {result.team2} — "
+                 f"рассчитано ставок: {result.settled}, выиграло: {result.wins}\n")
+    return text
+
+
+def main():
+    #     python -m bet_bot.settlement results.csv
+    from bet_bot.bulk import SheetError
+    from bet_bot.db import _local_now
+    from bet_bot.migrations import migrate
+    from bet_bot.stats_store import load_snapshot
+    config = Config.from_env()
+    parser = argparse.ArgumentParser(description="Рассчитать открытые ставки по результатам матчей")
+    parser.add_argument("results", help="CSV/TSV: матч, счёт[, начало матча]")
+    parser.add_argument("--database", default=config.database_name)
+    parser.add_argument("--stats", default=config.stats_file, help="статистика для разбора названий команд")
+    args = parser.parse_args()
+    matchups = load_snapshot(args.stats, version=1).matchups
+    with open(args.results, "rb") as f:
+        try:
+            results, errors = read_results(f, matchups)
+        except SheetError as exc:
+            sys.exit(str(exc))
+    for line_no, reason in errors:
+        print(f"строка {line_no}: {reason}")
+    conn = sqlite3.connect(args.database)
+    try:
+        migrate(conn)
+        settle(conn, results, _local_now())
+    finally:
+        conn.close()
+    print(format_settlement(results), end="")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,195 @@
+import asyncio
+import multiprocessing
+import os
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bet_bot.goal_model import expected_goals
+from bet_bot.stats_store import StatsSnapshot
+
+
+MAX_SCORE = 9  # счёт 10+ голов сворачивается в 9
+SEASON_BATCH = 2000
+RELEGATION_PLACES = 3
+
+
+# --- Функции рабочих процессов: только numpy-массивы на входе и выходе ---
+
+def _fixture_worker(lambda_home: float, lambda_away: float, n: int, seed) -> np.ndarray:
+    rng = np.random.default_rng(seed)
+    home = np.minimum(rng.poisson(lambda_home, n), MAX_SCORE)
+    away = np.minimum(rng.poisson(lambda_away, n), MAX_SCORE)
+    counts = np.bincount(home * (MAX_SCORE + 1) + away, minlength=(MAX_SCORE + 1) ** 2)
+    return counts.reshape(MAX_SCORE + 1, MAX_SCORE + 1)
+
+
+def _season_worker(lambda_home: np.ndarray, lambda_away: np.ndarray, n_seasons: int, seed):
+    # Двухкруговой турнир: [i, j] — матч i дома против j
+    rng = np.random.default_rng(seed)
+    n = lambda_home.shape[0]
+    played = ~np.eye(n, dtype=bool)
+    position_counts = np.zeros(n * n, dtype=np.int64)
+    points_total = np.zeros(n, dtype=np.int64)
+    done = 0
+    while done < n_seasons:
+        batch = min(SEASON_BATCH, n_seasons - done)
+        home_goals = rng.poisson(lambda_home, size=(batch, n, n))
+        away_goals = rng.poisson(lambda_away, size=(batch, n, n))
+        diff = home_goals - away_goals
+        home_points = np.where(diff > 0, 3, np.where(diff == 0, 1, 0)) * played
+        away_points = np.where(diff < 0, 3, np.where(diff == 0, 1, 0)) * played
+        points = home_points.sum(axis=2) + away_points.sum(axis=1)
+        goal_diff = diff.sum(axis=2) - diff.sum(axis=1)
+        goals_for = home_goals.sum(axis=2) + away_goals.sum(axis=1)
+        # Очки, затем разница и забитые; полное равенство — жребий
+        key = points * 10 ** 8 + (goal_diff + 5000) * 10 ** 4 + goals_for + rng.random((batch, n))
+        order = np.argsort(-key, axis=1)
+        ranks = np.empty_like(order)
+        np.put_along_axis(ranks, order, np.arange(n), axis=1)
+        position_counts += np.bincount((np.arange(n) * n + ranks).ravel(), minlength=n * n)
+        points_total += points.sum(axis=0)
+        done += batch
+    return position_counts.reshape(n, n), points_total
+
+
+class FixtureResult:
+    def __init__(self, team1: str, team2: str, counts: np.ndarray):
+        self.team1 = team1
+        self.team2 = team2
+        self.runs = int(counts.sum())
+        self.score_probs = counts / self.runs
+        self.home_win = float(np.tril(self.score_probs, -1).sum())
+        self.draw = float(np.trace(self.score_probs))
+        self.away_win = float(np.triu(self.score_probs, 1).sum())
+        totals = np.add.outer(np.arange(MAX_SCORE + 1), np.arange(MAX_SCORE + 1))
+        self.over_2_5 = float(self.score_probs[totals > 2.5].sum())
+
+    def top_scores(self, limit: int = 5):
+        flat = np.argsort(self.score_probs, axis=None)[::-1][:limit]
+        return [(int(k // (MAX_SCORE + 1)), int(k % (MAX_SCORE + 1)), float(self.score_probs.flat[k])) for k in flat]
+
+
+class SeasonResult:
+    def __init__(self, team_names: list, position_counts: np.ndarray, points_total: np.ndarray, runs: int):
+        self.team_names = team_names
+        self.runs = runs
+        # position_probs[team, place] — вероятность занять место place (0 — первое)
+        self.position_probs = position_counts / runs
+        self.avg_points = points_total / runs
+        self.champion = self.position_probs[:, 0]
+        self.top4 = self.position_probs[:, :4].sum(axis=1)
+        self.relegation = self.position_probs[:, -RELEGATION_PLACES:].sum(axis=1)
+
+    def table(self):
+        # (команда, средние очки, чемпион, топ-4, вылет) по убыванию очков
+        order = np.argsort(-self.avg_points)
+        return [
+            (self.team_names[t], float(self.avg_points[t]), float(self.champion[t]),
+             float(self.top4[t]), float(self.relegation[t]))
+            for t in order
+        ]
+
+
+class Simulator:
+    # Монте-Карло в пуле процессов; результаты кэшируются по версии снимка,
+    # а одинаковые одновременные запросы ждут одну и ту же задачу.
+    def __init__(self, workers: int = None, cache_size: int = 256, seed: int = None):
+        self.workers = workers or os.cpu_count() or 1
+        self.cache_size = cache_size
+        self._seed = np.random.SeedSequence(seed)
+        self._cache = OrderedDict()
+        self._pool = None
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        # spawn, как у воркеров супервизора: fork из процесса с event loop и
+        # потоками (БД, отправка) может унаследовать захваченные блокировки
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.workers,
+                                             mp_context=multiprocessing.get_context("spawn"))
+        return self._pool
+
+    async def close(self):
+        if self._pool is not None:
+            # ожидание процессов пула — в отдельном потоке, чтобы не блокировать loop
+            pool, self._pool = self._pool, None
+            await asyncio.to_thread(pool.shutdown, wait=True, cancel_futures=True)
+
+    async def _cached(self, key, compute):
+        task = self._cache.get(key)
+        if task is not None:
+            self._cache.move_to_end(key)
+        else:
+            task = asyncio.ensure_future(compute())
+            self._cache[key] = task
+            if len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        try:
+            return await asyncio.shield(task)
+        except Exception:
+            if self._cache.get(key) is task:
+                del self._cache[key]
+            raise
+
+    async def simulate_fixture(self, snapshot: StatsSnapshot, i: int, j: int, runs: int = 100_000) -> FixtureResult:
+        async def compute():
+            loop = asyncio.get_running_loop()
+            lambda_home, lambda_away = expected_goals(snapshot.matchups, i, j)
+            counts = await loop.run_in_executor(
+                self._get_pool(), _fixture_worker, lambda_home, lambda_away, runs, self._seed.spawn(1)[0]
+            )
+            names = snapshot.matchups.team_names
+            return FixtureResult(names[i], names[j], counts)
+
+        return await self._cached((snapshot.version, "fixture", i, j, runs), compute)
+
+    async def simulate_season(self, snapshot: StatsSnapshot, runs: int = 100_000) -> SeasonResult:
+        async def compute():
+            loop = asyncio.get_running_loop()
+            matchups = snapshot.matchups
+            n = matchups.size
+            lambda_home = np.zeros((n, n))
+            lambda_away = np.zeros((n, n))
+            for i in range(n):
+                for j in range(n):
+                    if i != j:
+                        lambda_home[i, j], lambda_away[i, j] = expected_goals(matchups, i, j)
+            parts = min(self.workers, runs)
+            sizes = [runs // parts + (1 if k < runs % parts else 0) for k in range(parts)]
+            pool = self._get_pool()
+            results = await asyncio.gather(*(
+                loop.run_in_executor(pool, _season_worker, lambda_home, lambda_away, size, seed)
+                for size, seed in zip(sizes, self._seed.spawn(parts))
+            ))
+            position_counts = sum(counts for counts, _ in results)
+            points_total = sum(points for _, points in results)
+            return SeasonResult(list(matchups.team_names), position_counts, points_total, runs)
+
+        return await self._cached((snapshot.version, "season", runs), compute)
+
+
+def format_fixture(result: FixtureResult) -> str:
+    scores = ", ".join(f"{home}:{away} — {p:.1%}" for home, away, p in result.top_scores())
+    runs = f"{result.runs:,}".replace(",", " ")
+    return (
+        f"🎲 Симуляция матча {result.team1} - {result.team2} ({runs} прогонов)\n"
+        f"------------------------------\n"
+        f"П1: {result.home_win:.1%}\n"
+        f"Ничья: {result.draw:.1%}\n"
+        f"П2: {result.away_win:.1%}\n"
+        f"ТБ 2.5: {result.over_2_5:.1%}\n"
+        f"Частые счета: {scores}"
+    )
+
+
+def format_season(result: SeasonResult) -> str:
+    runs = f"{result.runs:,}".replace(",", " ")
+    text = (
+        f"🏆 Симуляция сезона ({runs} прогонов)\n"
+        f"Команда — очки, чемпион / топ-4 / вылет\n"
+        f"------------------------------\n"
+    )
+    for place, (team, points, champion, top4, relegation) in enumerate(result.table(), start=1):
+        text += f"{place}. {team} — {points:.1f}, {champion:.1%} / {top4:.1%} / {relegation:.1%}\n"
+    return text
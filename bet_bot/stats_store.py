@@ -0,0 +1,110 @@
+import asyncio
+import json
+import logging
+import os
+import time
+
+from bet_bot.matchup import MatchupIndex
+
+
+logger = logging.getLogger(__name__)
+
+_TEAM_FIELDS = ("win_percentage", "avg_goals_scored", "avg_goals_conceded", "top_scorer")
+
+
+class StatsSnapshot:
+    # Неизменяемый срез статистики. Обработчик берёт stats.current один раз
+    # и работает только с ним, поэтому перезагрузка посреди запроса не
+    # смешивает старые и новые данные.
+    def __init__(self, version: int, season: str, team_stats: dict, h2h_stats: dict):
+        self.version = version
+        self.season = season
+        self.team_stats = team_stats
+        self.h2h_stats = h2h_stats
+        self.matchups = MatchupIndex(team_stats, h2h_stats)
+        # numpy грузится при первом снимке, а не при импорте bot.py
+        from bet_bot.fair_odds import FairOddsTable
+        self.fair_odds = FairOddsTable(self.matchups)
+
+
+def load_snapshot(path: str, version: int) -> StatsSnapshot:
+    with open(path, encoding="utf-8") as f:
+        data = json.load(f)
+    # Корректный JSON не той формы — та же ошибка формата, что и нехватка полей
+    if not isinstance(data, dict) or not isinstance(data.get("team_stats"), dict):
+        raise ValueError("нет объекта team_stats")
+    team_stats = data["team_stats"]
+    h2h_stats = data.get("h2h_stats", {})
+    if not isinstance(h2h_stats, dict):
+        raise ValueError("h2h_stats должен быть объектом")
+    for name, stats in team_stats.items():
+        if not isinstance(stats, dict):
+            raise ValueError(f"{name}: статистика команды должна быть объектом")
+        missing = [field for field in _TEAM_FIELDS if field not in stats]
+        if missing:
+            raise ValueError(f"{name}: нет полей {', '.join(missing)}")
+    for key, h2h in h2h_stats.items():
+        if not isinstance(h2h, dict) or "team1_win_percentage" not in h2h or "draw_percentage" not in h2h:
+            raise ValueError(f"{key}: неполная H2H статистика")
+    return StatsSnapshot(version, data.get("season", ""), team_stats, h2h_stats)
+
+
+class StatsStore:
+    def __init__(self, path: str, poll_interval: float = 2.0):
+        self.path = path
+        self.poll_interval = poll_interval
+        self.current = load_snapshot(path, version=1)
+        self._signature = self._file_signature()
+        self._task = None
+
+    def _file_signature(self):
+        st = os.stat(self.path)
+        return st.st_mtime_ns, st.st_size
+
+    async def reload(self) -> bool:
+        # Файл разбирается и индексируется в отдельном потоке, а подмена
+        # снимка — одно присваивание в event loop.
+        start = time.perf_counter()
+        signature = self._file_signature()
+        try:
+            snapshot = await asyncio.to_thread(load_snapshot, self.path, self.current.version + 1)
+        except Exception as e:
+            # Любая ошибка оставляет прежний снимок; трейсбек — только для
+            # неожиданных, ошибки чтения и формата понятны из сообщения
+            logger.error("Статистика из %s не загружена, остаётся версия %d: %s",
+                         self.path, self.current.version, e,
+                         exc_info=not isinstance(e, (OSError, ValueError)))
+            self._signature = signature
+            return False
+        self.current = snapshot
+        self._signature = signature
+        logger.info("Статистика перезагружена: версия %d, %d команд, %.1f ms",
+                    snapshot.version, len(snapshot.team_stats), (time.perf_counter() - start) * 1000)
+        return True
+
+    def start(self):
+        if self._task is None:
+            self._task = asyncio.create_task(self._watch())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _watch(self):
+        # Цикл не должен завершаться ни при какой ошибке: иначе следующие
+        # версии файла уже не подхватятся, а close() поднимет её заново
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            try:
+                signature = self._file_signature()
+                if signature != self._signature:
+                    await self.reload()
+            except OSError:
+                continue
+            except Exception:
+                logger.exception("Ошибка проверки файла статистики %s", self.path)
@@ -0,0 +1,274 @@
+import argparse
+import sqlite3
+from datetime import datetime, timedelta
+
+from bet_bot.config import Config
+
+
+SUMMARY_WEEKS = 8
+SUMMARY_TEAMS = 3
+
+# Агрегаты по пользователю, которые обновляются вместе со вставкой ставок
+# (BetDatabase._add_bets), поэтому /mystats не читает bets вовсе.
+# Неделя хранится датой своего понедельника.
+_TABLES = {
+    "user_summary": '''
+    CREATE TABLE IF NOT EXISTS user_summary (
+        user_id INTEGER PRIMARY KEY,
+        bets INTEGER NOT NULL,
+        quality_sum REAL NOT NULL,
+        odds_sum REAL NOT NULL,
+        first_bet DATETIME,
+        last_bet DATETIME,
+        settled INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0
+    )''',
+    "user_market_summary": '''
+    CREATE TABLE IF NOT EXISTS user_market_summary (
+        user_id INTEGER NOT NULL,
+        market TEXT NOT NULL,
+        bets INTEGER NOT NULL,
+        quality_sum REAL NOT NULL,
+        odds_sum REAL NOT NULL,
+        settled INTEGER NOT NULL DEFAULT 0,
+        wins INTEGER NOT NULL DEFAULT 0,
+        profit REAL NOT NULL DEFAULT 0,
+        PRIMARY KEY (user_id, market)
+    ) WITHOUT ROWID''',
+    "user_week_summary": '''
+    CREATE TABLE IF NOT EXISTS user_week_summary (
+        user_id INTEGER NOT NULL,
+        week DATE NOT NULL,
+        bets INTEGER NOT NULL,
+        PRIMARY KEY (user_id, week)
+    ) WITHOUT ROWID''',
+    "user_team_summary": '''
+    CREATE TABLE IF NOT EXISTS user_team_summary (
+        user_id INTEGER NOT NULL,
+        team TEXT NOT NULL,
+        bets INTEGER NOT NULL,
+        PRIMARY KEY (user_id, team)
+    ) WITHOUT ROWID''',
+}
+
+_UPSERT_USER = '''
+INSERT INTO user_summary (user_id, bets, quality_sum, odds_sum, first_bet, last_bet)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT (user_id) DO UPDATE SET
+    bets = bets + excluded.bets,
+    quality_sum = quality_sum + excluded.quality_sum,
+    odds_sum = odds_sum + excluded.odds_sum,
+    first_bet = min(coalesce(first_bet, excluded.first_bet), excluded.first_bet),
+    last_bet = max(coalesce(last_bet, excluded.last_bet), excluded.last_bet)
+'''
+_UPSERT_MARKET = '''
+INSERT INTO user_market_summary (user_id, market, bets, quality_sum, odds_sum) VALUES (?, ?, ?, ?, ?)
+ON CONFLICT (user_id, market) DO UPDATE SET
+    bets = bets + excluded.bets,
+    quality_sum = quality_sum + excluded.quality_sum,
+    odds_sum = odds_sum + excluded.odds_sum
+'''
+_UPSERT_WEEK = '''
+INSERT INTO user_week_summary (user_id, week, bets) VALUES (?, ?, ?)
+ON CONFLICT (user_id, week) DO UPDATE SET bets = bets + excluded.bets
+'''
+_UPSERT_TEAM = '''
+INSERT INTO user_team_summary (user_id, team, bets) VALUES (?, ?, ?)
+ON CONFLICT (user_id, team) DO UPDATE SET bets = bets + excluded.bets
+'''
+
+# Рассчитанные ставки (bet_bot.settlement); колонки добавлены миграцией
+_SETTLE_USER = '''
+UPDATE user_summary SET settled = settled + ?, wins = wins + ?, profit = profit + ? WHERE user_id = ?
+'''
+_SETTLE_MARKET = '''
+UPDATE user_market_summary SET settled = settled + ?, wins = wins + ?, profit = profit + ?
+WHERE user_id = ? AND market = ?
+'''
+
+# Те же агрегаты по всей таблице bets, для пересборки
+_REBUILD = [
+    '''
+    INSERT INTO user_summary (user_id, bets, quality_sum, odds_sum, first_bet, last_bet, settled, wins, profit)
+    SELECT user_id, count(*), sum(quality), sum(odds), min(timestamp), max(timestamp),
+           count(result), count(CASE WHEN result = 'win' THEN 1 END), coalesce(sum(profit), 0)
+    FROM bets GROUP BY user_id
+    ''',
+    '''
+    INSERT INTO user_market_summary (user_id, market, bets, quality_sum, odds_sum, settled, wins, profit)
+    SELECT user_id, coalesce(market, bet_type), count(*), sum(quality), sum(odds),
+           count(result), count(CASE WHEN result = 'win' THEN 1 END), coalesce(sum(profit), 0)
+    FROM bets GROUP BY user_id, coalesce(market, bet_type)
+    ''',
+    '''
+    INSERT INTO user_week_summary (user_id, week, bets)
+    SELECT user_id, date(timestamp, '-6 days', 'weekday 1'), count(*)
+    FROM bets WHERE timestamp IS NOT NULL
+    GROUP BY user_id, date(timestamp, '-6 days', 'weekday 1')
+    ''',
+    '''
+    INSERT INTO user_team_summary (user_id, team, bets)
+    SELECT user_id, team, count(*) FROM (
+        SELECT user_id, team1 AS team FROM bets WHERE team1 IS NOT NULL
+        UNION ALL
+        SELECT user_id, team2 FROM bets WHERE team2 IS NOT NULL
+    ) GROUP BY user_id, team
+    ''',
+]
+
+
+def create_summary_tables(conn: sqlite3.Connection):
+    for sql in _TABLES.values():
+        conn.execute(sql)
+
+
+def fill_summaries(conn: sqlite3.Connection):
+    # Без своей транзакции: её открывает rebuild_summaries
+    for table in _TABLES:
+        conn.execute(f'DELETE FROM {table}')
+    for sql in _REBUILD:
+        conn.execute(sql)
+
+
+def rebuild_summaries(conn: sqlite3.Connection):
+    with conn:
+        create_summary_tables(conn)
+        fill_summaries(conn)
+
+
+def _week_start(timestamp: str) -> str:
+    # Понедельник недели, как date(timestamp, '-6 days', 'weekday 1') в SQLite
+    day = datetime.strptime(timestamp, '%Y-%m-%d %H:%M:%S').date()
+    return (day - timedelta(days=day.weekday())).isoformat()
+
+
+def add_to_summaries(conn: sqlite3.Connection, records: list):
+    # Записи в формате make_bet_record. Пачка сначала сворачивается в дельты,
+    # так что на пользователя приходится по одному UPSERT в каждую таблицу.
+    users, markets, weeks, teams = {}, {}, {}, {}
+    for (user_id, bet_type, odds, stats, quality, timestamp,
+         team1, team2, market, line, probability) in records:
+        user = users.get(user_id)
+        if user is None:
+            users[user_id] = [user_id, 1, quality, odds, timestamp, timestamp]
+        else:
+            user[1] += 1
+            user[2] += quality
+            user[3] += odds
+            user[4] = min(user[4], timestamp)
+            user[5] = max(user[5], timestamp)
+        key = (user_id, market or bet_type)
+        totals = markets.setdefault(key, [0, 0.0, 0.0])
+        totals[0] += 1
+        totals[1] += quality
+        totals[2] += odds
+        key = (user_id, _week_start(timestamp))
+        weeks[key] = weeks.get(key, 0) + 1
+        for team in (team1, team2):
+            if team is not None:
+                teams[user_id, team] = teams.get((user_id, team), 0) + 1
+    conn.executemany(_UPSERT_USER, users.values())
+    conn.executemany(_UPSERT_MARKET, [(*key, *totals) for key, totals in markets.items()])
+    conn.executemany(_UPSERT_WEEK, [(*key, count) for key, count in weeks.items()])
+    conn.executemany(_UPSERT_TEAM, [(*key, count) for key, count in teams.items()])
+
+
+def add_settled_to_summaries(conn: sqlite3.Connection, rows: list):
+    # rows — (user_id, market, result, profit) только что рассчитанных ставок
+    users, markets = {}, {}
+    for user_id, market, result, profit in rows:
+        for totals in (users.setdefault(user_id, [0, 0, 0.0]), markets.setdefault((user_id, market), [0, 0, 0.0])):
+            totals[0] += 1
+            totals[1] += result == "win"
+            totals[2] += profit
+    conn.executemany(_SETTLE_USER, [(*totals, user_id) for user_id, totals in users.items()])
+    conn.executemany(_SETTLE_MARKET, [(*totals, *key) for key, totals in markets.items()])
+
+
+class UserSummary:
+    def __init__(self, bets: int, quality_sum: float, odds_sum: float, first_bet: str, last_bet: str,
+                 settled: int, wins: int, profit: float):
+        self.bets = bets
+        self.avg_quality = quality_sum / bets
+        self.avg_odds = odds_sum / bets
+        self.first_bet = first_bet
+        self.last_bet = last_bet
+        self.settled = settled
+        self.wins = wins
+        self.profit = profit
+        self.markets = []  # (рынок, ставок, среднее качество, средний коэффициент)
+        self.weeks = []  # (понедельник недели, ставок), новые первыми
+        self.teams = []  # (команда, ставок), самые частые первыми
+
+
+def read_summary(conn: sqlite3.Connection, user_id: int, weeks: int = SUMMARY_WEEKS,
+                 teams: int = SUMMARY_TEAMS):
+    # Только чтения по первичному ключу: стоимость не зависит от длины истории
+    row = conn.execute('''
+    SELECT bets, quality_sum, odds_sum, first_bet, last_bet, settled, wins, profit
+    FROM user_summary WHERE user_id = ?
+    ''', (user_id,)).fetchone()
+    if row is None or not row[0]:
+        return None
+    summary = UserSummary(*row)
+    summary.markets = [
+        (market, bets, quality_sum / bets, odds_sum / bets)
+        for market, bets, quality_sum, odds_sum in conn.execute('''
+        SELECT market, bets, quality_sum, odds_sum FROM user_market_summary
+        WHERE user_id = ? ORDER BY bets DESC, market
+        ''', (user_id,))
+    ]
+    summary.weeks = conn.execute('''
+    SELECT week, bets FROM user_week_summary WHERE user_id = ? ORDER BY week DESC LIMIT ?
+    ''', (user_id, weeks)).fetchall()
+    summary.teams = conn.execute('''
+    SELECT team, bets FROM user_team_summary WHERE user_id = ? ORDER BY bets DESC, team LIMIT ?
+    ''', (user_id, teams)).fetchall()
+    return summary
+
+
+def format_summary(summary: UserSummary) -> str:
+    text = (
+        f"📊 Ваша статистика\n"
+        f"------------------------------\n"
+        f"Всего ставок: {summary.bets}\n"
+        f"Среднее качество: {summary.avg_quality:.1f}/10\n"
+        f"Средний коэффициент: {summary.avg_odds:.2f}\n"
+    )
+    if summary.settled:
+        text += (
+            f"Рассчитано: {summary.settled}, выиграло {summary.wins} ({summary.wins / summary.settled:.0%}), "
+            f"прибыль {summary.profit:+.2f} ед. (ROI {summary.profit / summary.settled:+.1%})\n"
+        )
+    text += "\nПо рынкам (ставок, качество, коэффициент):\n"
+    for market, bets, avg_quality, avg_odds in summary.markets:
+        text += f"▸ {market}: {bets}, {avg_quality:.1f}/10, {avg_odds:.2f}\n"
+    if summary.weeks:
+        text += "\nСтавок по неделям:\n"
+        for week, bets in summary.weeks:
+            text += f"▸ с {datetime.strptime(week, '%Y-%m-%d').strftime('%d.%m.%Y')}: {bets}\n"
+    if summary.teams:
+        text += "\nЛюбимые команды: " + ", ".join(f"{team} ({bets})" for team, bets in summary.teams) + "\n"
+    return text
+
+
+def main():
+    # Пересборка агрегатов по всей истории, например после ручной правки bets:
+    #     python -m bet_bot.summaries bet_history.db
+    from bet_bot.migrations import migrate
+    parser = argparse.ArgumentParser(description="Пересобрать агрегаты /mystats из таблицы bets")
+    parser.add_argument("database", nargs="?", default=Config.from_env().database_name)
+    args = parser.parse_args()
+    conn = sqlite3.connect(args.database)
+    try:
+        migrate(conn)
+        rebuild_summaries(conn)
+        users = conn.execute('SELECT count(*), coalesce(sum(bets), 0) FROM user_summary').fetchone()
+        print(f"Пересобрано: {users[0]} пользователей, {users[1]} ставок")
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,264 @@
+import asyncio
+import bisect
+import hashlib
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+
+from aiogram import Bot
+from aiogram.types import Update
+from aiohttp import web
+
+from bet_bot.metrics import SUPERVISOR_DROPPED, SUPERVISOR_LOST
+
+
+logger = logging.getLogger(__name__)
+
+RING_REPLICAS = 64
+MONITOR_INTERVAL = 1.0
+STOP_TIMEOUT = 15.0
+
+
+def _hash(value: str) -> int:
+    # Стабильный между процессами и запусками, в отличие от hash()
+    return int.from_bytes(hashlib.blake2b(value.encode(), digest_size=8).digest(), "big")
+
+
+class HashRing:
+    # Консистентное хеширование: при смене числа воркеров переезжает
+    # только ~1/N пользователей.
+    def __init__(self, nodes: int, replicas: int = RING_REPLICAS):
+        points = sorted((_hash(f"{node}:{r}"), node) for node in range(nodes) for r in range(replicas))
+        self._points = [point for point, _ in points]
+        self._nodes = [node for _, node in points]
+
+    def node(self, key) -> int:
+        k = bisect.bisect(self._points, _hash(str(key)))
+        return self._nodes[k % len(self._nodes)]
+
+
+def update_user_id(update: Update) -> int:
+    try:
+        event = update.event
+    except Exception:
+        return 0
+    user = getattr(event, "from_user", None)
+    if user is not None:
+        return user.id
+    chat = getattr(event, "chat", None)
+    return chat.id if chat is not None else 0
+
+
+# --- Рабочий процесс ---
+
+def _worker_main(index: int, updates: multiprocessing.Queue, concurrency: int, parent: int):
+    # Останавливается только по сигналу супервизора (None в очереди),
+    # чтобы Ctrl+C в терминале не обрывал обработку на полпути.
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, signal.SIG_IGN)
+    from dotenv import load_dotenv
+
+    from bet_bot.bot import create_app
+    load_dotenv()
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(_worker_loop(index, updates, concurrency, parent, create_app()))
+
+
+def _next_item(updates: multiprocessing.Queue, parent: int):
+    # None — сигнал остановки, в том числе если супервизор умер
+    while True:
+        try:
+            return updates.get(timeout=1.0)
+        except queue.Empty:
+            if os.getppid() != parent:
+                return None
+
+
+async def _process(app, update: Update, previous: asyncio.Task):
+    if previous is not None:
+        await asyncio.wait([previous])
+    try:
+        await app.dp.feed_update(app.bot, update)
+    except Exception:
+        logger.exception("Ошибка обработки апдейта %d", update.update_id)
+
+
+async def _worker_loop(index: int, updates: multiprocessing.Queue, concurrency: int, parent: int, app):
+    # Апдейты разных пользователей обрабатываются параллельно (до
+    # concurrency штук), апдейты одного пользователя — строго по очереди.
+    loop = asyncio.get_running_loop()
+    slots = asyncio.Semaphore(concurrency)
+    tails = {}
+    await app.start(worker=index)
+    logger.info("Воркер %d запущен", index)
+    try:
+        while True:
+            await slots.acquire()
+            item = await loop.run_in_executor(None, _next_item, updates, parent)
+            if item is None:
+                slots.release()
+                break
+            update = Update.model_validate_json(item, context={"bot": app.bot})
+            user_id = update_user_id(update)
+            task = asyncio.create_task(_process(app, update, tails.get(user_id)))
+            tails[user_id] = task
+
+            def done(task, user_id=user_id):
+                slots.release()
+                if tails.get(user_id) is task:
+                    del tails[user_id]
+
+            task.add_done_callback(done)
+        if tails:
+            await asyncio.wait(list(tails.values()))
+    finally:
+        await app.close()
+        logger.info("Воркер %d остановлен", index)
+
+
+# --- Супервизор ---
+
+class Worker:
+    def __init__(self, index: int, queue_size: int):
+        self.index = index
+        self.queue_size = queue_size
+        self.queue = None
+        self.process = None
+        self.restarts = 0
+        self.lost = 0
+        self.dropped = 0
+        self.stalled = False
+
+    def start(self, concurrency: int):
+        # Очередь создаётся заново при каждом запуске: процесс, убитый внутри
+        # get(), оставляет её блокировку чтения захваченной навсегда
+        context = multiprocessing.get_context("spawn")
+        if self.queue is not None:
+            self._discard_queue()
+        self.queue = context.Queue(maxsize=self.queue_size)
+        self.process = context.Process(
+            target=_worker_main, args=(self.index, self.queue, concurrency, os.getpid()),
+            name=f"bet-worker-{self.index}", daemon=True,
+        )
+        self.process.start()
+
+    def _discard_queue(self):
+        lost = self.depth()
+        if lost:
+            self.lost += lost
+            SUPERVISOR_LOST.inc(str(self.index), amount=lost)
+            logger.error("Воркер %d: потеряно апдейтов в очереди упавшего процесса: %d", self.index, lost)
+        self.queue.cancel_join_thread()
+        self.queue.close()
+
+    def depth(self):
+        try:
+            return self.queue.qsize()
+        except NotImplementedError:  # macOS
+            return None
+
+
+class Supervisor:
+    # Принимает апдейты сам (polling или webhook) и раздаёт их воркерам по
+    # консистентному хешу user_id: FSM-диалог пользователя всегда живёт в
+    # одном процессе, а его сообщения обрабатываются в порядке прихода.
+    # Упавший воркер перезапускается с новой очередью.
+    def __init__(self, workers: int, queue_size: int = 1000, concurrency: int = 64, put_timeout: float = 2.0):
+        self.concurrency = concurrency
+        self.put_timeout = put_timeout
+        self.workers = [Worker(index, queue_size) for index in range(workers)]
+        self.ring = HashRing(workers)
+        self._stopping = False
+
+    def start(self):
+        for worker in self.workers:
+            worker.start(self.concurrency)
+
+    def status(self) -> list:
+        return [
+            {
+                "worker": worker.index,
+                "pid": worker.process.pid if worker.process else None,
+                "alive": bool(worker.process and worker.process.is_alive()),
+                "queue_depth": worker.depth(),
+                "restarts": worker.restarts,
+                "lost": worker.lost,
+                "dropped": worker.dropped,
+            }
+            for worker in self.workers
+        ]
+
+    async def feed_update(self, bot: Bot, update: Update):
+        # Полная очередь воркера тормозит приём апдейтов не дольше put_timeout,
+        # дальше апдейт отбрасывается. Пока очередь зависшего воркера не
+        # освободится, его апдейты отбрасываются сразу, без ожидания: приём
+        # общий, и один воркер не должен останавливать остальных.
+        worker = self.workers[self.ring.node(update_user_id(update))]
+        item = update.model_dump_json(exclude_none=True)
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + (0 if worker.stalled else self.put_timeout)
+        while True:
+            try:
+                worker.queue.put_nowait(item)
+                worker.stalled = False
+                return
+            except queue.Full:
+                if loop.time() >= deadline:
+                    break
+                await asyncio.sleep(0.05)
+        if not worker.stalled:
+            logger.warning("Очередь воркера %d заполнена дольше %.1f с, его апдейты отбрасываются",
+                           worker.index, self.put_timeout)
+        worker.stalled = True
+        worker.dropped += 1
+        SUPERVISOR_DROPPED.inc(str(worker.index))
+
+    async def monitor(self):
+        while not self._stopping:
+            for worker in self.workers:
+                if not self._stopping and not worker.process.is_alive():
+                    logger.error("Воркер %d (pid %s) завершился с кодом %s, перезапуск",
+                                 worker.index, worker.process.pid, worker.process.exitcode)
+                    worker.restarts += 1
+                    worker.start(self.concurrency)
+            await asyncio.sleep(MONITOR_INTERVAL)
+
+    async def stop(self):
+        self._stopping = True
+        loop = asyncio.get_running_loop()
+        for worker in self.workers:
+            try:
+                await loop.run_in_executor(None, worker.queue.put, None, True, STOP_TIMEOUT)
+            except queue.Full:
+                pass
+        for worker in self.workers:
+            await loop.run_in_executor(None, worker.process.join, STOP_TIMEOUT)
+            if worker.process.is_alive():
+                logger.warning("Воркер %d не остановился за %.0f с", worker.index, STOP_TIMEOUT)
+                worker.process.kill()
+
+    async def poll(self, bot: Bot, allowed_updates: list, timeout: int = 30):
+        offset = None
+        while True:
+            try:
+                updates = await bot.get_updates(
+                    offset=offset, timeout=timeout, allowed_updates=allowed_updates,
+                    request_timeout=timeout + 10,
+                )
+            except Exception:
+                logger.exception("Ошибка getUpdates, повтор через 5 с")
+                await asyncio.sleep(5)
+                continue
+            for update in updates:
+                await self.feed_update(bot, update)
+                offset = update.update_id + 1
+
+    def status_app(self) -> web.Application:
+        async def handle(request):
+            return web.json_response(self.status())
+
+        app = web.Application()
+        app.router.add_get("/workers", handle)
+        return app
@@ -0,0 +1,215 @@
+import re
+
+
+# Группы названий одной команды. Группа применяется к команде из снимка,
+# если её название есть в группе; остальные названия становятся алиасами.
+ALIAS_GROUPS = [
+    ("Liverpool", "LFC", "Ливерпуль"),
+    ("Arsenal", "Gunners", "Арсенал"),
+    ("Manchester City", "Man City", "Man. City", "ManCity", "MCFC", "Манчестер Сити", "Ман Сити", "Сити"),
+    ("Manchester United", "Man Utd", "Man United", "Man U", "MUFC", "Манчестер Юнайтед", "Ман Юнайтед", "МЮ"),
+    ("Chelsea", "CFC", "Челси"),
+    ("Newcastle United", "Newcastle", "Newcastle Utd", "Toon", "Ньюкасл", "Ньюкасл Юнайтед"),
+    ("Aston Villa", "Villa", "Астон Вилла", "Вилла"),
+    ("Nottingham Forest", "Nottingham", "Nott'm Forest", "Notts Forest", "Forest", "NFFC",
+     "Ноттингем", "Ноттингем Форест", "Ноттингхэм Форест"),
+    ("Brighton", "Brighton & Hove Albion", "Brighton and Hove Albion", "Брайтон"),
+    ("Bournemouth", "AFC Bournemouth", "Борнмут"),
+    ("Brentford", "Брентфорд"),
+    ("Fulham", "Фулхэм", "Фулхем"),
+    ("Crystal Palace", "Palace", "Кристал Пэлас", "Кристал Пелас"),
+    ("West Ham", "West Ham United", "Hammers", "Вест Хэм", "Вест Хем"),
+    ("Wolverhampton", "Wolverhampton Wanderers", "Wolves", "Вулверхэмптон", "Вулверхэмптон Уондерерс", "Вулвз"),
+    ("Everton", "Эвертон"),
+    ("Leicester City", "Leicester", "Лестер", "Лестер Сити"),
+    ("Southampton", "Saints", "Саутгемптон", "Саутгэмптон"),
+    ("Ipswich Town", "Ipswich", "Ипсвич", "Ипсвич Таун"),
+    ("Sheffield United", "Sheffield Utd", "Sheff Utd", "Blades", "Шеффилд", "Шеффилд Юнайтед"),
+    ("Tottenham Hotspur", "Tottenham", "Spurs", "Тоттенхэм", "Тоттенхем", "Шпоры"),
+    ("Leeds United", "Leeds", "Лидс"),
+    ("Burnley", "Бернли"),
+    ("Sunderland", "Сандерленд"),
+    ("Luton Town", "Luton", "Лутон"),
+]
+
+# Слова, без которых название обычно тоже узнаётся: «Leicester City» -> «leicester»
+_SUFFIXES = {"fc", "afc", "city", "united", "utd", "town", "hotspur", "albion", "wanderers"}
+
+_DASHES_RE = re.compile(r"[‐‑‒–—―−]")
+_VERSUS_RE = re.compile(r"\s+(?:vs\.?|v\.?|против)\s+", re.IGNORECASE)
+_NON_WORD_RE = re.compile(r"[^\w ]+")
+
+MIN_PREFIX = 3
+MIN_FUZZY_SCORE = 0.75
+FUZZY_CANDIDATES = 5
+CACHE_SIZE = 10000
+
+EXACT_SCORE = 1.0
+PREFIX_SCORE = 0.9
+
+
+def normalize(text: str) -> str:
+    text = text.lower().replace("ё", "е").replace("&", " and ")
+    return " ".join(_NON_WORD_RE.sub("", text).replace("_", " ").split())
+
+
+def _trigrams(alias: str):
+    padded = f"  {alias} "
+    return {padded[k:k + 3] for k in range(len(padded) - 2)}
+
+
+def _distance(a: str, b: str, limit: int) -> int:
+    # Расстояние Дамерау-Левенштейна (с перестановкой соседних букв) в полосе
+    # шириной limit вокруг диагонали; больше limit — возвращает limit + 1
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    over = limit + 1
+    previous2 = None
+    previous = [j if j <= limit else over for j in range(len(b) + 1)]
+    for i in range(1, len(a) + 1):
+        current = [over] * (len(b) + 1)
+        if i <= limit:
+            current[0] = i
+        low, high = max(1, i - limit), min(len(b), i + limit)
+        for j in range(low, high + 1):
+            value = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (a[i - 1] != b[j - 1]))
+            if previous2 is not None and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                value = min(value, previous2[j - 2] + 1)
+            current[j] = value
+        if min(current[low - 1:high + 1]) > limit:
+            return over
+        previous2, previous = previous, current
+    return min(previous[-1], over)
+
+
+class TeamResolver:
+    # Строится один раз на снимок статистики (MatchupIndex). Название
+    # команды ищется по точному алиасу, затем по однозначному префиксу,
+    # затем нечётко: кандидаты из индекса триграмм проверяются расстоянием
+    # Дамерау-Левенштейна. Префиксное дерево хранится развёрнутым в словарь
+    # «префикс -> команды», так что поиск — один dict lookup.
+    def __init__(self, team_names: list):
+        self.team_names = team_names
+        owners = {}  # алиас -> {id}
+        for i, name in enumerate(team_names):
+            for alias in self._aliases_for(name):
+                owners.setdefault(alias, set()).add(i)
+        # неоднозначные алиасы («manchester» при двух клубах) выбрасываем
+        self._exact = {alias: ids.pop() for alias, ids in owners.items() if len(ids) == 1}
+        for i, name in enumerate(team_names):
+            self._exact[normalize(name)] = i  # полное название главнее любого алиаса
+
+        prefixes = {}
+        for alias, i in self._exact.items():
+            for k in range(MIN_PREFIX, len(alias) + 1):
+                prefixes.setdefault(alias[:k], set()).add(i)
+        self._prefix = {prefix: frozenset(ids) for prefix, ids in prefixes.items()}
+
+        self._aliases = list(self._exact)
+        self._max_length = max(map(len, self._aliases), default=0)
+        self._grams = {}
+        for k, alias in enumerate(self._aliases):
+            for gram in _trigrams(alias):
+                self._grams.setdefault(gram, []).append(k)
+        self._cache = {}
+
+    @staticmethod
+    def _aliases_for(name: str):
+        normalized = normalize(name)
+        aliases = {normalized, normalized.replace(" ", "")}
+        words = normalized.split()
+        stripped = [word for word in words if word not in _SUFFIXES]
+        if stripped and stripped != words:
+            aliases.add(" ".join(stripped))
+        for group in ALIAS_GROUPS:
+            group_names = {normalize(alias) for alias in group}
+            if normalized in group_names:
+                aliases |= group_names
+        return aliases
+
+    def resolve(self, text: str):
+        # (id команды, уверенность 0..1) или (None, 0)
+        alias = normalize(text)
+        if not alias:
+            return None, 0.0
+        i = self._exact.get(alias)
+        if i is not None:
+            return i, EXACT_SCORE
+        ids = self._prefix.get(alias)
+        if ids is not None and len(ids) == 1:
+            return next(iter(ids)), PREFIX_SCORE
+        return self._fuzzy(alias)
+
+    def _fuzzy(self, alias: str):
+        if len(alias) * MIN_FUZZY_SCORE > self._max_length:
+            return None, 0.0  # заведомо длиннее любого алиаса
+        hits = {}
+        for gram in _trigrams(alias):
+            for k in self._grams.get(gram, ()):
+                hits[k] = hits.get(k, 0) + 1
+        if not hits:
+            return None, 0.0
+        best, best_score = None, 0.0
+        top = max(hits.values())
+        for k in sorted(hits, key=hits.get, reverse=True)[:FUZZY_CANDIDATES]:
+            if hits[k] * 2 < top:
+                break
+            candidate = self._aliases[k]
+            length = max(len(alias), len(candidate))
+            limit = int(length * (1 - MIN_FUZZY_SCORE))
+            score = 1 - _distance(alias, candidate, limit) / length
+            if score > best_score:
+                best, best_score = self._exact[candidate], score
+        if best_score < MIN_FUZZY_SCORE:
+            return None, 0.0
+        return best, best_score
+
+    def search(self, text: str, limit: int = 10) -> list:
+        # Команды, подходящие под начало ввода (inline-режим); при пустом
+        # вводе — все, при опечатке — лучшее нечёткое совпадение
+        alias = normalize(text)
+        if not alias:
+            return list(range(len(self.team_names)))[:limit]
+        ids = self._prefix.get(alias)
+        if ids is None and len(alias) < MIN_PREFIX:
+            ids = {i for a, i in self._exact.items() if a.startswith(alias)}
+        if ids:
+            return sorted(ids, key=lambda i: self.team_names[i])[:limit]
+        i, _ = self._fuzzy(alias)
+        return [] if i is None else [i]
+
+    def prefixes(self):
+        # (префикс, команды) для всех префиксов алиасов от MIN_PREFIX букв
+        return self._prefix.items()
+
+    def split_match(self, text: str):
+        # «Команда1-Команда2» в любом написании -> (i, j) или None
+        result = self._cache.get(text)
+        if result is None and text not in self._cache:
+            if len(self._cache) >= CACHE_SIZE:
+                self._cache.clear()
+            result = self._cache[text] = self._split(text)
+        return result
+
+    def _split(self, text: str):
+        text = _VERSUS_RE.sub("-", _DASHES_RE.sub("-", text))
+        positions = [k for k, char in enumerate(text) if char == "-"]
+        if not positions:
+            # без разделителя: «Arsenal Chelsea»
+            positions = [k for k, char in enumerate(text) if char == " "]
+        return self._best_split(text, positions)
+
+    def _best_split(self, text: str, positions: list):
+        best, best_score = None, 0.0
+        for pos in positions:
+            i, score1 = self.resolve(text[:pos])
+            if i is None:
+                continue
+            j, score2 = self.resolve(text[pos + 1:])
+            if j is None or j == i:
+                continue
+            if score1 + score2 > best_score:
+                best, best_score = (i, j), score1 + score2
+                if best_score == 2 * EXACT_SCORE:
+                    break
+        return best
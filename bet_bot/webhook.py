@@ -0,0 +1,104 @@
+import asyncio
+import hmac
+import logging
+import signal
+
+from aiogram import Bot, Dispatcher
+from aiogram.types import Update
+from aiohttp import web
+
+
+logger = logging.getLogger(__name__)
+
+SECRET_HEADER = "X-Telegram-Bot-Api-Secret-Token"
+
+
+class WebhookServer:
+    # Принимает апдейты от Telegram, сразу отвечает 200 и кладёт апдейт в
+    # ограниченную очередь. Очередь разбирают max_concurrency задач; если она
+    # заполнена, отвечаем 503 — Telegram повторит доставку позже.
+    def __init__(self, dp: Dispatcher, bot: Bot, path: str = "/webhook", secret: str = None,
+                 max_concurrency: int = 64, queue_size: int = 1000, drain_timeout: float = 10.0, feed=None):
+        self.dp = dp
+        self.bot = bot
+        # feed(bot, update) — куда передавать апдейт; по умолчанию в dp
+        self.feed = feed or dp.feed_update
+        self.path = path
+        self.secret = secret
+        self.max_concurrency = max_concurrency
+        self.drain_timeout = drain_timeout
+        self.queue = asyncio.Queue(maxsize=queue_size)
+        self.app = web.Application(client_max_size=1024 * 1024)
+        self.app.router.add_post(path, self.handle)
+        self._runner = None
+        self._workers = []
+
+    async def handle(self, request: web.Request) -> web.Response:
+        if self.secret is not None:
+            token = request.headers.get(SECRET_HEADER, "")
+            if not hmac.compare_digest(token, self.secret):
+                return web.Response(status=401)
+        try:
+            update = Update.model_validate(await request.json(), context={"bot": self.bot})
+        except ValueError:
+            return web.Response(status=400)
+        try:
+            self.queue.put_nowait(update)
+        except asyncio.QueueFull:
+            logger.warning("Очередь апдейтов заполнена (%d), апдейт %d отклонён", self.queue.maxsize, update.update_id)
+            return web.Response(status=503)
+        return web.Response()
+
+    async def _worker(self):
+        while True:
+            update = await self.queue.get()
+            try:
+                await self.feed(self.bot, update)
+            except Exception:
+                logger.exception("Ошибка обработки апдейта %d", update.update_id)
+            finally:
+                self.queue.task_done()
+
+    async def start(self, host: str, port: int, url: str = None):
+        await self.dp.emit_startup(bot=self.bot, dispatcher=self.dp)
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self.max_concurrency)]
+        self._runner = web.AppRunner(self.app, access_log=None, handle_signals=False)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, host, port, backlog=1024, reuse_address=True).start()
+        if url:
+            await self.bot.set_webhook(
+                url=url.rstrip("/") + self.path,
+                secret_token=self.secret,
+                allowed_updates=self.dp.resolve_used_update_types(),
+                max_connections=min(self.max_concurrency, 100),
+            )
+        logger.info("Webhook слушает %s:%d%s", host, port, self.path)
+
+    async def stop(self):
+        # Сначала перестаём принимать, затем дорабатываем очередь
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout=self.drain_timeout)
+        except asyncio.TimeoutError:
+            logger.warning("Не дождались обработки %d апдейтов", self.queue.qsize())
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+        await self.dp.emit_shutdown(bot=self.bot, dispatcher=self.dp)
+
+    async def serve(self, host: str, port: int, url: str = None):
+        stop_event = asyncio.Event()
+        loop = asyncio.get_running_loop()
+        for sig in (signal.SIGINT, signal.SIGTERM):
+            try:
+                loop.add_signal_handler(sig, stop_event.set)
+            except NotImplementedError:  # Windows
+                pass
+        await self.start(host, port, url)
+        try:
+            await stop_event.wait()
+        finally:
+            await self.stop()
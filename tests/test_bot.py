@@ -0,0 +1,76 @@
+import asyncio
+import datetime
+
+from aiogram.client.session.base import BaseSession
+from aiogram.methods import AnswerCallbackQuery, GetMe, SendMessage
+from aiogram.types import CallbackQuery, Chat, Message, Update, User
+
+from bet_bot.bot import create_app
+from bet_bot.config import Config
+
+
+class RecordingSession(BaseSession):
+    # Запоминает запросы к Bot API вместо отправки
+    def __init__(self, render=None):
+        super().__init__()
+        self.requests = []
+
+    async def make_request(self, bot, method, timeout=None):
+        self.requests.append(method)
+        if isinstance(method, SendMessage):
+            return Message(message_id=len(self.requests), date=datetime.datetime.now(),
+                           chat=Chat(id=method.chat_id, type="private"), text=method.text)
+        if isinstance(method, GetMe):
+            return User(id=1, is_bot=True, first_name="bot", username="bet_bot")
+        return True
+
+    async def stream_content(self, url, headers=None, timeout=30, chunk_size=65536, raise_for_status=True):
+        yield b""
+
+    async def close(self):
+        pass
+
+
+def make_app(tmp_path):
+    app = create_app(Config(api_token="123:test", database_name=str(tmp_path / "bets.db"),
+                            fsm_database=str(tmp_path / "fsm.db")))
+    app.session_class = RecordingSession
+    return app
+
+
+def callback_update(user_id: int, data: str) -> Update:
+    user = User(id=user_id, is_bot=False, first_name="u")
+    message = Message(message_id=1, date=datetime.datetime.now(), chat=Chat(id=user_id, type="private"), text="x")
+    return Update(update_id=1, callback_query=CallbackQuery(
+        id="1", from_user=user, chat_instance="1", data=data, message=message,
+    ))
+
+
+def test_tampered_history_cursor_is_answered(tmp_path):
+    async def scenario():
+        app = make_app(tmp_path)
+        await app.db.open()
+        try:
+            for data in ("history:garbage", "history:2025:1", "history:20250101000000:x"):
+                await app.dp.feed_update(app.bot, callback_update(7, data))
+        finally:
+            await app.close()
+        return app.bot.session.requests
+
+    requests = asyncio.run(scenario())
+    answers = [method for method in requests if isinstance(method, AnswerCallbackQuery)]
+    assert [answer.text for answer in answers] == ["История устарела, откройте /history заново."] * 3
+
+
+def test_simulator_pool_is_shared_between_supervisor_workers(tmp_path, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+
+    def pool_size(worker, **config):
+        app = create_app(Config(api_token="123:test", **{"workers": 4, **config}))
+        app.worker = worker
+        return app.simulator.workers
+
+    assert pool_size(None) == 8
+    assert pool_size(0) == 2
+    assert pool_size(0, workers=16) == 1
+    assert pool_size(0, simulator_workers=3) == 3
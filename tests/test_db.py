@@ -0,0 +1,28 @@
+import asyncio
+
+from bet_bot.db import BetDatabase, BetJournal, decode_cursor, encode_cursor, page_cursor
+
+
+def make_journal(tmp_path) -> BetJournal:
+    return BetJournal(BetDatabase(str(tmp_path / "bets.db")))
+
+
+def test_history_pages_do_not_repeat_unflushed_bets(tmp_path):
+    async def scenario():
+        journal = make_journal(tmp_path)
+        await journal.db.open()
+        try:
+            for k in range(7):
+                journal.add_bet(1, "П1", 3.0 + k / 100, "П1: Arsenal vs Chelsea", 5, "Arsenal", "Chelsea")
+            journal.add_bet(2, "П2", 2.0, "П2: Chelsea vs Arsenal", 5, "Arsenal", "Chelsea")
+            # первая страница целиком из очереди, сброс — между страницами
+            first = await journal.get_bets_page(1, limit=5)
+            cursor = decode_cursor(encode_cursor(page_cursor(first[-1])))
+            second = await journal.get_bets_page(1, limit=5, before=cursor)
+        finally:
+            await journal.close()
+            await journal.db.close()
+        assert [row[3] for row in first] == [3.06, 3.05, 3.04, 3.03, 3.02]
+        assert [row[3] for row in second] == [3.01, 3.0]
+
+    asyncio.run(scenario())
@@ -0,0 +1,93 @@
+import asyncio
+
+from aiogram.fsm.state import State, StatesGroup
+from aiogram.fsm.storage.base import StorageKey
+
+from bet_bot.fsm_storage import SQLiteStorage
+
+
+class Form(StatesGroup):
+    match = State()
+    odds = State()
+
+
+def key(user_id: int) -> StorageKey:
+    return StorageKey(bot_id=1, chat_id=user_id, user_id=user_id)
+
+
+def test_state_and_data_survive_reopen(tmp_path):
+    path = str(tmp_path / "fsm.db")
+
+    async def scenario():
+        storage = SQLiteStorage(path)
+        await storage.set_data(key(1), {"match": "Arsenal - Chelsea"})
+        await storage.set_state(key(1), Form.odds)  # смена состояния не теряет данные
+        await storage.update_data(key(1), {"odds": 2.5})
+        await storage.set_state(key(2), Form.match)
+        await storage.set_state(key(2), None)
+        await storage.close()
+
+        storage = SQLiteStorage(path)
+        try:
+            assert await storage.get_state(key(1)) == Form.odds.state
+            assert await storage.get_data(key(1)) == {"match": "Arsenal - Chelsea", "odds": 2.5}
+            assert await storage.get_state(key(2)) is None
+            assert await storage.get_data(key(3)) == {}
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_expired_state_is_empty(tmp_path):
+    async def scenario():
+        storage = SQLiteStorage(str(tmp_path / "fsm.db"), state_ttl=0.2, cache_ttl=0)
+        try:
+            await storage.set_state(key(1), Form.odds)
+            await storage.update_data(key(1), {"match": "Arsenal - Chelsea"})
+            assert await storage.get_state(key(1)) == Form.odds.state
+            await asyncio.sleep(0.3)
+            assert await storage.get_state(key(1)) is None
+            # новая запись в просроченную строку не воскрешает старые данные
+            await storage.set_state(key(1), Form.match)
+            assert await storage.get_data(key(1)) == {}
+        finally:
+            await storage.close()
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_reads_share_one_query(tmp_path):
+    async def scenario():
+        storage = SQLiteStorage(str(tmp_path / "fsm.db"))
+        try:
+            for user_id in range(10):
+                await storage.set_state(key(user_id), Form.match)
+            storage._cache.clear()
+            batches = []
+            load_rows = storage._load_rows
+            storage._load_rows = lambda keys: batches.append(len(keys)) or load_rows(keys)
+            states = await asyncio.gather(*(storage.get_state(key(user_id % 12)) for user_id in range(24)))
+        finally:
+            await storage.close()
+        assert batches == [12]
+        assert states == [Form.match.state if user_id % 12 < 10 else None for user_id in range(24)]
+
+    asyncio.run(scenario())
+
+
+def test_update_data_merges_across_processes(tmp_path):
+    # два хранилища на одном файле — как два воркера супервизора
+    path = str(tmp_path / "fsm.db")
+
+    async def scenario():
+        first, second = SQLiteStorage(path, cache_ttl=0), SQLiteStorage(path, cache_ttl=0)
+        try:
+            await first.update_data(key(1), {"match": "Arsenal - Chelsea"})
+            await second.update_data(key(1), {"odds": 2.5})
+            assert await first.get_data(key(1)) == {"match": "Arsenal - Chelsea", "odds": 2.5}
+        finally:
+            await first.close()
+            await second.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,116 @@
+import sqlite3
+
+import pytest
+
+from bet_bot import migrations
+from bet_bot.migrations import MIGRATIONS, migrate
+from bet_bot.summaries import rebuild_summaries
+
+
+def migrate_to(conn, version: int, monkeypatch):
+    # схема, как её оставила миграция номер version
+    with monkeypatch.context() as patch:
+        patch.setattr(migrations, "MIGRATIONS", MIGRATIONS[:version])
+        migrate(conn)
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    yield conn
+    conn.close()
+
+
+def test_duplicate_match_results_are_merged(conn, monkeypatch):
+    migrate_to(conn, 5, monkeypatch)
+    with conn:
+        for bets, played_at in ((3, None), (0, None), (2, None), (1, "2025-01-01 00:00:00")):
+            conn.execute('''
+            INSERT INTO match_results (team1, team2, goals1, goals2, played_at, settled_at, bets)
+            VALUES ('Arsenal', 'Chelsea', 1, 0, ?, '2025-01-02 00:00:00', ?)
+            ''', (played_at, bets))
+    migrate(conn)
+    assert conn.execute("SELECT id, played_at, bets FROM match_results ORDER BY id").fetchall() == [
+        (1, None, 5), (4, "2025-01-01 00:00:00", 1),
+    ]
+    with pytest.raises(sqlite3.IntegrityError):
+        conn.execute('''
+        INSERT INTO match_results (team1, team2, goals1, goals2, played_at, settled_at, bets)
+        VALUES ('Arsenal', 'Chelsea', 2, 2, NULL, '2025-01-03 00:00:00', 0)
+        ''')
+
+
+def summary_tables(conn) -> dict:
+    return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall()
+            for table in ("user_summary", "user_market_summary", "user_week_summary", "user_team_summary")}
+
+
+def test_baseline_database_is_backfilled(conn):
+    # таблица bets в том виде, как её создавала исходная init_db
+    conn.execute('''
+    CREATE TABLE bets (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        user_id INTEGER NOT NULL,
+        bet_type TEXT NOT NULL,
+        odds REAL NOT NULL,
+        stats TEXT NOT NULL,
+        quality INTEGER NOT NULL,
+        timestamp DATETIME DEFAULT CURRENT_TIMESTAMP
+    )''')
+    rows = [
+        (1, "П1", 2.0, "П1: Arsenal vs Chelsea (60%/50%), H2H: 40% побед, 30% ничьих", 7, "2025-03-03 10:00:00"),
+        (1, "П2", 4.0, "П2: Chelsea vs Arsenal (50%/60%), H2H: 30% побед, 30% ничьих", 4, "2025-03-09 23:59:59"),
+        (1, "Ничья", 3.2, "Ничья: Arsenal vs Chelsea (60%/50%), H2H ничьи: 30%", 5, "2025-03-10 00:00:00"),
+        (2, "ТБ 2.5", 1.8, "ТБ 2.5: Arsenal(1.82) vs Chelsea(1.68), тотал больше 2.5", 6, "2025-03-05 12:00:00"),
+        (2, "Победа команды", 1.5, "Победы: 60%/50%, Очные: 40%/30%", 8, "2025-03-05 13:00:00"),
+        (2, "Тотал больше", 2.5, "Голы: 1.8/1.6, Тотал: больше 3.0", 3, "2025-03-06 13:00:00"),
+    ]
+    conn.executemany(
+        "INSERT INTO bets (user_id, bet_type, odds, stats, quality, timestamp) VALUES (?, ?, ?, ?, ?, ?)", rows,
+    )
+    conn.commit()
+
+    migrate(conn)
+
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == len(MIGRATIONS)
+    assert conn.execute("SELECT team1, team2, market, line, probability FROM bets ORDER BY id").fetchall() == [
+        ("Arsenal", "Chelsea", "П1", None, 0.5),
+        ("Arsenal", "Chelsea", "П2", None, 0.25),
+        ("Arsenal", "Chelsea", "НИЧЬЯ", None, 1 / 3.2),
+        ("Arsenal", "Chelsea", "ТБ", 2.5, 1 / 1.8),
+        (None, None, "П1", None, 1 / 1.5),
+        (None, None, "ТБ", 3.0, 0.4),
+    ]
+    # агрегаты, посчитанные миграцией, совпадают с полной пересборкой
+    migrated = summary_tables(conn)
+    assert migrated["user_week_summary"] == [
+        (1, "2025-03-03", 2), (1, "2025-03-10", 1), (2, "2025-03-03", 3),
+    ]
+    rebuild_summaries(conn)
+    assert summary_tables(conn) == migrated
+
+
+def test_failed_backfill_is_rolled_back(conn, monkeypatch):
+    migrate_to(conn, 2, monkeypatch)
+    with conn:
+        conn.executemany("INSERT INTO bets (user_id, bet_type, odds, stats, quality) VALUES (1, 'П1', 2.0, ?, 5)",
+                         [("П1: Arsenal vs Chelsea (60%/50%), H2H: 40% побед, 30% ничьих",)] * 3)
+    monkeypatch.setattr(migrations, "BACKFILL_BATCH_SIZE", 1)
+    calls = []
+
+    def failing_parse(bet_type, stats):
+        calls.append(bet_type)
+        if len(calls) == 3:
+            raise RuntimeError("прервано")
+        return "Arsenal", "Chelsea"
+
+    monkeypatch.setattr(migrations, "parse_match_teams", failing_parse)
+    with pytest.raises(RuntimeError):
+        migrate(conn)
+    # первые две пачки уже записаны в транзакции, но откатились вместе с ней
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == 2
+    assert conn.execute("SELECT count(*) FROM bets WHERE market IS NOT NULL").fetchone()[0] == 0
+
+    monkeypatch.undo()
+    migrate(conn)
+    assert conn.execute("SELECT count(*) FROM bets WHERE team1 = 'Arsenal'").fetchone()[0] == 3
@@ -0,0 +1,112 @@
+import itertools
+import random
+
+import numpy as np
+import pytest
+
+from bet_bot.scoring import calculate_draw_quality, calculate_outcome_quality, calculate_total_quality
+from bet_bot.scoring_batch import draw_quality_batch, outcome_quality_batch, total_quality_batch
+
+
+# Исходные скалярные формулы (до перехода на scoring_batch) — эталон, с
+# которым сверяются и calculate_*, и пакетные версии
+def reference_outcome(odds, win_team, win_opponent, head_to_head_win, head_to_head_draw):
+    stat_adv = (win_team - win_opponent) / 100
+    h2h_score = (head_to_head_win * 0.6 + head_to_head_draw * 0.4) / 100
+    stat_prob = max(0, min(1, 0.5 * (win_team / 100) + 0.5 * h2h_score))
+    implied_prob = 1 / odds if odds > 0 else 0
+    value = stat_prob - implied_prob
+    raw_score = (stat_adv * 0.2 + h2h_score * 0.2 + value * 0.6) * 10 + 5
+    return int(round(max(1, min(10, raw_score))))
+
+
+def reference_draw(odds, win_team, win_opponent, head_to_head_draw):
+    base_draw_probability = 50 - abs(win_team - win_opponent) * 0.5
+    odds_factor = 1 + (odds - 1) / 5
+    raw_score = (base_draw_probability * 0.6 + head_to_head_draw * 0.4) * odds_factor
+    return max(1, min(10, int(5 + raw_score / 20)))
+
+
+def reference_total(odds, avg_goals_team, avg_goals_opponent, total_value, over):
+    avg_goals = (avg_goals_team + avg_goals_opponent) / 2
+    implied_probability = 1 / odds if odds > 0 else 0
+    goal_gap = avg_goals - total_value if over else total_value - avg_goals
+    probability_factor = max(0, min(1, 0.5 + (goal_gap * 0.2)))
+    value = probability_factor - implied_probability
+    odds_impact = odds ** 0.7
+    quality = 5 + 4 * value + 2 * (odds_impact - 1) + 1 * (probability_factor - 0.5)
+    return int(round(max(1, min(10, quality))))
+
+
+ODDS_EDGES = [0.0, 1.0, 1.01, 2.0, 100.0]
+PERCENT_EDGES = [0.0, 50.0, 100.0]
+RANDOM_CASES = 5000
+
+
+def _random_odds(rng):
+    # коэффициенты с шагом 0.01, как их вводят пользователи, и произвольные
+    return round(rng.uniform(1, 20), 2) if rng.random() < 0.5 else rng.uniform(0, 50)
+
+
+def _outcome_cases():
+    rng = random.Random(1)
+    cases = list(itertools.product(ODDS_EDGES, PERCENT_EDGES, PERCENT_EDGES, PERCENT_EDGES, PERCENT_EDGES))
+    for _ in range(RANDOM_CASES):
+        h2h_win = rng.uniform(0, 100)
+        cases.append((_random_odds(rng), rng.uniform(0, 100), rng.uniform(0, 100),
+                      h2h_win, rng.uniform(0, 100 - h2h_win)))
+    return cases
+
+
+def _draw_cases():
+    rng = random.Random(2)
+    cases = list(itertools.product(ODDS_EDGES, PERCENT_EDGES, PERCENT_EDGES, PERCENT_EDGES))
+    for _ in range(RANDOM_CASES):
+        cases.append((_random_odds(rng), rng.uniform(0, 100), rng.uniform(0, 100), rng.uniform(0, 100)))
+    return cases
+
+
+def _total_cases():
+    rng = random.Random(3)
+    cases = []
+    for odds, total_value, over in itertools.product(ODDS_EDGES, [0.5, 2.5, 3.5], [True, False]):
+        # средние голы ровно на линии, чуть выше и ниже, и далеко от неё
+        for avg_goals in (total_value, total_value - 0.01, total_value + 0.01, 0.0, 5.0):
+            cases.append((odds, avg_goals, avg_goals, total_value, over))
+    for _ in range(RANDOM_CASES):
+        cases.append((_random_odds(rng), round(rng.uniform(0, 4), 2), round(rng.uniform(0, 4), 2),
+                      rng.choice([0.5, 1.5, 2.5, 3.5, 4.5]), rng.random() < 0.5))
+    return cases
+
+
+def test_outcome_quality_parity():
+    cases = _outcome_cases()
+    expected = [reference_outcome(*case) for case in cases]
+    assert [calculate_outcome_quality(*case) for case in cases] == expected
+    assert outcome_quality_batch(*np.array(cases).T).tolist() == expected
+
+
+def test_draw_quality_parity():
+    cases = _draw_cases()
+    expected = [reference_draw(*case) for case in cases]
+    assert [calculate_draw_quality(*case) for case in cases] == expected
+    assert draw_quality_batch(*np.array(cases).T).tolist() == expected
+
+
+def test_total_quality_parity():
+    cases = _total_cases()
+    expected = [reference_total(*case) for case in cases]
+    scalar = [calculate_total_quality(odds, team, opponent, total_value, "больше" if over else "меньше")
+              for odds, team, opponent, total_value, over in cases]
+    assert scalar == expected
+    odds, team, opponent, total_value, over = (np.array(column) for column in zip(*cases))
+    assert total_quality_batch(odds, team, opponent, total_value, over.astype(bool)).tolist() == expected
+
+
+def test_total_quality_rejects_bad_line_and_type():
+    with pytest.raises(ValueError):
+        calculate_total_quality(2.0, 1.5, 1.5, 2.3, "больше")
+    with pytest.raises(ValueError):
+        calculate_total_quality(2.0, 1.5, 1.5, 2.5, "ровно")
+    with pytest.raises(ValueError):
+        total_quality_batch([2.0], [1.5], [1.5], [2.3], [True])
@@ -0,0 +1,33 @@
+import asyncio
+import time
+
+from aiogram.exceptions import TelegramRetryAfter
+from aiogram.methods import SendMessage
+
+from bet_bot.sender import SendScheduler
+
+
+def test_long_retry_after_pauses_all_chats():
+    async def scenario():
+        scheduler = SendScheduler(rate=100, burst=100, chat_rate=10, chat_burst=10)
+        sent = []
+        start = time.monotonic()
+
+        async def make_request(bot, method):
+            if method.chat_id == 1 and not sent:
+                sent.append((method.chat_id, time.monotonic() - start))
+                raise TelegramRetryAfter(method, "Too Many Requests", retry_after=1)
+            sent.append((method.chat_id, time.monotonic() - start))
+            return True
+
+        first = asyncio.create_task(scheduler(make_request, None, SendMessage(chat_id=1, text="a")))
+        await asyncio.sleep(0.05)
+        await scheduler(make_request, None, SendMessage(chat_id=2, text="b"))
+        await first
+        await scheduler.close()
+        return sent
+
+    sent = asyncio.run(scenario())
+    assert sorted(chat_id for chat_id, _ in sent) == [1, 1, 2]
+    # до конца паузы ни один чат не получил ни одного запроса
+    assert all(elapsed >= 1 for _, elapsed in sent[1:])
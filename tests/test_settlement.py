@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from bet_bot.db import make_bet_record
+from bet_bot.migrations import migrate
+from bet_bot.settlement import MatchResult, format_settlement, settle
+from bet_bot.summaries import add_to_summaries, read_summary
+
+
+SETTLED_AT = "2025-05-20 12:00:00"
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def add_bets(conn, records):
+    with conn:
+        conn.executemany('''
+        INSERT INTO bets (user_id, bet_type, odds, stats, quality, timestamp,
+                          team1, team2, market, line, probability)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', records)
+        add_to_summaries(conn, records)
+
+
+def bet(user_id, bet_type, odds, stats="", team1="Arsenal", team2="Chelsea"):
+    return make_bet_record(user_id, bet_type, odds, stats, 5, team1, team2)
+
+
+def test_settle_outcomes_and_profit(conn):
+    add_bets(conn, [
+        bet(1, "П1", 2.0), bet(1, "П2", 3.0), bet(1, "НИЧЬЯ", 3.5),
+        bet(1, "ТБ 2.5", 1.9), bet(1, "ТМ 2.5", 1.9),
+        bet(1, "Тотал больше", 2.0, "Тотал: больше 3.0"),
+        bet(2, "П1", 2.5, team1="Liverpool", team2="Everton"),
+    ])
+    [result] = settle(conn, [MatchResult("Arsenal", "Chelsea", 2, 1)], SETTLED_AT)
+
+    rows = dict(conn.execute("SELECT bet_type, result FROM bets WHERE user_id = 1").fetchall())
+    assert rows == {"П1": "win", "П2": "loss", "НИЧЬЯ": "loss", "ТБ 2.5": "win", "ТМ 2.5": "loss",
+                    "Тотал больше": "push"}
+    # ставки на другой матч не трогаются
+    assert conn.execute("SELECT result FROM bets WHERE user_id = 2").fetchone() == (None,)
+    assert (result.settled, result.wins) == (6, 2)
+    summary = read_summary(conn, 1)
+    assert (summary.settled, summary.wins) == (6, 2)
+    assert summary.profit == pytest.approx(1.0 + 0.9 - 1 - 1 - 1)
+
+
+def test_same_result_twice_is_settled_once(conn):
+    add_bets(conn, [bet(1, "П1", 2.0)])
+    settle(conn, [MatchResult("Arsenal", "Chelsea", 2, 1)], SETTLED_AT)
+    add_bets(conn, [bet(1, "П1", 2.0)])  # ставка после расчёта
+    [again] = settle(conn, [MatchResult("Arsenal", "Chelsea", 2, 1)], SETTLED_AT)
+
+    assert again.already_settled and again.settled == 0
+    assert conn.execute("SELECT team1, team2, bets FROM match_results").fetchall() == [("Arsenal", "Chelsea", 1)]
+    assert conn.execute("SELECT count(*) FROM bets WHERE result IS NULL").fetchone() == (1,)
+    assert "уже рассчитан" in format_settlement([again])
+
+    # другой матч тех же команд — с другим временем начала
+    [rematch] = settle(conn, [MatchResult("Arsenal", "Chelsea", 0, 0, "2099-06-01 15:00:00")], SETTLED_AT)
+    assert not rematch.already_settled and rematch.settled == 1
@@ -0,0 +1,86 @@
+import asyncio
+import json
+import sqlite3
+import time
+
+from bet_bot.bot import create_app
+from bet_bot.config import DEFAULT_STATS_FILE, Config
+from bet_bot.stats_store import StatsStore
+
+
+POLL_INTERVAL = 0.05
+
+
+def write_stats(path, data):
+    path.write_text(json.dumps(data, ensure_ascii=False), encoding="utf-8")
+
+
+def valid_stats(season: str) -> dict:
+    with open(DEFAULT_STATS_FILE, encoding="utf-8") as f:
+        data = json.load(f)
+    data["season"] = season
+    return data
+
+
+async def wait_until(condition, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "условие не выполнилось за отведённое время"
+        await asyncio.sleep(POLL_INTERVAL)
+
+
+def test_reload_rejects_wrong_shape_and_keeps_snapshot(tmp_path):
+    path = tmp_path / "stats.json"
+    write_stats(path, valid_stats("2024/25"))
+
+    async def scenario():
+        store = StatsStore(str(path), poll_interval=POLL_INTERVAL)
+        for data in ({"team_stats": []}, [], {"team_stats": {"Arsenal": 1}},
+                     {"team_stats": {}, "h2h_stats": {"A-B": None}}):
+            write_stats(path, data)
+            assert await store.reload() is False
+            assert store.current.version == 1 and store.current.season == "2024/25"
+
+    asyncio.run(scenario())
+
+
+def test_watch_survives_bad_file_and_picks_up_next_version(tmp_path):
+    path = tmp_path / "stats.json"
+    write_stats(path, valid_stats("2024/25"))
+
+    async def scenario():
+        store = StatsStore(str(path), poll_interval=POLL_INTERVAL)
+        store.start()
+        try:
+            write_stats(path, {"team_stats": []})
+            await wait_until(lambda: store._signature == store._file_signature())
+            write_stats(path, valid_stats("2025/26"))
+            await wait_until(lambda: store.current.season == "2025/26")
+            assert store.current.version == 2
+        finally:
+            await store.close()
+
+    asyncio.run(scenario())
+
+
+def test_app_close_flushes_journal_when_a_component_fails(tmp_path):
+    config = Config(api_token="123:test", database_name=str(tmp_path / "bets.db"),
+                    fsm_database=str(tmp_path / "fsm.db"))
+
+    async def scenario():
+        app = create_app(config)
+        await app.db.open()
+        app.journal.start()
+
+        async def broken_close():
+            raise RuntimeError("stats")
+        app.stats.close = broken_close
+        app.journal.add_bet(1, "П1", 2.1, "П1: Arsenal vs Chelsea", 6, "Arsenal", "Chelsea")
+        await app.close()
+
+    asyncio.run(scenario())
+    conn = sqlite3.connect(config.database_name)
+    try:
+        assert conn.execute("SELECT COUNT(*) FROM bets").fetchone() == (1,)
+    finally:
+        conn.close()
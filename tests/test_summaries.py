@@ -0,0 +1,69 @@
+import sqlite3
+
+import pytest
+
+from bet_bot.db import make_bet_record
+from bet_bot.migrations import migrate
+from bet_bot.settlement import MatchResult, settle
+from bet_bot.summaries import add_to_summaries, format_summary, read_summary, rebuild_summaries
+
+
+TABLES = ("user_summary", "user_market_summary", "user_week_summary", "user_team_summary")
+
+
+@pytest.fixture
+def conn():
+    conn = sqlite3.connect(":memory:")
+    migrate(conn)
+    yield conn
+    conn.close()
+
+
+def add_bets(conn, records):
+    with conn:
+        conn.executemany('''
+        INSERT INTO bets (user_id, bet_type, odds, stats, quality, timestamp,
+                          team1, team2, market, line, probability)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', records)
+        add_to_summaries(conn, records)
+
+
+def bet(user_id, bet_type, odds, timestamp, team1="Arsenal", team2="Chelsea", stats=""):
+    # коэффициенты точно представимы в float, чтобы суммы не зависели от порядка
+    record = make_bet_record(user_id, bet_type, odds, stats, 5 + user_id, team1, team2)
+    return record[:5] + (timestamp,) + record[6:]
+
+
+def summary_tables(conn) -> dict:
+    return {table: conn.execute(f"SELECT * FROM {table} ORDER BY 1, 2").fetchall() for table in TABLES}
+
+
+def test_incremental_summaries_match_rebuild(conn):
+    # воскресенье 23:59:59 и понедельник 00:00:00 — разные недели
+    add_bets(conn, [
+        bet(1, "П1", 2.0, "2025-03-09 23:59:59"),
+        bet(1, "П1", 1.5, "2025-03-10 00:00:00"),
+        bet(2, "ТБ 2.5", 1.75, "2025-03-04 12:00:00", "Liverpool", "Everton"),
+    ])
+    # вторая пачка: тот же пользователь с более ранней ставкой и свободная форма без команд
+    add_bets(conn, [
+        bet(1, "П2", 3.5, "2025-03-01 08:00:00"),
+        bet(1, "Тотал больше", 2.25, "2025-03-11 18:00:00", None, None, "Тотал: больше 3.0"),
+        bet(2, "НИЧЬЯ", 3.25, "2025-03-05 19:00:00"),
+        bet(3, "ТМ 2.5", 1.5, "2025-03-12 10:00:00"),
+    ])
+    settle(conn, [MatchResult("Arsenal", "Chelsea", 1, 1), MatchResult("Liverpool", "Everton", 3, 0)],
+           "2025-03-20 12:00:00")
+
+    incremental = summary_tables(conn)
+    assert incremental["user_summary"][0] == (1, 4, 24, 9.25, "2025-03-01 08:00:00", "2025-03-11 18:00:00", 3, 0, -3)
+    assert incremental["user_week_summary"][:3] == [
+        (1, "2025-02-24", 1), (1, "2025-03-03", 1), (1, "2025-03-10", 2),
+    ]
+    rebuild_summaries(conn)
+    assert summary_tables(conn) == incremental
+
+    summary = read_summary(conn, 1)
+    assert (summary.bets, summary.settled, summary.wins, summary.profit) == (4, 3, 0, -3)
+    assert "Всего ставок: 4" in format_summary(summary)
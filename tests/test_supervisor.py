@@ -0,0 +1,95 @@
+import asyncio
+import datetime
+import os
+import queue
+import signal
+import time
+
+import pytest
+from aiogram.types import Chat, Message, Update, User
+
+from bet_bot.supervisor import HashRing, Supervisor
+
+
+WAIT_TIMEOUT = 60.0
+
+
+def make_update(update_id: int, user_id: int) -> Update:
+    # edited_message бот не обрабатывает: воркер только снимает апдейт с
+    # очереди и ничего не отправляет в сеть
+    return Update(update_id=update_id, edited_message=Message(
+        message_id=update_id, date=datetime.datetime.now(), edit_date=0,
+        chat=Chat(id=user_id, type="private"), from_user=User(id=user_id, is_bot=False, first_name="u"), text="x",
+    ))
+
+
+async def wait_until(condition, timeout: float = WAIT_TIMEOUT):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("условие не выполнилось за отведённое время")
+        await asyncio.sleep(0.1)
+
+
+@pytest.fixture
+def worker_env(tmp_path, monkeypatch):
+    monkeypatch.setenv("API_TOKEN", "123:test")
+    monkeypatch.setenv("DATABASE_NAME", str(tmp_path / "bets.db"))
+    monkeypatch.setenv("FSM_DATABASE", str(tmp_path / "fsm.db"))
+    monkeypatch.delenv("METRICS_PORT", raising=False)
+
+
+def test_hash_ring_is_stable_and_uses_all_nodes():
+    ring = HashRing(4)
+    nodes = [ring.node(user_id) for user_id in range(1000)]
+    assert set(nodes) == {0, 1, 2, 3}
+    assert nodes == [HashRing(4).node(user_id) for user_id in range(1000)]
+
+
+def test_killed_worker_is_replaced_and_processes_new_updates(worker_env):
+    async def scenario():
+        supervisor = Supervisor(1, queue_size=100, concurrency=4)
+        worker = supervisor.workers[0]
+        supervisor.start()
+        monitor = asyncio.create_task(supervisor.monitor())
+        try:
+            await supervisor.feed_update(None, make_update(1, 1))
+            await wait_until(lambda: worker.depth() == 0)
+            # Простаивающий воркер ждёт в queue.get() с захваченной блокировкой чтения
+            await asyncio.sleep(0.5)
+            os.kill(worker.process.pid, signal.SIGKILL)
+            await wait_until(lambda: worker.restarts == 1 and worker.process.is_alive())
+
+            for update_id in range(2, 12):
+                await supervisor.feed_update(None, make_update(update_id, 1))
+            await wait_until(lambda: worker.depth() == 0)
+        finally:
+            monitor.cancel()
+            await supervisor.stop()
+        assert worker.process.exitcode == 0
+
+    asyncio.run(scenario())
+
+
+def test_full_worker_queue_drops_updates_after_timeout():
+    async def scenario():
+        supervisor = Supervisor(1, queue_size=1, put_timeout=0.2)
+        worker = supervisor.workers[0]
+        worker.queue = queue.Queue(maxsize=1)  # воркер завис и не разбирает очередь
+        await supervisor.feed_update(None, make_update(1, 1))
+
+        start = time.monotonic()
+        await supervisor.feed_update(None, make_update(2, 1))
+        assert 0.15 <= time.monotonic() - start < 1
+        # зависший воркер больше не задерживает приём
+        start = time.monotonic()
+        await supervisor.feed_update(None, make_update(3, 1))
+        assert time.monotonic() - start < 0.1
+        assert worker.dropped == 2 and worker.stalled
+
+        worker.queue.get_nowait()
+        await supervisor.feed_update(None, make_update(4, 1))
+        assert worker.dropped == 2 and not worker.stalled
+        assert supervisor.status()[0]["dropped"] == 2
+
+    asyncio.run(scenario())